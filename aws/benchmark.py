@@ -0,0 +1,372 @@
+#!/usr/bin/env python
+"""Benchmark the terminators against an in-process stand-in for AWS, reporting the wall time, API calls and peak memory of each resource type."""
+
+import argparse
+import datetime
+import functools
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+import typing
+
+import botocore.awsrequest
+import botocore.client
+import botocore.exceptions
+import botocore.hooks
+import botocore.model
+import botocore.session
+import dateutil.tz
+
+from terminator import (
+    cleanup,
+    client_pool,
+    get_terminator_types,
+    logger,
+    metrics,
+)
+from terminator.clients import DEFAULT_MAX_ATTEMPTS
+from terminator.key_value_store import SqliteBackend
+from terminator.rate_limit import THROTTLING_ERROR_CODES
+
+ACCOUNT_ID = '123456789012'
+REGION = 'us-east-1'
+SSM_BUCKET = 'ssm-encrypted-test-bucket'
+# Old enough for every resource to be stale.
+CREATED_TIME = datetime.datetime(2020, 1, 1, tzinfo=dateutil.tz.tzutc())
+# The page size of paginated operations called without one, by service. EC2 returns everything unless asked for pages.
+DEFAULT_PAGE_SIZES = {
+    'ec2': None,
+    'iam': 100,
+    'rds': 100,
+    's3': 1000,
+}
+
+
+class Population:
+    """Resources of one kind held by the fake, listed a page at a time in a stable order while they are being deleted."""
+    def __init__(self, items: typing.List[typing.Dict[str, typing.Any]], key: typing.Callable[[typing.Dict[str, typing.Any]], str]):
+        self.items: typing.List[typing.Optional[typing.Dict[str, typing.Any]]] = list(items)
+        self.index = {key(item): position for position, item in enumerate(items)}
+        self._lock = threading.Lock()
+
+    def page(self, start: int, size: int) -> typing.Tuple[typing.List[typing.Dict[str, typing.Any]], typing.Optional[int]]:
+        """Return the items left from the given position, and the position of the next page if there is one."""
+        page = []
+        position = start
+
+        with self._lock:
+            while position < len(self.items) and len(page) < size:
+                if self.items[position] is not None:
+                    page.append(self.items[position])
+
+                position += 1
+
+        return page, position if position < len(self.items) else None
+
+    def all(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        return self.page(0, len(self.items))[0]
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            position = self.index.pop(key, None)
+
+            if position is None:
+                return False
+
+            self.items[position] = None
+
+            return True
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+class FakeAws:
+    """
+    In-process stand-in for the AWS APIs used by the benchmarked terminators.
+    Requests are answered from a before-call hook, so they never reach the network. The before-send and needs-retry events are emitted for each
+    attempt, which drives the rate limiter and the API call metrics as real requests would, and throttling is retried with jittered backoff.
+    """
+    def __init__(self, populations: typing.Dict[str, Population], latency: float, throttle: float):
+        self.populations = populations
+        self.latency = latency
+        self.throttle = throttle
+        self.unsupported: typing.Set[str] = set()
+        self._paginators = botocore.session.get_session()
+        self._handlers: typing.Dict[typing.Tuple[str, str], typing.Callable[[typing.Dict[str, typing.Any]], typing.Dict[str, typing.Any]]] = {
+            ('ec2', 'DescribeInstances'): lambda params: {'Reservations': self.populations['instances']},
+            ('ec2', 'TerminateInstances'): lambda params: self.delete('instances', params['InstanceIds']),
+            ('ec2', 'DescribeVolumes'): lambda params: {'Volumes': self.populations['volumes']},
+            ('ec2', 'DeleteVolume'): lambda params: self.delete('volumes', [params['VolumeId']]),
+            ('ec2', 'DescribeNetworkInterfaces'): lambda params: {'NetworkInterfaces': self.populations['enis']},
+            ('ec2', 'DeleteNetworkInterface'): lambda params: self.delete('enis', [params['NetworkInterfaceId']]),
+            ('iam', 'ListRoles'): lambda params: {'Roles': self.populations['roles']},
+            ('iam', 'DeleteRole'): lambda params: self.delete('roles', [params['RoleName']]),
+            ('rds', 'DescribeDBInstances'): lambda params: {'DBInstances': self.populations['db_instances']},
+            ('rds', 'ModifyDBInstance'): lambda params: {},
+            ('rds', 'DeleteDBInstance'): lambda params: self.delete('db_instances', [params['DBInstanceIdentifier']]),
+            ('s3', 'ListBuckets'): lambda params: {'Buckets': self.populations['buckets'].all()},
+            ('s3', 'DeleteBucket'): self.delete_bucket,
+            ('s3', 'ListMultipartUploads'): lambda params: {'Uploads': []},
+            ('s3', 'ListObjectVersions'): lambda params: {'Versions': self.populations[f'objects:{params["Bucket"]}'], 'DeleteMarkers': []},
+            ('s3', 'ListObjectsV2'): lambda params: {'Contents': self.populations[f'objects:{params["Bucket"]}']},
+            ('s3', 'DeleteObjects'): lambda params: self.delete(f'objects:{params["Bucket"]}', [item['Key'] for item in params['Delete']['Objects']]),
+            ('s3', 'DeleteObject'): lambda params: self.delete(f'objects:{params["Bucket"]}', [params['Key']]),
+        }
+
+    def register(self, client: botocore.client.BaseClient) -> None:
+        client.meta.events.register('before-parameter-build', save_params)
+        client.meta.events.register_first('before-call', functools.partial(self.handle, client.meta.events))
+
+    def handle(self, events: botocore.hooks.HierarchicalEmitter, model: botocore.model.OperationModel, context: typing.Dict[str, typing.Any],
+               **_kwargs: typing.Any) -> typing.Tuple[botocore.awsrequest.AWSResponse, typing.Dict[str, typing.Any]]:
+        params = context['benchmark_params']
+        service_id = model.service_model.service_id.hyphenize()
+        request_dict = {'context': {}}
+
+        for attempt in range(1, DEFAULT_MAX_ATTEMPTS + 1):
+            events.emit(f'before-send.{service_id}.{model.name}', request=None)
+            time.sleep(self.latency)
+
+            if random.random() < self.throttle:
+                response = self.error(400, 'Throttling', 'Rate exceeded')
+            else:
+                response = self.respond(model, params)
+
+            events.emit(f'needs-retry.{service_id}.{model.name}', response=response, endpoint=None, operation=model, attempts=attempt,
+                        caught_exception=None, request_dict=request_dict)
+
+            if response[1].get('Error', {}).get('Code') not in THROTTLING_ERROR_CODES:
+                break
+
+            time.sleep(random.random() * min(20, 2 ** (attempt - 1)))
+
+        response[1]['ResponseMetadata'] = {'HTTPStatusCode': response[0].status_code, 'RetryAttempts': attempt - 1}
+
+        return response
+
+    def respond(self, model: botocore.model.OperationModel, params: typing.Dict[str, typing.Any]
+                ) -> typing.Tuple[botocore.awsrequest.AWSResponse, typing.Dict[str, typing.Any]]:
+        key = (model.service_model.service_name, model.name)
+        handler = self._handlers.get(key)
+
+        if handler is None:
+            self.unsupported.add('.'.join(key))
+            return self.error(400, 'UnsupportedOperation', f'{".".join(key)} is not supported by the benchmark')
+
+        try:
+            parsed = handler(params)
+        except botocore.exceptions.ClientError as ex:
+            return self.error(ex.response['ResponseMetadata']['HTTPStatusCode'], ex.response['Error']['Code'], ex.response['Error']['Message'])
+
+        return botocore.awsrequest.AWSResponse('', 200, {}, None), self.paginate(key, params, parsed)
+
+    def paginate(self, key: typing.Tuple[str, str], params: typing.Dict[str, typing.Any], parsed: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        """Return a page of the populations in the response, following the pagination model of the operation."""
+        try:
+            config = self._paginators.get_paginator_model(key[0]).get_paginator(key[1])
+        except (ValueError, botocore.exceptions.UnknownServiceError):
+            config = None
+
+        for name, value in list(parsed.items()):
+            if not isinstance(value, Population):
+                continue
+
+            if not config:
+                parsed[name] = value.all()
+                continue
+
+            input_token = as_list(config['input_token'])[0]
+            output_token = as_list(config['output_token'])[0]
+            size = params.get(config.get('limit_key')) or DEFAULT_PAGE_SIZES.get(key[0]) or len(value.items)
+            page, position = value.page(int(params.get(input_token) or 0), size)
+            parsed[name] = page
+
+            if config.get('more_results'):
+                parsed[config['more_results']] = position is not None
+
+            if position is not None:
+                parsed[output_token] = str(position)
+
+        return parsed
+
+    def delete(self, name: str, keys: typing.List[str]) -> typing.Dict[str, typing.Any]:
+        for key in keys:
+            if not self.populations[name].delete(key):
+                raise botocore.exceptions.ClientError({'Error': {'Code': 'NotFound', 'Message': key}, 'ResponseMetadata': {'HTTPStatusCode': 404}}, name)
+
+        return {}
+
+    def delete_bucket(self, params: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        if len(self.populations.get(f'objects:{params["Bucket"]}', ())):
+            error = {'Error': {'Code': 'BucketNotEmpty', 'Message': params['Bucket']}, 'ResponseMetadata': {'HTTPStatusCode': 409}}
+            raise botocore.exceptions.ClientError(error, 'DeleteBucket')
+
+        return self.delete('buckets', [params['Bucket']])
+
+    @staticmethod
+    def error(status_code: int, code: str, message: str) -> typing.Tuple[botocore.awsrequest.AWSResponse, typing.Dict[str, typing.Any]]:
+        return botocore.awsrequest.AWSResponse('', status_code, {}, None), {'Error': {'Code': code, 'Message': message}}
+
+
+def save_params(params: typing.Dict[str, typing.Any], context: typing.Dict[str, typing.Any], **_kwargs: typing.Any) -> None:
+    # before-call is given the serialized request, so keep the parameters of the call in the request context, which both events share
+    context['benchmark_params'] = dict(params)
+
+
+def as_list(value: typing.Union[str, typing.List[str]]) -> typing.List[str]:
+    return value if isinstance(value, list) else [value]
+
+
+def create_populations(args: argparse.Namespace) -> typing.Dict[str, Population]:
+    buckets = [{'Name': f'bucket-{number}', 'CreationDate': CREATED_TIME} for number in range(args.buckets)]
+    populations = {
+        'instances': Population([{
+            'ReservationId': f'r-{number:017x}',
+            'Instances': [{
+                'InstanceId': f'i-{number:017x}',
+                'PrivateDnsName': f'ip-{number}.ec2.internal',
+                'LaunchTime': CREATED_TIME,
+                'State': {'Name': 'running'},
+            }],
+        } for number in range(args.instances)], lambda item: item['Instances'][0]['InstanceId']),
+        'volumes': Population([{'VolumeId': f'vol-{number:017x}', 'CreateTime': CREATED_TIME} for number in range(args.volumes)],
+                              lambda item: item['VolumeId']),
+        'enis': Population([{'NetworkInterfaceId': f'eni-{number:017x}'} for number in range(args.enis)], lambda item: item['NetworkInterfaceId']),
+        'roles': Population([{
+            'RoleName': f'ansible-test-{number}',
+            'RoleId': f'AROA{number:016d}',
+            'CreateDate': CREATED_TIME,
+        } for number in range(args.roles)], lambda item: item['RoleName']),
+        'db_instances': Population([{
+            'DBInstanceIdentifier': f'db-{number}',
+            'DBInstanceArn': f'arn:aws:rds:{REGION}:{ACCOUNT_ID}:db:db-{number}',
+        } for number in range(args.db_instances)], lambda item: item['DBInstanceIdentifier']),
+    }
+
+    for bucket in buckets:
+        populations[f'objects:{bucket["Name"]}'] = create_objects(args.s3_objects // max(1, args.buckets))
+
+    if args.ssm_objects:
+        buckets.append({'Name': SSM_BUCKET, 'CreationDate': CREATED_TIME})
+        populations[f'objects:{SSM_BUCKET}'] = create_objects(args.ssm_objects)
+
+    populations['buckets'] = Population(buckets, lambda item: item['Name'])
+
+    return populations
+
+
+def create_objects(count: int) -> Population:
+    objects = [{'Key': f'objects/{number:08d}', 'VersionId': 'null', 'LastModified': CREATED_TIME} for number in range(count)]
+
+    return Population(objects, lambda item: item['Key'])
+
+
+def seed_database(path: str, populations: typing.Dict[str, Population], count: int) -> None:
+    """Track the first resources of each type whose age is kept in the database as seen long ago, so they are stale, leaving the others to be tracked."""
+    keys = [f'Ec2Eni:{item["NetworkInterfaceId"]}' for item in populations['enis'].all()[:count]]
+    keys += [f'RdsDbInstance:{item["DBInstanceArn"]}' for item in populations['db_instances'].all()[:count]]
+
+    backend = SqliteBackend(path)
+    backend.set_many(dict.fromkeys(keys, CREATED_TIME.isoformat()))
+
+
+def main():
+    args = parse_args()
+
+    logger.setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+    logger.addHandler(logging.StreamHandler())
+
+    os.environ.pop('AWS_PROFILE', None)
+    os.environ.update(AWS_ACCESS_KEY_ID='benchmark', AWS_SECRET_ACCESS_KEY='benchmark', CLEANUP_AWS_REGION=REGION)
+
+    random.seed(args.seed)
+    populations = create_populations(args)
+    fake = FakeAws(populations, args.latency, args.throttle)
+    client_pool.add_hook(fake.register)
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.sqlite')
+        seed_database(path, populations, args.db_keys)
+
+        # import the modules of the targets up front, so their import is not counted in the memory of the first target
+        get_terminator_types(args.target)
+
+        for target in args.target:
+            if not args.no_memory:
+                tracemalloc.start()
+
+            start = time.monotonic()
+            cleanup(check=args.check, force=False, targets=[target], concurrency=args.concurrency, account_id=ACCOUNT_ID, kvs_backend='sqlite', kvs_path=path)
+            elapsed = time.monotonic() - start
+
+            peak = 0
+
+            if not args.no_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            for item in metrics.summary():
+                if item['type'] == target:
+                    results.append(dict(item, wall_time=round(elapsed, 3), peak_memory=peak))
+
+    if fake.unsupported:
+        logger.warning('operations not supported by the benchmark: %s', ', '.join(sorted(fake.unsupported)))
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+        return
+
+    print(f'{"type":<20} {"found":>8} {"api calls":>10} {"wall time":>10} {"discovery":>10} {"peak memory":>12}  statuses')
+
+    for item in results:
+        statuses = ', '.join(f'{status}={count}' for status, count in item['statuses'].items())
+        print(f'{item["type"]:<20} {item["found"]:>8} {item["api_calls"]:>10} {item["wall_time"]:>9.2f}s {item["discovery_time"]:>9.2f}s '
+              f'{item["peak_memory"] / 1024 / 1024:>10.1f}MB  {statuses}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the terminators against an in-process stand-in for AWS.')
+
+    parser.add_argument('--target',
+                        action='append',
+                        help='class to run, each in a run of its own (default: all the classes the benchmark has resources for)')
+
+    parser.add_argument('--instances', type=int, default=1000, help='the number of EC2 instances (default: 1000)')
+    parser.add_argument('--volumes', type=int, default=200, help='the number of EBS volumes, each deleted with a call of its own (default: 200)')
+    parser.add_argument('--enis', type=int, default=10000, help='the number of network interfaces (default: 10000)')
+    parser.add_argument('--roles', type=int, default=500, help='the number of IAM roles (default: 500)')
+    parser.add_argument('--db-instances', type=int, default=100, help='the number of RDS instances (default: 100)')
+    parser.add_argument('--buckets', type=int, default=5, help='the number of S3 buckets (default: 5)')
+    parser.add_argument('--s3-objects', type=int, default=50000, help='the number of objects spread over the S3 buckets (default: 50000)')
+    parser.add_argument('--ssm-objects', type=int, default=10000, help='the number of objects in the SSM bucket (default: 10000)')
+    parser.add_argument('--db-keys', type=int, default=500,
+                        help='the number of network interfaces and of RDS instances already tracked as stale in the database (default: 500)')
+
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to each API call (default: 0)')
+    parser.add_argument('--throttle', type=float, default=0.0, help='the fraction of API calls which are throttled (default: 0)')
+    parser.add_argument('--concurrency', type=int, help='The number of resource types processed in parallel (default: $TERMINATOR_CONCURRENCY or 16)')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the injected throttling (default: 0)')
+
+    parser.add_argument('-c', '--check', action='store_true', help='do not terminate resources')
+    parser.add_argument('--no-memory', action='store_true', help='do not trace memory, which slows down the run')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log the runs')
+
+    args = parser.parse_args()
+
+    if not args.target:
+        args.target = ['Ec2Instance', 'Ec2Volume', 'Ec2Eni', 'IamRole', 'RdsDbInstance', 'S3Bucket', 'SSMBucketObjects']
+
+    return args
+
+
+if __name__ == '__main__':
+    main()
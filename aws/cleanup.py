@@ -17,10 +17,9 @@ except ImportError:
 
 from terminator import (
     cleanup,
-    get_concrete_subclasses,
     logger,
-    Terminator,
 )
+from terminator.manifest import TERMINATOR_TYPES
 
 
 @contextlib.contextmanager
@@ -74,7 +73,9 @@ def main():
         logger.setLevel(logging.DEBUG)
 
     with update_aws_environ(aws_profile=args.profile, aws_region=','.join(args.region), dynamodb_table=args.table_name):
-        cleanup(check=args.check, force=args.force, targets=args.target)
+        cleanup(check=args.check, force=args.force, targets=args.target, concurrency=args.concurrency, region_concurrency=args.region_concurrency,
+                account_id=args.account_id, tag_inventory=args.tag_inventory, kvs_backend=args.kvs_backend, kvs_path=args.kvs_path,
+                metrics_emf=args.metrics_emf, home_region=args.home_region)
 
 
 def parse_args():
@@ -85,15 +86,32 @@ def parse_args():
                         required=True,
                         help='The AWS region from which resources will be terminated')
 
+    parser.add_argument('--home-region',
+                        required=False,
+                        help='The region in which global resources, such as IAM roles, are terminated (default: $TERMINATOR_HOME_REGION or the first --region)')
+
     parser.add_argument('--profile',
                         required=True,
                         help='The AWS profile')
 
+    parser.add_argument('--account-id',
+                        required=False,
+                        help='The AWS account ID, to avoid looking it up with STS (default: $TERMINATOR_AWS_ACCOUNT_ID)')
+
     parser.add_argument('--table-name',
                         required=False,
                         default="terminator_cleanup_resources",
                         help='The DynamoDB table name use to track resources lifetime')
 
+    parser.add_argument('--kvs-backend',
+                        choices=['dynamodb', 'sqlite'],
+                        required=False,
+                        help='Where to track resources lifetime (default: $TERMINATOR_KVS_BACKEND or dynamodb)')
+
+    parser.add_argument('--kvs-path',
+                        required=False,
+                        help='The SQLite database file used by the sqlite backend (default: $TERMINATOR_KVS_PATH or terminator.sqlite)')
+
     parser.add_argument('-c', '--check',
                         action='store_true',
                         help='do not terminate resources')
@@ -102,12 +120,32 @@ def parse_args():
                         action='store_true',
                         help='do not skip unsupported or stale resources')
 
+    parser.add_argument('--tag-inventory',
+                        action='store_true',
+                        default=None,
+                        help='skip resource types with no tagged resources in the Resource Groups Tagging API (default: $TERMINATOR_TAG_INVENTORY)')
+
+    parser.add_argument('--metrics-emf',
+                        action='store_true',
+                        default=None,
+                        help='also print the metrics of the run in the CloudWatch Embedded Metric Format (default: $TERMINATOR_METRICS_EMF)')
+
     parser.add_argument('-v', '--verbose',
                         action='store_true',
                         help='increase logging verbosity')
 
+    parser.add_argument('--concurrency',
+                        type=int,
+                        required=False,
+                        help='The number of resource types processed in parallel (default: $TERMINATOR_CONCURRENCY or 16)')
+
+    parser.add_argument('--region-concurrency',
+                        type=int,
+                        required=False,
+                        help='The number of regions swept in parallel (default: $TERMINATOR_REGION_CONCURRENCY or 1)')
+
     parser.add_argument('--target',
-                        choices=sorted([value.__name__ for value in get_concrete_subclasses(Terminator)] + ['Database']),
+                        choices=sorted(list(TERMINATOR_TYPES) + ['Database']),
                         metavar='target',
                         action='append',
                         help='class to run')
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""Generate the manifest of terminator types, which lets the terminator package import only the modules defining the types a run needs."""
+
+import argparse
+import ast
+import importlib
+import inspect
+import os
+import sys
+import textwrap
+import typing
+
+from terminator import (
+    Terminator,
+    get_concrete_subclasses,
+)
+
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), 'terminator', 'manifest.py')
+
+HEADER = '''"""
+Terminator type names with the module defining each type and the boto3 service it cleans up.
+Generated by generate_manifest.py, do not edit. Run `make manifest` after adding, renaming or removing a terminator class.
+"""
+import typing
+
+TERMINATOR_TYPES: typing.Dict[str, typing.Tuple[str, str]] = {
+'''
+
+
+def main():
+    args = parse_args()
+    manifest = generate_manifest()
+
+    if args.check:
+        with open(MANIFEST_PATH, encoding='utf-8') as manifest_file:
+            if manifest_file.read() != manifest:
+                sys.exit(f'{MANIFEST_PATH} is out of date, run `make manifest` to update it')
+
+        return
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as manifest_file:
+        manifest_file.write(manifest)
+
+
+def generate_manifest() -> str:
+    package_dir = os.path.dirname(MANIFEST_PATH)
+
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith('.py') and name not in ('__init__.py', 'manifest.py'):
+            importlib.import_module(f'terminator.{os.path.splitext(name)[0]}')
+
+    lines = [HEADER]
+
+    for terminator_type in sorted(get_concrete_subclasses(Terminator), key=lambda value: value.__name__):
+        module_name = terminator_type.__module__.rpartition('.')[2]
+        lines.append(f'    {terminator_type.__name__!r}: ({module_name!r}, {get_service_name(terminator_type)!r}),\n')
+
+    lines.append('}\n')
+
+    return ''.join(lines)
+
+
+def get_service_name(terminator_type: typing.Type[Terminator]) -> str:
+    """Return the boto3 service name the create method of the given type passes to Terminator._create or Terminator._create_pages."""
+    tree = ast.parse(textwrap.dedent(inspect.getsource(terminator_type.create)))
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in ('_create', '_create_pages') and len(node.args) >= 3:
+            if isinstance(node.args[2], ast.Constant) and isinstance(node.args[2].value, str):
+                return node.args[2].value
+
+    raise ValueError(f'{terminator_type.__name__}.create does not pass a service name to Terminator._create or Terminator._create_pages')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate the manifest of terminator types.')
+
+    parser.add_argument('--check',
+                        action='store_true',
+                        help='fail if the manifest is out of date instead of updating it')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
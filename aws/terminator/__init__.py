@@ -1,150 +1,428 @@
 import abc
+import atexit
+import concurrent.futures
 import datetime
+import importlib
 import inspect
 import json
 import logging
 import os
+import threading
+import time
 import traceback
 import typing
 
-from boto3.dynamodb.conditions import Attr
-import boto3
 import botocore
 import botocore.client
 import botocore.exceptions
 import dateutil.tz
 
+from .clients import ClientPool
+from .execution import log_buffer, run_graph, run_in_order
+from .inventory import TagInventory
+from .key_value_store import DEFAULT_SQLITE_PATH, DynamoDbBackend, KeyValueBackend, KeyValueStore, SqliteBackend
+from .manifest import TERMINATOR_TYPES
+from .metrics import Metrics
+from .pagination import Filter, compile_expression, paginate
+from .rate_limit import THROTTLING_ERROR_CODES
+from .scheduler import Scheduler, Unit
+
 logger = logging.getLogger('cleanup')
 
 
 T = typing.TypeVar('T')
 
+DEFAULT_CONCURRENCY = 16
+DEFAULT_REGION_CONCURRENCY = 1
+DEFAULT_DEADLINE_RESERVE = 20
+DEFAULT_KVS_BACKEND = 'dynamodb'
+
 
 def get_cleanup_aws_regions():
     regions = os.environ.get("CLEANUP_AWS_REGION") or "us-east-1"
     return [x for x in regions.replace(' ', '').split(',') if x]
 
 
-def log_exception(message: str, *args, level: int = logging.ERROR) -> None:
+def get_home_region(regions: typing.List[str]) -> str:
+    """Return the region global resource types are cleaned up in, which defaults to the first of the given regions."""
+    return os.environ.get('TERMINATOR_HOME_REGION') or regions[0]
+
+
+def get_concurrency() -> int:
+    """Return the number of terminator types which may be processed in parallel."""
+    return max(1, int(os.environ.get('TERMINATOR_CONCURRENCY') or DEFAULT_CONCURRENCY))
+
+
+def get_tag_inventory_enabled() -> bool:
+    """Return True if the Resource Groups Tagging API should be used to skip the discovery of resource types with no tagged resources."""
+    return os.environ.get('TERMINATOR_TAG_INVENTORY', '').lower() in ('1', 'true', 'yes')
+
+
+def get_metrics_emf_enabled() -> bool:
+    """Return True if the metrics of a run should also be printed in the CloudWatch Embedded Metric Format."""
+    return os.environ.get('TERMINATOR_METRICS_EMF', '').lower() in ('1', 'true', 'yes')
+
+
+def get_region_concurrency() -> int:
+    """Return the number of regions which may be swept in parallel."""
+    return max(1, int(os.environ.get('TERMINATOR_REGION_CONCURRENCY') or DEFAULT_REGION_CONCURRENCY))
+
+
+def get_deadline_reserve() -> float:
+    """Return the number of seconds before the deadline of a run after which no further resource types are started."""
+    return float(os.environ.get('TERMINATOR_DEADLINE_RESERVE') or DEFAULT_DEADLINE_RESERVE)
+
+
+def get_kvs_backend(name: typing.Optional[str] = None, path: typing.Optional[str] = None) -> KeyValueBackend:
+    """Return the key/value store backend with the given name, or the one set in TERMINATOR_KVS_BACKEND, defaulting to DynamoDB."""
+    name = name or os.environ.get('TERMINATOR_KVS_BACKEND') or DEFAULT_KVS_BACKEND
+
+    if name == 'dynamodb':
+        return DynamoDbBackend(os.environ.get("DYNAMODB_TABLE_NAME"), os.environ.get("TERMINATOR_AWS_REGION"), client_pool.resource)
+
+    if name == 'sqlite':
+        return SqliteBackend(path or os.environ.get('TERMINATOR_KVS_PATH') or DEFAULT_SQLITE_PATH)
+
+    raise ValueError(f'unknown key/value store backend: {name}')
+
+
+def log_exception(message: str, *args, level: int = logging.ERROR, exception: typing.Optional[BaseException] = None) -> None:
+    """Log the given message with the traceback of the given exception, or of the exception being handled."""
+    if exception:
+        formatted = ''.join(traceback.format_exception(type(exception), exception, exception.__traceback__))
+    else:
+        formatted = traceback.format_exc()
+
     payload = {
         "message": (message % args).strip(),
-        "traceback": traceback.format_exc().strip(),
+        "traceback": formatted.strip(),
     }
 
     logger.log(level, json.dumps(payload))
 
 
-def import_plugins() -> None:
-    skip_files = ('__init__.py',)
-    import_names = [os.path.splitext(name)[0] for name in os.listdir(os.path.dirname(__file__)) if name.endswith('.py') and name not in skip_files]
-    for import_name in import_names:
-        __import__(f'terminator.{import_name}')
+def import_plugins(names: typing.Iterable[str]) -> None:
+    """Import the modules defining the given terminator types, as recorded in the manifest."""
+    for module_name in sorted(set(TERMINATOR_TYPES[name][0] for name in names if name in TERMINATOR_TYPES)):
+        importlib.import_module(f'{__name__}.{module_name}')
+
 
+def cleanup(check: bool, force: bool, targets: typing.Optional[typing.List[str]] = None, concurrency: typing.Optional[int] = None,
+            region_concurrency: typing.Optional[int] = None, account_id: typing.Optional[str] = None, tag_inventory: typing.Optional[bool] = None,
+            deadline: typing.Optional[float] = None, kvs_backend: typing.Optional[str] = None, kvs_path: typing.Optional[str] = None,
+            metrics_emf: typing.Optional[bool] = None, home_region: typing.Optional[str] = None) -> None:
+    """
+    Clean up the targeted resource types in each region. Global resource types are only cleaned up in the home region, when it is one of the regions.
+    When a deadline is given, as a time.monotonic() value, no resource types are started after the reserve before it.
+    The work left over is saved as a checkpoint in the database, and the next run with the same regions and targets resumes from it.
+    The metrics of each resource type are logged at the end of the run.
+    """
+    metrics.reset()
+    log_buffer.hold()
 
-def cleanup(check: bool, force: bool, targets: typing.Optional[typing.List[str]] = None) -> None:
-    kvs.domain_name = os.environ.get("DYNAMODB_TABLE_NAME")
-    kvs.aws_region = os.environ.get("TERMINATOR_AWS_REGION")
+    kvs.configure(get_kvs_backend(kvs_backend, kvs_path))
     kvs.initialize()
 
-    for region in get_cleanup_aws_regions():
-        Terminator._aws_region_name = region
-        cleanup_resources(check, force, targets)
+    client_pool.configure(max_pool_connections=concurrency or get_concurrency())
+
+    regions = get_cleanup_aws_regions()
+    terminator_types = get_terminator_types(targets)
+    identity = Identity(regions[0], account_id)
+    tag_inventory = get_tag_inventory_enabled() if tag_inventory is None else tag_inventory
+
+    home_region = home_region or get_home_region(regions)
+
+    if home_region not in regions and any(terminator_type.is_global for terminator_type in terminator_types):
+        logger.info('skipping global resource types: home region %s is not one of the regions', home_region)
+
+    units: typing.List[Unit] = [
+        (region, terminator_type.__name__) for region in regions for terminator_type in terminator_types
+        if region == home_region or not terminator_type.is_global
+    ]
+    database_unit: Unit = ('', 'Database')
+
+    if not targets or 'Database' in targets:
+        units.append(database_unit)
+
+    checkpoint_key = None
+    checkpoint = None
+
+    if deadline is None:
+        scheduler = Scheduler()
+    else:
+        checkpoint_key = f'Checkpoint:{",".join(regions)}:{",".join(sorted(targets)) if targets else "*"}'
+        checkpoint = load_checkpoint(checkpoint_key)
+
+        def expired(pending: typing.List[Unit]) -> None:
+            # write out what has been buffered so far, in case the run is cut short before the end
+            log_buffer.flush()
+            flush_kvs()
+            save_checkpoint(checkpoint_key, pending)
+
+        scheduler = Scheduler(deadline - get_deadline_reserve(), on_expired=expired)
+
+        if checkpoint:
+            logger.info('resuming from checkpoint: %d resource types left over', len(checkpoint))
+            scheduler.resume(checkpoint)
+
+    scheduler.plan(units)
+
+    contexts = [RunContext(region, identity, tag_inventory, scheduler) for region in regions]
+
+    try:
+        run_in_order(region_concurrency or get_region_concurrency(), cleanup_resources, contexts, check, force, terminator_types, concurrency)
+    finally:
+        flush_kvs()
+
+    if scheduler.is_planned(database_unit) and scheduler.start(database_unit):
+        with metrics.measure(database_unit):
+            cleanup_database(check, force, concurrency)
+
+        scheduler.finish(database_unit)
+
+    if checkpoint_key:
+        pending = scheduler.pending()
+
+        if pending:
+            logger.info('deferred %d resource types to the next run', len(pending))
+            save_checkpoint(checkpoint_key, pending)
+        elif checkpoint is not None:
+            delete_checkpoint(checkpoint_key)
+
+    metrics.log_summary()
+
+    if get_metrics_emf_enabled() if metrics_emf is None else metrics_emf:
+        metrics.emit_emf()
+
+
+def get_terminator_names(targets: typing.Optional[typing.List[str]] = None) -> typing.List[str]:
+    """Return the names of the terminator types matching the given target names, or of all of them, sorted, without importing any of them."""
+    if targets:
+        targets = [t.lower() for t in targets]
+
+    return sorted(name for name in TERMINATOR_TYPES if not targets or name.lower() in targets)
+
+
+def get_terminator_types(targets: typing.Optional[typing.List[str]] = None) -> typing.List[typing.Type['Terminator']]:
+    """Return the terminator types matching the given target names, or all of them, sorted by name. Only the modules defining them are imported."""
+    names = get_terminator_names(targets)
+
+    import_plugins(names)
 
-        if not targets or 'Database' in targets:
-            cleanup_database(check, force)
+    types_by_name = dict((terminator_type.__name__, terminator_type) for terminator_type in get_concrete_subclasses(Terminator))
+
+    return [types_by_name[name] for name in names]
+
+
+def load_checkpoint(key: str) -> typing.Optional[typing.List[Unit]]:
+    # noinspection PyBroadException
+    try:
+        return kvs.get_checkpoint(key)
+    except Exception:  # pylint: disable=broad-except
+        log_exception('exception loading checkpoint: %s', key)
+        return None
+
+
+def save_checkpoint(key: str, units: typing.List[Unit]) -> None:
+    # noinspection PyBroadException
+    try:
+        kvs.set_checkpoint(key, units)
+    except Exception:  # pylint: disable=broad-except
+        log_exception('exception saving checkpoint: %s', key)
+
+
+def flush_kvs() -> None:
+    """Write the keys buffered by the key/value store to its backend."""
+    # noinspection PyBroadException
+    try:
+        kvs.flush()
+    except Exception:  # pylint: disable=broad-except
+        log_exception('exception flushing key/value store')
+
+
+def delete_checkpoint(key: str) -> None:
+    # noinspection PyBroadException
+    try:
+        kvs.delete(key)
+    except Exception:  # pylint: disable=broad-except
+        log_exception('exception deleting checkpoint: %s', key)
 
 
 def process_instance(instance: 'Terminator', check: bool, force: bool = False) -> str:
+    status = get_instance_status(instance, force)
+    if status is None:
+        status = terminate(instance, check)
+    return status
+
+
+def get_instance_status(instance: 'Terminator', force: bool = False) -> typing.Optional[str]:
+    """Return the status of an instance which is not to be terminated, or None if it is."""
     if instance.is_persistent():
         status = 'persistent'
     elif instance.ignore:
         status = 'ignored'
     elif force:
-        status = terminate(instance, check)
+        status = None
     elif instance.age is None:
         status = 'unsupported'
     elif instance.stale:
-        status = terminate(instance, check)
+        status = None
     else:
         status = 'skipped'
     return status
 
 
-def cleanup_resources(check: bool, force: bool, targets: typing.Optional[typing.List[str]] = None) -> None:
+def cleanup_resources(context: 'RunContext', check: bool, force: bool, terminator_types: typing.List[typing.Type['Terminator']],
+                      concurrency: typing.Optional[int] = None) -> None:
+    """
+    Process each planned terminator type in the context region on a bounded thread pool, after the types it is declared to terminate after.
+    Log records are buffered per type and replayed in type name order, so the output does not depend on scheduling.
+    """
+    terminator_types = [
+        terminator_type for terminator_type in terminator_types if context.scheduler.is_planned((context.region, terminator_type.__name__))
+    ]
 
-    if targets:
-        targets = [t.lower() for t in targets]
-    for terminator_type in sorted(get_concrete_subclasses(Terminator), key=lambda value: value.__name__):
-        if targets and terminator_type.__name__.lower() not in targets:
-            continue
+    if not terminator_types:
+        return
 
-        # noinspection PyBroadException
-        try:
-            # noinspection PyUnresolvedReferences
-            instances = terminator_type.create()
+    if context.use_tag_inventory and not context.scheduler.expired():
+        load_tag_inventory(context, terminator_types)
+
+    types_by_name = dict((terminator_type.__name__, terminator_type) for terminator_type in terminator_types)
+
+    run_graph(concurrency or get_concurrency(), cleanup_resource_type, terminator_types,
+              lambda value: [types_by_name[name] for name in value.terminate_after if name in types_by_name], context, check, force)
 
-            for instance in instances:
-                status = process_instance(instance, check, force)
-                if instance.ignore:
-                    logger.debug('%s %s', status, instance)
-                else:
-                    logger.info('%s %s', status, instance)
-        except Exception:  # pylint: disable=broad-except
-            log_exception('exception processing resource type: %s', terminator_type)
 
+def load_tag_inventory(context: 'RunContext', terminator_types: typing.List[typing.Type['Terminator']]) -> None:
+    resource_types = [resource_type for terminator_type in terminator_types for resource_type in terminator_type.tagged_resource_types]
 
-def cleanup_database(check: bool, force: bool) -> None:
-    scan_options = {}
+    if not resource_types:
+        return
+
+    # noinspection PyBroadException
+    try:
+        inventory = TagInventory(get_client('resourcegroupstaggingapi', region_name=context.region), resource_types)
+        inventory.load()
+    except Exception:  # pylint: disable=broad-except
+        log_exception('exception loading tag inventory: %s', context.region)
+        return
 
-    if not force:
-        now = datetime.datetime.utcnow().replace(tzinfo=dateutil.tz.tzutc(), microsecond=0) - datetime.timedelta(minutes=60)
-        scan_options['FilterExpression'] = Attr('created_time').lt(now.isoformat())
+    logger.debug('located tagged resources in %s: count=%d', context.region, len(inventory.resources))
+    context.inventory = inventory
 
-    scan_options['ProjectionExpression'] = kvs.primary_key
-    scan_options['Limit'] = 25
-    scan_options['ConsistentRead'] = False
 
-    result = kvs.table.scan(
-        **scan_options
-    )
+def cleanup_resource_type(terminator_type: typing.Type['Terminator'], context: 'RunContext', check: bool, force: bool) -> None:
+    unit = (context.region, terminator_type.__name__)
 
-    if 'Items' not in result:
+    if not context.scheduler.start(unit):
+        logger.debug('deferred %s: deadline reached', terminator_type.__name__)
         return
 
-    items = result['Items']
+    try:
+        with metrics.measure(unit):
+            process_resource_type(terminator_type, context, check, force)
+    finally:
+        flush_kvs()
+        context.scheduler.finish(unit)
+
 
-    if items and not check:
-        with kvs.table.batch_writer():
-            for item in items:
-                kvs.table.delete_item(Key=item)
+def process_resource_type(terminator_type: typing.Type['Terminator'], context: 'RunContext', check: bool, force: bool) -> None:
+    if context.inventory and terminator_type.tagged_resource_types and not context.inventory.contains(terminator_type.tagged_resource_types):
+        logger.debug('located %s: count=0 (no tagged resources)', terminator_type.__name__)
+        return
 
+    # noinspection PyBroadException
+    try:
+        # noinspection PyUnresolvedReferences
+        instances = metrics.discovered(terminator_type.create, context)
+
+        # instances may be streamed a page at a time, so they are processed a batch at a time
+        for batch in chunked(instances, terminator_type.batch_size):
+            statuses = [get_instance_status(instance, force) for instance in batch]
+            errors = terminate_many(terminator_type, [instance for instance, status in zip(batch, statuses) if status is None], check)
+
+            for instance, status in zip(batch, statuses):
+                if status is None:
+                    status = report_termination(instance, check, errors.get(instance))
+                metrics.count(status, errors.get(instance))
+                if instance.ignore:
+                    logger.debug('%s %s', status, instance)
+                else:
+                    logger.info('%s %s', status, instance)
+    except Exception:  # pylint: disable=broad-except
+        log_exception('exception processing resource type: %s', terminator_type)
+
+
+def cleanup_database(check: bool, force: bool, concurrency: typing.Optional[int] = None) -> None:
+    """
+    Purge expired items from the database, or all items when forced.
+    DynamoDB TTL normally deletes expired items, so this mostly checks that TTL is enabled and gives older items an expiry.
+    """
     if check:
         status = 'checked'
     else:
         status = 'purged'
 
-    for item in items:
-        logger.info('%s database item: %s', status, item['id'])
+    start = time.monotonic()
+    count = kvs.purge(check, force, concurrency or get_concurrency())
+    elapsed = time.monotonic() - start
+
+    logger.info('%s %d database items in %.1f seconds (%.1f items/second)', status, count, elapsed, count / elapsed if elapsed else 0.0)
 
 
 def terminate(instance: 'Terminator', check: bool) -> str:
+    return report_termination(instance, check, terminate_many(type(instance), [instance], check).get(instance))
+
+
+def terminate_many(terminator_type: typing.Type['Terminator'], instances: typing.List['Terminator'], check: bool) -> typing.Dict['Terminator', Exception]:
+    """
+    Terminate the given instances of a type, in batches of up to the batch size of the type, then clean up after each instance which was terminated.
+    Return the exception raised for each instance which failed.
+    """
+    errors: typing.Dict[Terminator, Exception] = {}
+
+    if check:
+        return errors
+
+    for batch in chunked(instances, terminator_type.batch_size):
+        start = time.monotonic()
+
+        # noinspection PyBroadException
+        try:
+            errors.update(terminator_type.terminate_batch(batch))
+        except Exception as ex:  # pylint: disable=broad-except
+            errors.update(dict.fromkeys(batch, ex))
+
+        metrics.time_terminate(time.monotonic() - start)
+
+    for instance in instances:
+        if instance in errors:
+            continue
+
+        # noinspection PyBroadException
+        try:
+            instance.cleanup()
+        except Exception as ex:  # pylint: disable=broad-except
+            errors[instance] = ex
+
+    return errors
+
+
+def report_termination(instance: 'Terminator', check: bool, error: typing.Optional[Exception]) -> str:
     if check:
         logger.info("[Running in check mode] Would have terminate the resource '%s'", instance)
         return 'checked'
 
-    # noinspection PyBroadException
-    try:
-        instance.terminate()
-        instance.cleanup()
-    except botocore.exceptions.ClientError as ex:
-        error_code = ex.response['Error']['Code']
+    if isinstance(error, botocore.exceptions.ClientError):
+        error_code = error.response['Error']['Code']
 
-        if error_code == 'TooManyRequestsException':
-            log_exception('error "%s" terminating %s', error_code, instance, level=logging.WARNING)
+        if error_code in THROTTLING_ERROR_CODES:
+            log_exception('error "%s" terminating %s', error_code, instance, level=logging.WARNING, exception=error)
         else:
-            log_exception('error "%s" terminating %s', error_code, instance)
-    except Exception:  # pylint: disable=broad-except
-        log_exception('exception terminating %s', instance)
+            log_exception('error "%s" terminating %s', error_code, instance, exception=error)
+    elif error:
+        log_exception('exception terminating %s', instance, exception=error)
 
     return 'terminated'
 
@@ -165,8 +443,23 @@ def get_concrete_subclasses(class_type: typing.Type[T]) -> typing.Set[typing.Typ
     return subclasses
 
 
-def get_account_id() -> str:
-    return boto3.client('sts').get_caller_identity().get('Account')
+def get_client(client_name: str, region_name: typing.Optional[str] = None) -> botocore.client.BaseClient:
+    return client_pool.client(client_name, region_name=region_name)
+
+
+def chunked(items: typing.Iterable[T], size: int) -> typing.Iterator[typing.List[T]]:
+    """Split the given items into lists of at most the given size."""
+    chunk: typing.List[T] = []
+
+    for item in items:
+        chunk.append(item)
+
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
 
 
 def get_tag_dict_from_tag_list(tag_list: typing.Optional[typing.List[typing.Dict[str, str]]]) -> typing.Dict[str, str]:
@@ -176,19 +469,127 @@ def get_tag_dict_from_tag_list(tag_list: typing.Optional[typing.List[typing.Dict
     return dict((tag['Key'], tag['Value']) for tag in tag_list)
 
 
+class Identity:
+    """
+    The AWS account and caller the terminators run as, looked up with STS at most once per run, the first time it is needed.
+    When the account ID is supplied, or set in TERMINATOR_AWS_ACCOUNT_ID, STS is not called and the caller ARN is unknown.
+    """
+    def __init__(self, region: str, account_id: typing.Optional[str] = None):
+        self.region = region
+        self._account_id = account_id or os.environ.get('TERMINATOR_AWS_ACCOUNT_ID')
+        self._partition: typing.Optional[str] = None
+        self._arn: typing.Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def account_id(self) -> str:
+        self._resolve()
+        return self._account_id
+
+    @property
+    def partition(self) -> str:
+        self._resolve()
+        return self._partition
+
+    @property
+    def arn(self) -> typing.Optional[str]:
+        self._resolve()
+        return self._arn
+
+    def _resolve(self) -> None:
+        with self._lock:
+            if self._partition:
+                return
+
+            if self._account_id:
+                self._partition = client_pool.get_partition_for_region(self.region)
+                return
+
+            caller = get_client('sts', region_name=self.region).get_caller_identity()
+
+            self._account_id = caller['Account']
+            self._arn = caller['Arn']
+            self._partition = self._arn.split(':')[1]
+
+
+class RunContext:
+    """State shared by the terminators processing a single region during one run."""
+    def __init__(self, region: str, identity: Identity, use_tag_inventory: bool = False, scheduler: typing.Optional[Scheduler] = None):
+        self.region = region
+        self.identity = identity
+        self.use_tag_inventory = use_tag_inventory
+        self.scheduler = scheduler or Scheduler()
+        self.inventory: typing.Optional[TagInventory] = None
+        self._cache: typing.Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def get_cached(self, key: str, factory: typing.Callable[[], T]) -> T:
+        """
+        Return the value stored under the given key for this run, calling the factory to create it the first time.
+        The factory is called once even when several terminator types ask for the value at the same time; the others wait for its result, or its exception.
+        """
+        with self._lock:
+            future = self._cache.get(key)
+            owner = future is None
+
+            if owner:
+                future = self._cache[key] = concurrent.futures.Future()
+
+        if owner:
+            try:
+                future.set_result(factory())
+            except Exception as ex:  # pylint: disable=broad-except
+                future.set_exception(ex)
+
+        return future.result()
+
+    def get_default_vpc(self, client: botocore.client.BaseClient) -> typing.Dict[str, str]:
+        def get_vpc() -> typing.Dict[str, str]:
+            vpcs = client.describe_vpcs(Filters=[{'Name': 'isDefault', 'Values': ['true']}])['Vpcs']
+
+            return vpcs[0] if vpcs else {}  # the default VPC, if there is one
+
+        return self.get_cached('default_vpc', get_vpc)
+
+
 class Terminator(abc.ABC):
     """Base class for classes which find and terminate AWS resources."""
-    _default_vpc = {}
-    _aws_region_name = None
-
-    def __init__(self, client: botocore.client.BaseClient, instance: typing.Dict[str, typing.Any]):
+    # Resource Groups Tagging API resource types ('service' or 'service:type') of types whose resources are always tagged.
+    # When the tag inventory is enabled and holds none of them, discovery of the type is skipped.
+    tagged_resource_types: typing.Tuple[str, ...] = ()
+    # Names of the terminator types whose resources must be terminated before those of this type, such as the subnets in a VPC.
+    # When both types are processed in the same run, this type is not started until the others have finished.
+    terminate_after: typing.Tuple[str, ...] = ()
+    # Whether the resources of this type belong to the account rather than to a region, such as IAM roles.
+    # Global types are processed once per run, in the home region, rather than in every region.
+    is_global = False
+    # Region whose endpoint manages the resources of this type, when that is not the region being processed, such as us-east-1 for CloudFront resources.
+    client_region: typing.Optional[str] = None
+    # Filters on the listed resources, which leave out those the type can do nothing with, such as terminated instances.
+    # Pass them to paginate, which sends them to the API where it supports them, so the resources are not downloaded, and applies them to each page otherwise.
+    discovery_filters: typing.Tuple[Filter, ...] = ()
+    # Filters matching the listed resources which are always ignored, such as default VPCs. Where the ignore property only checks fields of the listed
+    # resource, a filter does the same without creating a terminator for each ignored resource, which matters for types listing thousands of them.
+    ignore_filters: typing.Tuple[Filter, ...] = ()
+    # Maximum number of resources passed to terminate_batch at once, for types which override it to use an API deleting several resources per call.
+    batch_size = 1
+
+    def __init_subclass__(cls, **kwargs: typing.Any) -> None:
+        super().__init_subclass__(**kwargs)
+
+        # compile the filter paths when the type is defined, so an invalid path fails on import rather than for each listed resource
+        for value in cls.discovery_filters + cls.ignore_filters:
+            compile_expression(value.path)
+
+    def __init__(self, client: botocore.client.BaseClient, instance: typing.Dict[str, typing.Any], context: RunContext):
         self.client = client
         self.instance = instance
+        self.context = context
         self.now = datetime.datetime.utcnow().replace(tzinfo=dateutil.tz.tzutc(), microsecond=0)
 
     @staticmethod
     @abc.abstractmethod
-    def create() -> typing.List['Terminator']:
+    def create(context: RunContext) -> typing.Iterable['Terminator']:
         pass
 
     @property
@@ -220,6 +621,23 @@ class Terminator(abc.ABC):
     def cleanup(self) -> None:
         """Cleanup to perform after termination."""
 
+    @classmethod
+    def terminate_batch(cls, terminators: typing.List['Terminator']) -> typing.Dict['Terminator', Exception]:
+        """
+        Terminate up to batch_size resources of this type, returning the exception raised for each one which could not be terminated.
+        By default each resource is terminated on its own.
+        """
+        errors: typing.Dict[Terminator, Exception] = {}
+
+        for terminator in terminators:
+            # noinspection PyBroadException
+            try:
+                terminator.terminate()
+            except Exception as ex:  # pylint: disable=broad-except
+                errors[terminator] = ex
+
+        return errors
+
     @property
     def age(self) -> typing.Optional[datetime.timedelta]:
         return self.now - self.created_time if self.created_time else None
@@ -242,26 +660,56 @@ class Terminator(abc.ABC):
             return type(self).__name__
 
     @staticmethod
-    def _create(instance_type: typing.Type['Terminator'], client_name: str,
+    def _create(context: RunContext, instance_type: typing.Type['Terminator'], client_name: str,
                 describe_lambda: typing.Callable[[botocore.client.BaseClient], typing.List[typing.Dict[str, typing.Any]]]) -> typing.List['Terminator']:
-        client = boto3.client(client_name, region_name=Terminator._aws_region_name)
-        instances = describe_lambda(client)
-        terminators = [instance_type(client, instance) for instance in instances]
+        client = get_client(client_name, region_name=instance_type.client_region or context.region)
+        instances = instance_type._filter_ignored(describe_lambda(client))
+        terminators = [instance_type(client, instance, context) for instance in instances]
+        instance_type._initialize_instances(terminators)
         logger.debug('located %s: count=%d', instance_type.__name__, len(terminators))
 
         return terminators
 
-    @property
-    def default_vpc(self) -> typing.Dict[str, str]:
-        if self._aws_region_name not in self._default_vpc:
-            vpcs = self.client.describe_vpcs(Filters=[{'Name': 'isDefault', 'Values': ['true']}])['Vpcs']
+    @staticmethod
+    def _create_pages(context: RunContext, instance_type: typing.Type['Terminator'], client_name: str,
+                      list_pages: typing.Callable[[botocore.client.BaseClient], typing.Iterable[typing.List[typing.Dict[str, typing.Any]]]]
+                      ) -> typing.Iterator['Terminator']:
+        """
+        Like _create, but yield the terminators for one page of resources at a time, as each page arrives.
+        Termination then overlaps with listing, and memory use is bounded by the page size rather than the number of resources.
+        """
+        client = get_client(client_name, region_name=instance_type.client_region or context.region)
+        count = 0
 
-            if vpcs:
-                self._default_vpc[self._aws_region_name] = vpcs[0]  # found default VPC
-            else:
-                self._default_vpc[self._aws_region_name] = {}  # no default VPC
+        for page in list_pages(client):
+            terminators = [instance_type(client, instance, context) for instance in instance_type._filter_ignored(page)]
+            instance_type._initialize_instances(terminators)
+            count += len(terminators)
+
+            yield from terminators
+
+        logger.debug('located %s: count=%d', instance_type.__name__, count)
+
+    @classmethod
+    def _filter_ignored(cls, instances: typing.Iterable[typing.Dict[str, typing.Any]]) -> typing.List[typing.Dict[str, typing.Any]]:
+        """Return the listed resources not matched by the ignore filters, counting the others as ignored without creating terminators for them."""
+        instances = list(instances)
 
-        return self._default_vpc[self._aws_region_name]
+        if not cls.ignore_filters:
+            return instances
+
+        candidates = [instance for instance in instances if not any(value.matches(instance) for value in cls.ignore_filters)]
+        metrics.ignored(len(instances) - len(candidates))
+
+        return candidates
+
+    @classmethod
+    def _initialize_instances(cls, terminators: typing.List['Terminator']) -> None:
+        """Perform any initialization which can be done for all the located instances at once."""
+
+    @property
+    def default_vpc(self) -> typing.Dict[str, str]:
+        return self.context.get_default_vpc(self.client)
 
     def is_vpc_default(self, vpc_id: str) -> bool:
         return self.default_vpc.get('VpcId') == vpc_id
@@ -275,28 +723,52 @@ class Terminator(abc.ABC):
 
 class DbTerminator(Terminator):
     """Base class for classes which find and terminate AWS resources with age tracked via DynamoDB."""
-    def __init__(self, client: botocore.client.BaseClient, instance: typing.Dict[str, typing.Any]):
-        super().__init__(client, instance)
+    def __init__(self, client: botocore.client.BaseClient, instance: typing.Dict[str, typing.Any], context: RunContext):
+        super().__init__(client, instance, context)
 
         self._kvs_key = None
         self._kvs_value = None
         self._created_time = None
 
-        if self.ignore:
+    @classmethod
+    def _initialize_instances(cls, terminators: typing.List['Terminator']) -> None:
+        """Look up the created time of all the located instances at once, recording the current time for new ones."""
+        pending: typing.List[DbTerminator] = []
+
+        for terminator in terminators:
+            if terminator.ignore:
+                continue
+
+            # noinspection PyBroadException
+            try:
+                terminator._kvs_key = f'{type(terminator).__name__}:{terminator.id or terminator.name}'
+                pending.append(terminator)
+            except Exception:  # pylint: disable=broad-except
+                log_exception('exception accessing key/value store: %s', terminator)
+
+        if not pending:
             return
 
         # noinspection PyBroadException
         try:
-            self._kvs_key = f'{type(self).__name__}:{self.id or self.name}'
-            self._kvs_value = kvs.get(self._kvs_key)
+            values = kvs.get_many(terminator._kvs_key for terminator in pending)
+            missing: typing.Dict[str, str] = {}
 
-            if not self._kvs_value:
-                self._kvs_value = self.now.isoformat()
-                kvs.set(self._kvs_key, self._kvs_value)
+            for terminator in pending:
+                terminator._kvs_value = values.get(terminator._kvs_key) or missing.setdefault(terminator._kvs_key, terminator.now.isoformat())
 
-            self._created_time = datetime.datetime.strptime(self._kvs_value.replace('+00:00', ''), '%Y-%m-%dT%H:%M:%S').replace(tzinfo=dateutil.tz.tzutc())
+            kvs.set_many(missing)
         except Exception:  # pylint: disable=broad-except
-            log_exception('exception accessing key/value store: %s', self)
+            log_exception('exception accessing key/value store: %s', cls.__name__)
+            return
+
+        for terminator in pending:
+            # noinspection PyBroadException
+            try:
+                terminator._created_time = datetime.datetime.strptime(terminator._kvs_value.replace('+00:00', ''), '%Y-%m-%dT%H:%M:%S').replace(
+                    tzinfo=dateutil.tz.tzutc())
+            except Exception:  # pylint: disable=broad-except
+                log_exception('exception accessing key/value store: %s', terminator)
 
     @property
     @abc.abstractmethod
@@ -320,88 +792,11 @@ class DbTerminator(Terminator):
         kvs.delete(self._kvs_key)
 
 
-class KeyValueStore:
-    """ DynamoDB data store for the AWS terminator """
-    def __init__(self, domain_name: typing.Optional[str] = None, aws_region: typing.Optional[str] = None):
-        self.ddb = None
-        self.domain_name = domain_name
-        self.aws_region = aws_region
-        self.table = None
-        self.primary_key = 'id'
-        self.initialized = False
-
-    def initialize(self) -> None:
-        """Deferred initialization of the DynamoDB database."""
-        if self.initialized:
-            return
-
-        self.ddb = boto3.resource('dynamodb', region_name=self.aws_region)
-
-        try:
-            self.table = self.ddb.Table(self.domain_name)
-            if self.table.table_status == 'DELETING':
-                self.table.wait_until_not_exists()
-                self.create_table()
-        except botocore.exceptions.ClientError as ex:
-            if ex.response['Error']['Code'] == 'ResourceNotFoundException':
-                self.create_table()
-            else:
-                raise ex
-
-        self.initialized = True
-
-    def get(self, key: str) -> str:
-        self.initialize()
-
-        item = self.table.get_item(
-            Key={self.primary_key: key},
-            ProjectionExpression='created_time',
-        ).get('Item', {})
-
-        return item.get('created_time')
-
-    def set(self, key: str, value: str) -> None:
-        self.initialize()
-
-        # Don't replace an existing entry
-        expression = Attr(self.primary_key).ne(key)
-
-        attributes = {
-            self.primary_key: key,
-            'created_time': value,
-        }
-
-        self.table.put_item(
-            Item=attributes,
-            ConditionExpression=expression,
-        )
-
-    def create_table(self) -> None:
-        """Creates a new DynamoDB database."""
-        self.table = self.ddb.create_table(
-            TableName=self.domain_name,
-            AttributeDefinitions=[{
-                'AttributeName': self.primary_key,
-                'AttributeType': 'S'
-            }],
-            KeySchema=[{
-                'AttributeName': self.primary_key,
-                'KeyType': 'HASH'
-            }],
-            BillingMode='PAY_PER_REQUEST',
-        )
-        self.table.wait_until_exists()
-
-    def delete(self, key: str) -> None:
-        self.initialize()
-
-        self.table.delete_item(
-            Key={
-                self.primary_key: key
-            },
-        )
-
+client_pool = ClientPool()
+kvs = KeyValueStore()
+metrics = Metrics()
 
-import_plugins()
+client_pool.add_hook(metrics.register)
 
-kvs = KeyValueStore()
+# buffered keys must not be lost if the process exits without finishing a run
+atexit.register(flush_kvs)
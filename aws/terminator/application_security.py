@@ -1,10 +1,12 @@
 import abc
 import datetime
 
-from . import DbTerminator, Terminator
+from . import DbTerminator, Terminator, paginate
 
 
 class Waf(DbTerminator):
+    is_global = True
+
     @property
     def age_limit(self):
         return datetime.timedelta(minutes=30)
@@ -24,8 +26,8 @@ class Waf(DbTerminator):
 
 class WafWebAcl(Waf):
     @staticmethod
-    def create():
-        return Terminator._create(WafWebAcl, 'waf', lambda client: client.list_web_acls()['WebACLs'])
+    def create(context):
+        return Terminator._create_pages(context, WafWebAcl, 'waf', lambda client: paginate(client, 'list_web_acls', 'WebACLs'))
 
     @property
     def age_limit(self):
@@ -45,9 +47,11 @@ class WafWebAcl(Waf):
 
 
 class WafRule(Waf):
+    terminate_after = ('WafWebAcl',)
+
     @staticmethod
-    def create():
-        return Terminator._create(WafRule, 'waf', lambda client: client.list_rules()['Rules'])
+    def create(context):
+        return Terminator._create_pages(context, WafRule, 'waf', lambda client: paginate(client, 'list_rules', 'Rules'))
 
     @property
     def id(self):
@@ -62,9 +66,11 @@ class WafRule(Waf):
 
 
 class WafXssMatchSet(Waf):
+    terminate_after = ('WafRule',)
+
     @staticmethod
-    def create():
-        return Terminator._create(WafXssMatchSet, 'waf', lambda client: client.list_xss_match_sets()['XssMatchSets'])
+    def create(context):
+        return Terminator._create_pages(context, WafXssMatchSet, 'waf', lambda client: paginate(client, 'list_xss_match_sets', 'XssMatchSets'))
 
     @property
     def id(self):
@@ -79,9 +85,11 @@ class WafXssMatchSet(Waf):
 
 
 class WafGeoMatchSet(Waf):
+    terminate_after = ('WafRule',)
+
     @staticmethod
-    def create():
-        return Terminator._create(WafGeoMatchSet, 'waf', lambda client: client.list_geo_match_sets()['GeoMatchSets'])
+    def create(context):
+        return Terminator._create_pages(context, WafGeoMatchSet, 'waf', lambda client: paginate(client, 'list_geo_match_sets', 'GeoMatchSets'))
 
     @property
     def id(self):
@@ -96,9 +104,13 @@ class WafGeoMatchSet(Waf):
 
 
 class WafSqlInjectionMatchSet(Waf):
+    terminate_after = ('WafRule',)
+
     @staticmethod
-    def create():
-        return Terminator._create(WafSqlInjectionMatchSet, 'waf', lambda client: client.list_sql_injection_match_sets()['SqlInjectionMatchSets'])
+    def create(context):
+        return Terminator._create_pages(
+            context, WafSqlInjectionMatchSet, 'waf',
+            lambda client: paginate(client, 'list_sql_injection_match_sets', 'SqlInjectionMatchSets'))
 
     @property
     def id(self):
@@ -113,9 +125,11 @@ class WafSqlInjectionMatchSet(Waf):
 
 
 class WafIpSet(Waf):
+    terminate_after = ('WafRule',)
+
     @staticmethod
-    def create():
-        return Terminator._create(WafIpSet, 'waf', lambda client: client.list_ip_sets()['IPSets'])
+    def create(context):
+        return Terminator._create_pages(context, WafIpSet, 'waf', lambda client: paginate(client, 'list_ip_sets', 'IPSets'))
 
     @property
     def id(self):
@@ -130,9 +144,13 @@ class WafIpSet(Waf):
 
 
 class WafSizeConstraintSet(Waf):
+    terminate_after = ('WafRule',)
+
     @staticmethod
-    def create():
-        return Terminator._create(WafSizeConstraintSet, 'waf', lambda client: client.list_size_constraint_sets()['SizeConstraintSets'])
+    def create(context):
+        return Terminator._create_pages(
+            context, WafSizeConstraintSet, 'waf',
+            lambda client: paginate(client, 'list_size_constraint_sets', 'SizeConstraintSets'))
 
     @property
     def id(self):
@@ -147,9 +165,11 @@ class WafSizeConstraintSet(Waf):
 
 
 class WafByteMatchSet(Waf):
+    terminate_after = ('WafRule',)
+
     @staticmethod
-    def create():
-        return Terminator._create(WafByteMatchSet, 'waf', lambda client: client.list_byte_match_sets()['ByteMatchSets'])
+    def create(context):
+        return Terminator._create_pages(context, WafByteMatchSet, 'waf', lambda client: paginate(client, 'list_byte_match_sets', 'ByteMatchSets'))
 
     @property
     def id(self):
@@ -164,9 +184,11 @@ class WafByteMatchSet(Waf):
 
 
 class WafRegexMatchSet(Waf):
+    terminate_after = ('WafRule',)
+
     @staticmethod
-    def create():
-        return Terminator._create(WafRegexMatchSet, 'waf', lambda client: client.list_regex_match_sets()['RegexMatchSets'])
+    def create(context):
+        return Terminator._create_pages(context, WafRegexMatchSet, 'waf', lambda client: paginate(client, 'list_regex_match_sets', 'RegexMatchSets'))
 
     @property
     def id(self):
@@ -181,9 +203,11 @@ class WafRegexMatchSet(Waf):
 
 
 class WafRegexPatternSet(Waf):
+    terminate_after = ('WafRegexMatchSet',)
+
     @staticmethod
-    def create():
-        return Terminator._create(WafRegexPatternSet, 'waf', lambda client: client.list_regex_pattern_sets()['RegexPatternSets'])
+    def create(context):
+        return Terminator._create_pages(context, WafRegexPatternSet, 'waf', lambda client: paginate(client, 'list_regex_pattern_sets', 'RegexPatternSets'))
 
     @property
     def id(self):
@@ -220,36 +244,52 @@ class WafV2(DbTerminator):
 
 
 class RegionalWafV2IpSet(WafV2):
+    terminate_after = ('RegionalWafV2WebAcl', 'RegionalWafV2RuleGroup')
+
     @staticmethod
-    def create():
-        return DbTerminator._create(RegionalWafV2IpSet, 'wafv2', lambda client: client.list_ip_sets(Scope='REGIONAL')['IPSets'])
+    def create(context):
+        return DbTerminator._create_pages(context, RegionalWafV2IpSet, 'wafv2', lambda client: paginate(client, 'list_ip_sets', 'IPSets', Scope='REGIONAL'))
 
     def terminate(self):
         self.client.delete_ip_set(Id=self.id, Name=self.name, LockToken=self.lock_token, Scope='REGIONAL')
 
 
 class CloudfrontWafV2IpSet(WafV2):
+    is_global = True
+    client_region = 'us-east-1'
+    terminate_after = ('CloudfrontWafV2WebAcl', 'CloudfrontWafV2RuleGroup')
+
     @staticmethod
-    def create():
-        return DbTerminator._create(CloudfrontWafV2IpSet, 'wafv2', lambda client: client.list_ip_sets(Scope='CLOUDFRONT')['IPSets'])
+    def create(context):
+        return DbTerminator._create_pages(context, CloudfrontWafV2IpSet, 'wafv2', lambda client: paginate(client, 'list_ip_sets', 'IPSets', Scope='CLOUDFRONT'))
 
     def terminate(self):
         self.client.delete_ip_set(Id=self.id, Name=self.name, LockToken=self.lock_token, Scope='CLOUDFRONT')
 
 
 class RegionalWafV2RuleGroup(WafV2):
+    terminate_after = ('RegionalWafV2WebAcl',)
+
     @staticmethod
-    def create():
-        return DbTerminator._create(RegionalWafV2RuleGroup, 'wafv2', lambda client: client.list_rule_groups(Scope='REGIONAL')['RuleGroups'])
+    def create(context):
+        return DbTerminator._create_pages(
+            context, RegionalWafV2RuleGroup, 'wafv2',
+            lambda client: paginate(client, 'list_rule_groups', 'RuleGroups', Scope='REGIONAL'))
 
     def terminate(self):
         self.client.delete_rule_group(Id=self.id, Name=self.name, LockToken=self.lock_token, Scope='REGIONAL')
 
 
 class CloudfrontWafV2RuleGroup(WafV2):
+    is_global = True
+    client_region = 'us-east-1'
+    terminate_after = ('CloudfrontWafV2WebAcl',)
+
     @staticmethod
-    def create():
-        return DbTerminator._create(CloudfrontWafV2RuleGroup, 'wafv2', lambda client: client.list_rule_groups(Scope='CLOUDFRONT')['RuleGroups'])
+    def create(context):
+        return DbTerminator._create_pages(
+            context, CloudfrontWafV2RuleGroup, 'wafv2',
+            lambda client: paginate(client, 'list_rule_groups', 'RuleGroups', Scope='CLOUDFRONT'))
 
     def terminate(self):
         self.client.delete_rule_group(Id=self.id, Name=self.name, LockToken=self.lock_token, Scope='CLOUDFRONT')
@@ -257,17 +297,22 @@ class CloudfrontWafV2RuleGroup(WafV2):
 
 class RegionalWafV2WebAcl(WafV2):
     @staticmethod
-    def create():
-        return DbTerminator._create(RegionalWafV2WebAcl, 'wafv2', lambda client: client.list_web_acls(Scope='REGIONAL')['WebACLs'])
+    def create(context):
+        return DbTerminator._create_pages(context, RegionalWafV2WebAcl, 'wafv2', lambda client: paginate(client, 'list_web_acls', 'WebACLs', Scope='REGIONAL'))
 
     def terminate(self):
         self.client.delete_web_acl(Id=self.id, Name=self.name, LockToken=self.lock_token, Scope='REGIONAL')
 
 
 class CloudfrontWafV2WebAcl(WafV2):
+    is_global = True
+    client_region = 'us-east-1'
+
     @staticmethod
-    def create():
-        return DbTerminator._create(CloudfrontWafV2WebAcl, 'wafv2', lambda client: client.list_web_acls(Scope='CLOUDFRONT')['WebACLs'])
+    def create(context):
+        return DbTerminator._create_pages(
+            context, CloudfrontWafV2WebAcl, 'wafv2',
+            lambda client: paginate(client, 'list_web_acls', 'WebACLs', Scope='CLOUDFRONT'))
 
     def terminate(self):
         self.client.delete_web_acl(Id=self.id, Name=self.name, LockToken=self.lock_token, Scope='CLOUDFRONT')
@@ -275,10 +320,10 @@ class CloudfrontWafV2WebAcl(WafV2):
 
 class InspectorAssessmentTemplate(DbTerminator):
     @staticmethod
-    def create():
-        return Terminator._create(
-            InspectorAssessmentTemplate, 'inspector',
-            lambda client: client.get_paginator('list_assessment_templates').paginate().build_full_result()['assessmentTemplateArns']
+    def create(context):
+        return Terminator._create_pages(
+            context, InspectorAssessmentTemplate, 'inspector',
+            lambda client: paginate(client, 'list_assessment_templates', 'assessmentTemplateArns')
         )
 
     @property
@@ -295,10 +340,10 @@ class InspectorAssessmentTemplate(DbTerminator):
 
 class InspectorAssessmentTarget(DbTerminator):
     @staticmethod
-    def create():
-        return Terminator._create(
-            InspectorAssessmentTarget, 'inspector',
-            lambda client: client.get_paginator('list_assessment_targets').paginate().build_full_result()['assessmentTargetArns']
+    def create(context):
+        return Terminator._create_pages(
+            context, InspectorAssessmentTarget, 'inspector',
+            lambda client: paginate(client, 'list_assessment_targets', 'assessmentTargetArns')
         )
 
     @property
@@ -1,16 +1,12 @@
 from datetime import timezone, datetime
-import time
 
-from . import DbTerminator, Terminator
+from . import DbTerminator, Filter, Terminator, paginate
 
 
 class Cloudformation(Terminator):
     @staticmethod
-    def create():
-        def paginate_stacks(client):
-            return client.get_paginator('describe_stacks').paginate().build_full_result()['Stacks']
-
-        return Terminator._create(Cloudformation, 'cloudformation', paginate_stacks)
+    def create(context):
+        return Terminator._create_pages(context, Cloudformation, 'cloudformation', lambda client: paginate(client, 'describe_stacks', 'Stacks'))
 
     @property
     def created_time(self):
@@ -27,8 +23,8 @@ class Cloudformation(Terminator):
 
 class CloudWatchLogGroup(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(CloudWatchLogGroup, 'logs', lambda client: client.describe_log_groups()['logGroups'])
+    def create(context):
+        return Terminator._create_pages(context, CloudWatchLogGroup, 'logs', lambda client: paginate(client, 'describe_log_groups', 'logGroups'))
 
     @property
     def name(self):
@@ -47,21 +43,20 @@ class CloudWatchLogGroup(Terminator):
 class CodeBuild(Terminator):
 
     @staticmethod
-    def create():
+    def create(context):
         def paginate_projects(client):
-            project_names = client.get_paginator(
-                'list_projects').paginate().build_full_result()['projects']
-
-            if not project_names:
-                return []
-
-            projects = client.batch_get_projects(
-                names=project_names).get('projects', ())
-            return [
-                {'name': p['name'], 'created': p['created']} for p in projects]
-
-        return Terminator._create(
-            CodeBuild, 'codebuild',
+            # pages hold up to 100 names, which is as many as batch_get_projects accepts
+            for project_names in paginate(client, 'list_projects', 'projects'):
+                if not project_names:
+                    continue
+
+                projects = client.batch_get_projects(
+                    names=project_names).get('projects', ())
+                yield [
+                    {'name': p['name'], 'created': p['created']} for p in projects]
+
+        return Terminator._create_pages(
+            context, CodeBuild, 'codebuild',
             paginate_projects)
 
     @property
@@ -82,11 +77,8 @@ class CodeBuild(Terminator):
 
 class CodeCommitRepository(DbTerminator):
     @staticmethod
-    def create():
-        def paginate_repositories(client):
-            return client.get_paginator('list_repositories').paginate().build_full_result()['repositories']
-
-        return Terminator._create(CodeCommitRepository, 'codecommit', paginate_repositories)
+    def create(context):
+        return Terminator._create_pages(context, CodeCommitRepository, 'codecommit', lambda client: paginate(client, 'list_repositories', 'repositories'))
 
     @property
     def id(self):
@@ -103,10 +95,8 @@ class CodeCommitRepository(DbTerminator):
 class CodePipeline(Terminator):
 
     @staticmethod
-    def create():
-        return Terminator._create(
-            CodePipeline, 'codepipeline',
-            lambda client: client.list_pipelines().get('pipelines', ()))
+    def create(context):
+        return Terminator._create_pages(context, CodePipeline, 'codepipeline', lambda client: paginate(client, 'list_pipelines', 'pipelines'))
 
     @property
     def created_time(self):
@@ -126,8 +116,8 @@ class CodePipeline(Terminator):
 
 class Efs(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(Efs, 'efs', lambda client: client.describe_file_systems()['FileSystems'])
+    def create(context):
+        return Terminator._create_pages(context, Efs, 'efs', lambda client: paginate(client, 'describe_file_systems', 'FileSystems'))
 
     @property
     def id(self):
@@ -149,23 +139,17 @@ class Efs(Terminator):
 
 
 class KinesisStream(Terminator):
+    ignore_filters = (Filter(None, 'StreamStatus', ('DELETING',)),)
+
     @staticmethod
-    def create():
+    def create(context):
         def paginate_streams(client):
-            names = client.get_paginator('list_streams').paginate(
-                PaginationConfig={
-                    'PageSize': 100,
-                }
-            ).build_full_result()['StreamNames']
-
-            if not names:
-                return []
-
-            return [
-                client.describe_stream(StreamName=n)['StreamDescription'] for n in names
-            ]
+            for names in paginate(client, 'list_streams', 'StreamNames', PaginationConfig={'PageSize': 100}):
+                yield [
+                    client.describe_stream(StreamName=n)['StreamDescription'] for n in names
+                ]
 
-        return Terminator._create(KinesisStream, 'kinesis', paginate_streams)
+        return Terminator._create_pages(context, KinesisStream, 'kinesis', paginate_streams)
 
     @property
     def created_time(self):
@@ -179,10 +163,6 @@ class KinesisStream(Terminator):
     def name(self):
         return self.instance['StreamName']
 
-    @property
-    def ignore(self):
-        return self.instance['StreamStatus'] == 'DELETING'
-
     def terminate(self):
         self.client.delete_stream(
             StreamName=self.instance['StreamName'],
@@ -192,9 +172,8 @@ class KinesisStream(Terminator):
 
 class SesIdentity(DbTerminator):
     @staticmethod
-    def create():
-        return Terminator._create(SesIdentity, 'ses',
-                                  lambda client: client.list_identities()['Identities'])
+    def create(context):
+        return Terminator._create_pages(context, SesIdentity, 'ses', lambda client: paginate(client, 'list_identities', 'Identities'))
 
     @property
     def id(self):
@@ -210,19 +189,9 @@ class SesIdentity(DbTerminator):
 
 class SesReceiptRuleSet(Terminator):
     @staticmethod
-    def create():
-        def _paginate_receipt_rule_sets(client):
-            results = client.list_receipt_rule_sets()
-            next_token = results.pop('NextToken', None)
-            while next_token:
-                # This operation can be made at most once/second, see
-                # https://boto3.readthedocs.io/en/latest/reference/services/ses.html#SES.Client.list_receipt_rule_sets
-                time.sleep(1)
-                next_rule_sets = client.list_receipt_rule_sets(NextToken=next_token)
-                results['RuleSets'].append(next_rule_sets['RuleSets'])
-                next_token = next_rule_sets.pop('NextToken', None)
-            return results['RuleSets']
-        return Terminator._create(SesReceiptRuleSet, 'ses', _paginate_receipt_rule_sets)
+    def create(context):
+        # ListReceiptRuleSets can be called at most once a second, which the rate limit of SES calls keeps to
+        return Terminator._create_pages(context, SesReceiptRuleSet, 'ses', lambda client: paginate(client, 'list_receipt_rule_sets', 'RuleSets'))
 
     @property
     def name(self):
@@ -238,8 +207,8 @@ class SesReceiptRuleSet(Terminator):
 
 class Sns(DbTerminator):
     @staticmethod
-    def create():
-        return Terminator._create(Sns, 'sns', lambda client: client.list_topics()['Topics'])
+    def create(context):
+        return Terminator._create_pages(context, Sns, 'sns', lambda client: paginate(client, 'list_topics', 'Topics'))
 
     @property
     def id(self):
@@ -255,8 +224,8 @@ class Sns(DbTerminator):
 
 class SqsQueue(DbTerminator):
     @staticmethod
-    def create():
-        return Terminator._create(SqsQueue, 'sqs', lambda client: client.list_queues().get('QueueUrls', []))
+    def create(context):
+        return Terminator._create_pages(context, SqsQueue, 'sqs', lambda client: paginate(client, 'list_queues', 'QueueUrls'))
 
     @property
     def id(self):
@@ -272,8 +241,8 @@ class SqsQueue(DbTerminator):
 
 class SsmParameter(DbTerminator):
     @staticmethod
-    def create():
-        return Terminator._create(SsmParameter, 'ssm', lambda client: client.describe_parameters()['Parameters'])
+    def create(context):
+        return Terminator._create_pages(context, SsmParameter, 'ssm', lambda client: paginate(client, 'describe_parameters', 'Parameters'))
 
     @property
     def id(self):
@@ -290,14 +259,9 @@ class SsmParameter(DbTerminator):
 class DynamoDb(DbTerminator):
 
     @staticmethod
-    def create():
+    def create(context):
 
-        def get_tables(client):
-            table_names = client.get_paginator(
-                'list_tables').paginate().build_full_result().get('TableNames', ())
-            return table_names
-
-        return Terminator._create(DynamoDb, 'dynamodb', get_tables)
+        return Terminator._create_pages(context, DynamoDb, 'dynamodb', lambda client: paginate(client, 'list_tables', 'TableNames'))
 
     @property
     def id(self):
@@ -312,15 +276,12 @@ class DynamoDb(DbTerminator):
 
 
 class StepFunctions(Terminator):
-    @staticmethod
-    def create():
+    tagged_resource_types = ('states:stateMachine',)
 
-        def get_state_machines(client):
-            state_machines = client.get_paginator(
-                'list_state_machines').paginate().build_full_result().get('stateMachines', [])
-            return state_machines
+    @staticmethod
+    def create(context):
 
-        return Terminator._create(StepFunctions, 'stepfunctions', get_state_machines)
+        return Terminator._create_pages(context, StepFunctions, 'stepfunctions', lambda client: paginate(client, 'list_state_machines', 'stateMachines'))
 
     @property
     def created_time(self):
@@ -336,8 +297,8 @@ class StepFunctions(Terminator):
 
 class CloudWatchAlarm(DbTerminator):
     @staticmethod
-    def create():
-        return Terminator._create(CloudWatchAlarm, 'cloudwatch', lambda client: client.describe_alarms()['MetricAlarms'])
+    def create(context):
+        return Terminator._create_pages(context, CloudWatchAlarm, 'cloudwatch', lambda client: paginate(client, 'describe_alarms', 'MetricAlarms'))
 
     @property
     def name(self):
@@ -349,13 +310,11 @@ class CloudWatchAlarm(DbTerminator):
 
 class SsmDocument(Terminator):
     @staticmethod
-    def create():
+    def create(context):
         def get_ssm_documents(client):
-            ssm_documents = client.get_paginator(
-                'list_documents').paginate(Filters=[{'Key': 'Owner', 'Values': ['self']}]).build_full_result().get('DocumentIdentifiers', [])
-            return ssm_documents
+            return paginate(client, 'list_documents', 'DocumentIdentifiers', Filters=[{'Key': 'Owner', 'Values': ['self']}])
 
-        return Terminator._create(SsmDocument, 'ssm', get_ssm_documents)
+        return Terminator._create_pages(context, SsmDocument, 'ssm', get_ssm_documents)
 
     @property
     def created_time(self):
@@ -371,13 +330,8 @@ class SsmDocument(Terminator):
 
 class SsmSession(Terminator):
     @staticmethod
-    def create():
-        def get_ssm_sessions(client):
-            ssm_sessions = client.get_paginator(
-                'describe_sessions').paginate(State='Active').build_full_result().get('Sessions', [])
-            return ssm_sessions
-
-        return Terminator._create(SsmSession, 'ssm', get_ssm_sessions)
+    def create(context):
+        return Terminator._create_pages(context, SsmSession, 'ssm', lambda client: paginate(client, 'describe_sessions', 'Sessions', State='Active'))
 
     @property
     def created_time(self):
@@ -396,14 +350,11 @@ class SsmSession(Terminator):
 
 
 class MqBroker(Terminator):
-    @staticmethod
-    def create():
-        def get_mq_brokers(client):
-            mq_brokers = client.get_paginator(
-                'list_brokers').paginate().build_full_result().get('BrokerSummaries', [])
-            return mq_brokers
+    tagged_resource_types = ('mq:broker',)
 
-        return Terminator._create(MqBroker, 'mq', get_mq_brokers)
+    @staticmethod
+    def create(context):
+        return Terminator._create_pages(context, MqBroker, 'mq', lambda client: paginate(client, 'list_brokers', 'BrokerSummaries'))
 
     @property
     def created_time(self):
@@ -0,0 +1,94 @@
+"""Shared boto3 sessions and clients used by all terminators."""
+import os
+import threading
+import typing
+
+import boto3
+import boto3.resources.base
+import botocore.client
+import botocore.config
+
+from .rate_limit import RateLimiter
+
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+# Throttling is adapted to by the rate limiter shared by all clients of a service, rather than by the per-client limiter of botocore's adaptive mode.
+DEFAULT_RETRY_MODE = 'standard'
+DEFAULT_MAX_ATTEMPTS = 10
+
+
+class ClientPool:
+    """
+    Process-wide cache of boto3 clients keyed by service, region and profile.
+    Clients are thread safe, so a single client is shared by every terminator type using the same service in the same region.
+    Sessions are not thread safe, so clients are created while holding a lock.
+    Requests are rate limited per service and region, see RateLimiter.
+    """
+    def __init__(self) -> None:
+        self.max_pool_connections = DEFAULT_MAX_POOL_CONNECTIONS
+        self.rate_limiter = RateLimiter()
+        self._hooks: typing.List[typing.Callable[[botocore.client.BaseClient], None]] = [self.rate_limiter.register]
+        self._sessions: typing.Dict[typing.Optional[str], boto3.Session] = {}
+        self._clients: typing.Dict[typing.Tuple[str, typing.Optional[str], typing.Optional[str]], botocore.client.BaseClient] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, max_pool_connections: int) -> None:
+        """Size the connection pool of each client, which should be at least the number of threads sharing it."""
+        max_pool_connections = max(max_pool_connections, DEFAULT_MAX_POOL_CONNECTIONS)
+
+        with self._lock:
+            if max_pool_connections != self.max_pool_connections:
+                self.max_pool_connections = max_pool_connections
+                self._clients.clear()
+
+    @property
+    def config(self) -> botocore.config.Config:
+        return botocore.config.Config(
+            max_pool_connections=self.max_pool_connections,
+            retries={
+                'mode': os.environ.get('AWS_RETRY_MODE') or DEFAULT_RETRY_MODE,
+                'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS') or DEFAULT_MAX_ATTEMPTS),
+            },
+        )
+
+    def client(self, service_name: str, region_name: typing.Optional[str] = None) -> botocore.client.BaseClient:
+        profile_name = os.environ.get('AWS_PROFILE')
+        key = (service_name, region_name, profile_name)
+
+        with self._lock:
+            client = self._clients.get(key)
+
+            if client is None:
+                client = self._clients[key] = self._get_session(profile_name).client(service_name, region_name=region_name, config=self.config)
+                self._register(client)
+
+            return client
+
+    def resource(self, service_name: str, region_name: typing.Optional[str] = None) -> boto3.resources.base.ServiceResource:
+        with self._lock:
+            resource = self._get_session(os.environ.get('AWS_PROFILE')).resource(service_name, region_name=region_name, config=self.config)
+
+        self._register(resource.meta.client)
+
+        return resource
+
+    def add_hook(self, hook: typing.Callable[[botocore.client.BaseClient], None]) -> None:
+        """Call the given function with each client created from now on, to register event handlers on it."""
+        with self._lock:
+            self._hooks.append(hook)
+            self._clients.clear()
+
+    def _register(self, client: botocore.client.BaseClient) -> None:
+        for hook in self._hooks:
+            hook(client)
+
+    def get_partition_for_region(self, region_name: str) -> str:
+        with self._lock:
+            return self._get_session(os.environ.get('AWS_PROFILE')).get_partition_for_region(region_name)
+
+    def _get_session(self, profile_name: typing.Optional[str]) -> boto3.Session:
+        session = self._sessions.get(profile_name)
+
+        if session is None:
+            session = self._sessions[profile_name] = boto3.Session(profile_name=profile_name)
+
+        return session
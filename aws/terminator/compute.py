@@ -4,13 +4,14 @@ import botocore
 import botocore.exceptions
 import dateutil.tz
 
-from . import DbTerminator, Terminator, get_tag_dict_from_tag_list, get_account_id
+from . import DbTerminator, Filter, Terminator, get_tag_dict_from_tag_list, paginate
+from .eks_inventory import EksInventory
 
 
 class Ec2KeyPair(DbTerminator):
     @staticmethod
-    def create():
-        return Terminator._create(Ec2KeyPair, 'ec2', lambda client: client.describe_key_pairs()['KeyPairs'])
+    def create(context):
+        return Terminator._create(context, Ec2KeyPair, 'ec2', lambda client: client.describe_key_pairs()['KeyPairs'])
 
     @property
     def name(self):
@@ -22,8 +23,8 @@ class Ec2KeyPair(DbTerminator):
 
 class Ec2LoadBalancer(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(Ec2LoadBalancer, 'elb', lambda client: client.describe_load_balancers()['LoadBalancerDescriptions'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2LoadBalancer, 'elb', lambda client: paginate(client, 'describe_load_balancers', 'LoadBalancerDescriptions'))
 
     @property
     def name(self):
@@ -38,10 +39,15 @@ class Ec2LoadBalancer(Terminator):
 
 
 class Ec2Instance(Terminator):
+    batch_size = 1000
+    # terminated instances stay listed for about an hour after they are gone
+    discovery_filters = (Filter('instance-state-name', 'State.Name', ('pending', 'running', 'shutting-down', 'stopping', 'stopped')),)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2Instance, 'ec2',
-                                  lambda client: [i for r in client.describe_instances()['Reservations'] for i in r['Instances']])
+    def create(context):
+        return Terminator._create_pages(
+            context, Ec2Instance, 'ec2',
+            lambda client: paginate(client, 'describe_instances', 'Reservations[].Instances[]', filters=Ec2Instance.discovery_filters))
 
     @property
     def id(self):
@@ -55,10 +61,6 @@ class Ec2Instance(Terminator):
     def created_time(self):
         return self.instance['LaunchTime']
 
-    @property
-    def ignore(self):
-        return self.instance['State']['Name'] == 'terminated'
-
     def terminate(self):
         try:
             self.client.terminate_instances(InstanceIds=[self.id])
@@ -70,12 +72,27 @@ class Ec2Instance(Terminator):
         self.client.modify_instance_attribute(InstanceId=self.id, Attribute='disableApiTermination', Value='False')
         self.client.terminate_instances(InstanceIds=[self.id])
 
+    @classmethod
+    def terminate_batch(cls, terminators):
+        if len(terminators) > 1:
+            try:
+                terminators[0].client.terminate_instances(InstanceIds=[terminator.id for terminator in terminators])
+                return {}
+            except botocore.exceptions.ClientError:
+                # the request fails as a whole if any instance cannot be terminated, such as one with termination protection,
+                # so terminate them one at a time to find out which
+                pass
+
+        return super().terminate_batch(terminators)
+
 
 class Ec2Snapshot(Terminator):
+    terminate_after = ('Ec2Image',)
+
     @staticmethod
-    def create():
-        account = get_account_id()
-        return Terminator._create(Ec2Snapshot, 'ec2', lambda client: client.describe_snapshots(OwnerIds=[account])['Snapshots'])
+    def create(context):
+        account = context.identity.account_id
+        return Terminator._create_pages(context, Ec2Snapshot, 'ec2', lambda client: paginate(client, 'describe_snapshots', 'Snapshots', OwnerIds=[account]))
 
     @property
     def id(self):
@@ -95,9 +112,9 @@ class Ec2Snapshot(Terminator):
 
 class Ec2Image(Terminator):
     @staticmethod
-    def create():
-        account = get_account_id()
-        return Terminator._create(Ec2Image, 'ec2', lambda client: client.describe_images(Owners=[account])['Images'])
+    def create(context):
+        account = context.identity.account_id
+        return Terminator._create(context, Ec2Image, 'ec2', lambda client: client.describe_images(Owners=[account])['Images'])
 
     @property
     def id(self):
@@ -117,9 +134,11 @@ class Ec2Image(Terminator):
 
 
 class Ec2Volume(Terminator):
+    terminate_after = ('Ec2Instance',)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2Volume, 'ec2', lambda client: client.describe_volumes()['Volumes'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2Volume, 'ec2', lambda client: paginate(client, 'describe_volumes', 'Volumes'))
 
     @property
     def age_limit(self):
@@ -142,15 +161,22 @@ class Ec2Volume(Terminator):
 
 
 class Ec2TransitGateway(Terminator):
+    terminate_after = ('Ec2TransitGatewayAttachment',)
+    # deleting and deleted are left out because there is nothing more we can do with them
+    # pending is left out because deletion is not allowed in that state
+    # modifying is assumed to behave like pending, although this has not been verified
+    discovery_filters = (Filter('state', 'State', ('available',)),)
+
     @staticmethod
-    def create():
-        account = get_account_id()
+    def create(context):
+        account = context.identity.account_id
         filters = [{
             'Name': 'owner-id',
             'Values': [account]
         }]
-        return Terminator._create(Ec2TransitGateway, 'ec2',
-                                  lambda client: client.describe_transit_gateways(Filters=filters)['TransitGateways'])
+        return Terminator._create_pages(
+            context, Ec2TransitGateway, 'ec2',
+            lambda client: paginate(client, 'describe_transit_gateways', 'TransitGateways', filters=Ec2TransitGateway.discovery_filters, Filters=filters))
 
     @property
     def id(self):
@@ -164,27 +190,27 @@ class Ec2TransitGateway(Terminator):
     def created_time(self):
         return self.instance['CreationTime']
 
-    @property
-    def ignore(self):
-        # deleting and deleted are ignored because there is nothing more we can do with them
-        # pending is ignored because deletion is not allowed in that state
-        # modifying is assumed to behave like pending, although this has not been verified
-        return self.instance['State'] in ('deleting', 'deleted', 'pending', 'modifying')
-
     def terminate(self):
         self.client.delete_transit_gateway(TransitGatewayId=self.id)
 
 
 class Ec2TransitGatewayAttachment(Terminator):
+    # We can only delete resources in specific states:
+    # https://docs.aws.amazon.com/vpc/latest/tgw/tgw-vpc-attachments.html#vpc-attachment-lifecycle
+    discovery_filters = (Filter('state', 'State', ('available', 'pending-acceptance')),)
+
     @staticmethod
-    def create():
-        account = get_account_id()
+    def create(context):
+        account = context.identity.account_id
         filters = [{
             'Name': 'transit-gateway-owner-id',
             'Values': [account]
         }]
-        return Terminator._create(Ec2TransitGatewayAttachment, 'ec2',
-                                  lambda client: client.describe_transit_gateway_attachments(Filters=filters)['TransitGatewayAttachments'])
+        return Terminator._create_pages(
+            context, Ec2TransitGatewayAttachment, 'ec2',
+            lambda client: paginate(
+                client, 'describe_transit_gateway_attachments', 'TransitGatewayAttachments',
+                filters=Ec2TransitGatewayAttachment.discovery_filters, Filters=filters))
 
     @property
     def id(self):
@@ -198,12 +224,6 @@ class Ec2TransitGatewayAttachment(Terminator):
     def created_time(self):
         return self.instance['CreationTime']
 
-    @property
-    def ignore(self):
-        # We can only delete resources in specific states:
-        # https://docs.aws.amazon.com/vpc/latest/tgw/tgw-vpc-attachments.html#vpc-attachment-lifecycle
-        return self.instance['State'] not in ('available', 'pending-acceptance')
-
     def terminate(self):
         if self.instance['ResourceType'] == 'vpc':
             self.client.delete_transit_gateway_vpc_attachment(TransitGatewayAttachmentId=self.id)
@@ -213,8 +233,8 @@ class Ec2TransitGatewayAttachment(Terminator):
 
 class ElasticBeanstalk(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(ElasticBeanstalk, 'elasticbeanstalk', lambda client: client.describe_applications()['Applications'])
+    def create(context):
+        return Terminator._create(context, ElasticBeanstalk, 'elasticbeanstalk', lambda client: client.describe_applications()['Applications'])
 
     @property
     def id(self):
@@ -237,11 +257,11 @@ class ElasticBeanstalk(Terminator):
 
 
 class NeptuneSubnetGroup(DbTerminator):
+    ignore_filters = (Filter(None, 'DBSubnetGroupName', ('default',)),)
+
     @staticmethod
-    def create():
-        def _paginate_neptune_subnet_groups(client):
-            return client.get_paginator('describe_db_subnet_groups').paginate().build_full_result()['DBSubnetGroups']
-        return Terminator._create(NeptuneSubnetGroup, 'neptune', _paginate_neptune_subnet_groups)
+    def create(context):
+        return Terminator._create_pages(context, NeptuneSubnetGroup, 'neptune', lambda client: paginate(client, 'describe_db_subnet_groups', 'DBSubnetGroups'))
 
     @property
     def id(self):
@@ -251,18 +271,14 @@ class NeptuneSubnetGroup(DbTerminator):
     def name(self):
         return self.instance['DBSubnetGroupName']
 
-    @property
-    def ignore(self):
-        return self.name == 'default'
-
     def terminate(self):
         self.client.delete_db_subnet_group(DBSubnetGroupName=self.name)
 
 
 class EcrRepository(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(EcrRepository, 'ecr', lambda client: client.describe_repositories()['repositories'])
+    def create(context):
+        return Terminator._create_pages(context, EcrRepository, 'ecr', lambda client: paginate(client, 'describe_repositories', 'repositories'))
 
     @property
     def name(self):
@@ -278,8 +294,8 @@ class EcrRepository(Terminator):
 
 class LambdaFunction(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(LambdaFunction, 'lambda', lambda client: client.list_functions()['Functions'])
+    def create(context):
+        return Terminator._create_pages(context, LambdaFunction, 'lambda', lambda client: paginate(client, 'list_functions', 'Functions'))
 
     @property
     def name(self):
@@ -296,16 +312,8 @@ class LambdaFunction(Terminator):
 
 class NeptuneCluster(Terminator):
     @staticmethod
-    def create():
-        def _paginate_neptune_clusters(client):
-            results = client.describe_db_clusters()
-            marker = results.pop('Marker', None)
-            while marker is not None:
-                next_clusters = client.describe_db_clusters(Marker=marker)
-                results['DBClusters'].append(next_clusters['DBClusters'])
-                marker = next_clusters.pop('Marker', None)
-            return results['DBClusters']
-        return Terminator._create(NeptuneCluster, 'neptune', _paginate_neptune_clusters)
+    def create(context):
+        return Terminator._create_pages(context, NeptuneCluster, 'neptune', lambda client: paginate(client, 'describe_db_clusters', 'DBClusters'))
 
     @property
     def name(self):
@@ -319,16 +327,17 @@ class NeptuneCluster(Terminator):
         self.client.delete_db_cluster(DBClusterIdentifier=self.name, SkipFinalSnapshot=True)
 
 
+def get_eks_inventory(context, client):
+    return context.get_cached('eks_inventory', lambda: EksInventory(client))
+
+
 class EksCluster(Terminator):
+    tagged_resource_types = ('eks:cluster',)
+    terminate_after = ('EksFargateProfile', 'EksNodegroup')
+
     @staticmethod
-    def create():
-        def _build_cluster_results(client):
-            cluster_list = client.list_clusters()['clusters']
-            results = []
-            for cluster in cluster_list:
-                results.append(client.describe_cluster(name=cluster)['cluster'])
-            return results
-        return Terminator._create(EksCluster, 'eks', _build_cluster_results)
+    def create(context):
+        return Terminator._create(context, EksCluster, 'eks', lambda client: get_eks_inventory(context, client).clusters)
 
     @property
     def name(self):
@@ -351,15 +360,12 @@ class EksCluster(Terminator):
 
 
 class EksFargateProfile(Terminator):
+    tagged_resource_types = ('eks:fargateprofile',)
+    ignore_filters = (Filter(None, 'status', ('DELETING',)),)
+
     @staticmethod
-    def create():
-        def _build_eks_fargate_profiles(client):
-            results = []
-            for cluster in client.list_clusters()['clusters']:
-                for fargate_profile in client.list_fargate_profiles(clusterName=cluster)['fargateProfileNames']:
-                    results.append(client.describe_fargate_profile(clusterName=cluster, fargateProfileName=fargate_profile)['fargateProfile'])
-            return results
-        return Terminator._create(EksFargateProfile, 'eks', _build_eks_fargate_profiles)
+    def create(context):
+        return Terminator._create(context, EksFargateProfile, 'eks', lambda client: get_eks_inventory(context, client).fargate_profiles)
 
     @property
     def name(self):
@@ -373,10 +379,6 @@ class EksFargateProfile(Terminator):
     def created_time(self):
         return self.instance['createdAt']
 
-    @property
-    def ignore(self):
-        return self.instance['status'] == ('DELETING')
-
     @property
     def cluster_name(self):
         return self.instance['clusterName']
@@ -390,15 +392,12 @@ class EksFargateProfile(Terminator):
 
 
 class EksNodegroup(Terminator):
+    tagged_resource_types = ('eks:nodegroup',)
+    ignore_filters = (Filter(None, 'status', ('DELETING',)),)
+
     @staticmethod
-    def create():
-        def _build_eks_nodgroups(client):
-            results = []
-            for cluster in client.list_clusters()['clusters']:
-                for nodegroup in client.list_nodegroups(clusterName=cluster)['nodegroups']:
-                    results.append(client.describe_nodegroup(clusterName=cluster, nodegroupName=nodegroup)['nodegroup'])
-            return results
-        return Terminator._create(EksNodegroup, 'eks', _build_eks_nodgroups)
+    def create(context):
+        return Terminator._create(context, EksNodegroup, 'eks', lambda client: get_eks_inventory(context, client).nodegroups)
 
     @property
     def name(self):
@@ -412,10 +411,6 @@ class EksNodegroup(Terminator):
     def created_time(self):
         return self.instance['createdAt']
 
-    @property
-    def ignore(self):
-        return self.instance['status'] == ('DELETING')
-
     @property
     def cluster_name(self):
         return self.instance['clusterName']
@@ -430,11 +425,11 @@ class EksNodegroup(Terminator):
 
 class ElasticLoadBalancing(Terminator):
     @staticmethod
-    def create():
-        def _paginate_elastic_lbs(client):
-            return client.get_paginator(
-                'describe_load_balancers').paginate().build_full_result()['LoadBalancerDescriptions']
-        return Terminator._create(ElasticLoadBalancing, 'elb', _paginate_elastic_lbs)
+    def create(context):
+        return Terminator._create_pages(
+            context, ElasticLoadBalancing, 'elb',
+            lambda client: paginate(client, 'describe_load_balancers', 'LoadBalancerDescriptions')
+        )
 
     @property
     def name(self):
@@ -450,11 +445,8 @@ class ElasticLoadBalancing(Terminator):
 
 class ElasticLoadBalancingv2(Terminator):
     @staticmethod
-    def create():
-        def _paginate_elastic_lbs(client):
-            return client.get_paginator(
-                'describe_load_balancers').paginate().build_full_result()['LoadBalancers']
-        return Terminator._create(ElasticLoadBalancingv2, 'elbv2', _paginate_elastic_lbs)
+    def create(context):
+        return Terminator._create_pages(context, ElasticLoadBalancingv2, 'elbv2', lambda client: paginate(client, 'describe_load_balancers', 'LoadBalancers'))
 
     @property
     def name(self):
@@ -479,12 +471,11 @@ class ElasticLoadBalancingv2(Terminator):
 
 
 class Elbv2TargetGroups(DbTerminator):
+    terminate_after = ('ElasticLoadBalancingv2',)
+
     @staticmethod
-    def create():
-        def _paginate_target_groups(client):
-            return client.get_paginator(
-                'describe_target_groups').paginate().build_full_result()['TargetGroups']
-        return Terminator._create(Elbv2TargetGroups, 'elbv2', _paginate_target_groups)
+    def create(context):
+        return Terminator._create_pages(context, Elbv2TargetGroups, 'elbv2', lambda client: paginate(client, 'describe_target_groups', 'TargetGroups'))
 
     @property
     def age_limit(self):
@@ -504,10 +495,8 @@ class Elbv2TargetGroups(DbTerminator):
 
 class Lightsail(Terminator):
     @staticmethod
-    def create():
-        def _paginate_lightsail_instances(client):
-            return client.get_paginator('get_instances').paginate().build_full_result()['instances']
-        return Terminator._create(Lightsail, 'lightsail', _paginate_lightsail_instances)
+    def create(context):
+        return Terminator._create_pages(context, Lightsail, 'lightsail', lambda client: paginate(client, 'get_instances', 'instances'))
 
     @property
     def name(self):
@@ -523,10 +512,8 @@ class Lightsail(Terminator):
 
 class LightsailKeyPair(Terminator):
     @staticmethod
-    def create():
-        def _paginate_lightsail_key_pairs(client):
-            return client.get_paginator('get_key_pairs').paginate().build_full_result()['keyPairs']
-        return Terminator._create(LightsailKeyPair, 'lightsail', _paginate_lightsail_key_pairs)
+    def create(context):
+        return Terminator._create_pages(context, LightsailKeyPair, 'lightsail', lambda client: paginate(client, 'get_key_pairs', 'keyPairs'))
 
     @property
     def name(self):
@@ -542,10 +529,8 @@ class LightsailKeyPair(Terminator):
 
 class LightsailStaticIp(Terminator):
     @staticmethod
-    def create():
-        def _paginate_lightsail_static_ips(client):
-            return client.get_paginator('get_static_ips').paginate().build_full_result()['staticIps']
-        return Terminator._create(LightsailStaticIp, 'lightsail', _paginate_lightsail_static_ips)
+    def create(context):
+        return Terminator._create_pages(context, LightsailStaticIp, 'lightsail', lambda client: paginate(client, 'get_static_ips', 'staticIps'))
 
     @property
     def name(self):
@@ -561,10 +546,11 @@ class LightsailStaticIp(Terminator):
 
 class LightsailInstanceSnapshot(Terminator):
     @staticmethod
-    def create():
-        def _paginate_lightsail_instance_snapshots(client):
-            return client.get_paginator('get_instance_snapshots').paginate().build_full_result()['instanceSnapshots']
-        return Terminator._create(LightsailInstanceSnapshot, 'lightsail', _paginate_lightsail_instance_snapshots)
+    def create(context):
+        return Terminator._create_pages(
+            context, LightsailInstanceSnapshot, 'lightsail',
+            lambda client: paginate(client, 'get_instance_snapshots', 'instanceSnapshots')
+        )
 
     @property
     def name(self):
@@ -580,8 +566,10 @@ class LightsailInstanceSnapshot(Terminator):
 
 class AutoScalingGroup(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(AutoScalingGroup, 'autoscaling', lambda client: client.describe_auto_scaling_groups()['AutoScalingGroups'])
+    def create(context):
+        return Terminator._create_pages(
+            context, AutoScalingGroup, 'autoscaling',
+            lambda client: paginate(client, 'describe_auto_scaling_groups', 'AutoScalingGroups'))
 
     @property
     def id(self):
@@ -600,13 +588,13 @@ class AutoScalingGroup(Terminator):
 
 
 class LaunchConfiguration(Terminator):
+    terminate_after = ('AutoScalingGroup',)
+
     @staticmethod
-    def create():
-        return Terminator._create(
-            LaunchConfiguration,
-            'autoscaling',
-            lambda client: client.describe_launch_configurations()['LaunchConfigurations']
-        )
+    def create(context):
+        return Terminator._create_pages(
+            context, LaunchConfiguration, 'autoscaling',
+            lambda client: paginate(client, 'describe_launch_configurations', 'LaunchConfigurations'))
 
     @property
     def age_limit(self):
@@ -633,13 +621,11 @@ class LaunchConfiguration(Terminator):
 
 
 class LaunchTemplate(Terminator):
+    terminate_after = ('AutoScalingGroup',)
+
     @staticmethod
-    def create():
-        return Terminator._create(
-            LaunchTemplate,
-            'ec2',
-            lambda client: client.describe_launch_templates()['LaunchTemplates']
-        )
+    def create(context):
+        return Terminator._create_pages(context, LaunchTemplate, 'ec2', lambda client: paginate(client, 'describe_launch_templates', 'LaunchTemplates'))
 
     @property
     def id(self):
@@ -659,8 +645,10 @@ class LaunchTemplate(Terminator):
 
 class Ec2SpotInstanceRequest(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(Ec2SpotInstanceRequest, 'ec2', lambda client: client.describe_spot_instance_requests()['SpotInstanceRequests'])
+    def create(context):
+        return Terminator._create_pages(
+            context, Ec2SpotInstanceRequest, 'ec2',
+            lambda client: paginate(client, 'describe_spot_instance_requests', 'SpotInstanceRequests'))
 
     @property
     def name(self):
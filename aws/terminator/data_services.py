@@ -2,16 +2,16 @@ import datetime
 
 import botocore.exceptions
 
-from . import DbTerminator, Terminator, get_tag_dict_from_tag_list
+from . import DbTerminator, Filter, Terminator, get_tag_dict_from_tag_list, paginate
 
 
 class DmsSubnetGroup(DbTerminator):
     @staticmethod
-    def create():
-        def paginate_dms_subnet_groups(client):
-            return client.get_paginator('describe_replication_subnet_groups').paginate().build_full_result()['ReplicationSubnetGroups']
-
-        return Terminator._create(DmsSubnetGroup, 'dms', paginate_dms_subnet_groups)
+    def create(context):
+        return Terminator._create_pages(
+            context, DmsSubnetGroup, 'dms',
+            lambda client: paginate(client, 'describe_replication_subnet_groups', 'ReplicationSubnetGroups')
+        )
 
     @property
     def id(self):
@@ -27,11 +27,11 @@ class DmsSubnetGroup(DbTerminator):
 
 class RedshiftSubnetGroup(DbTerminator):
     @staticmethod
-    def create():
-        def paginate_redshift_subnet_groups(client):
-            return client.get_paginator('describe_cluster_subnet_groups').paginate().build_full_result()['ClusterSubnetGroups']
-
-        return Terminator._create(RedshiftSubnetGroup, 'redshift', paginate_redshift_subnet_groups)
+    def create(context):
+        return Terminator._create_pages(
+            context, RedshiftSubnetGroup, 'redshift',
+            lambda client: paginate(client, 'describe_cluster_subnet_groups', 'ClusterSubnetGroups')
+        )
 
     @property
     def id(self):
@@ -46,17 +46,15 @@ class RedshiftSubnetGroup(DbTerminator):
 
 
 class Elasticache(Terminator):
-    @staticmethod
-    def create():
+    # describe_cache_clusters does not have a parameter to filter results, so the states are left out of each page
+    # The key "CacheClusterCreateTime" does not exist while the cluster is being created.
+    discovery_filters = (Filter(None, 'CacheClusterStatus', ('creating', 'deleting'), exclude=True),)
 
-        def get_available_clusters(client):
-            # describe_cache_clusters does not have a parameter to filter results
-            # The key "CacheClusterCreateTime" does not exist while the cluster is being created.
-            ignore_states = ('creating', 'deleting',)
-            clusters = client.describe_cache_clusters()['CacheClusters']
-            return [cluster for cluster in clusters if cluster['CacheClusterStatus'] not in ignore_states]
-
-        return Terminator._create(Elasticache, 'elasticache', get_available_clusters)
+    @staticmethod
+    def create(context):
+        return Terminator._create_pages(
+            context, Elasticache, 'elasticache',
+            lambda client: paginate(client, 'describe_cache_clusters', 'CacheClusters', filters=Elasticache.discovery_filters))
 
     @property
     def name(self):
@@ -77,8 +75,8 @@ class Elasticache(Terminator):
 
 class GlueConnection(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(GlueConnection, 'glue', lambda client: client.get_connections()['ConnectionList'])
+    def create(context):
+        return Terminator._create_pages(context, GlueConnection, 'glue', lambda client: paginate(client, 'get_connections', 'ConnectionList'))
 
     @property
     def id(self):
@@ -98,8 +96,8 @@ class GlueConnection(Terminator):
 
 class GlueCrawler(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(GlueCrawler, 'glue', lambda client: client.get_crawlers()['Crawlers'])
+    def create(context):
+        return Terminator._create_pages(context, GlueCrawler, 'glue', lambda client: paginate(client, 'get_crawlers', 'Crawlers'))
 
     @property
     def id(self):
@@ -119,8 +117,8 @@ class GlueCrawler(Terminator):
 
 class GlueJob(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(GlueJob, 'glue', lambda client: client.get_jobs()['Jobs'])
+    def create(context):
+        return Terminator._create_pages(context, GlueJob, 'glue', lambda client: paginate(client, 'get_jobs', 'Jobs'))
 
     @property
     def id(self):
@@ -140,8 +138,8 @@ class GlueJob(Terminator):
 
 class Glacier(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(Glacier, 'glacier', lambda client: client.list_vaults()['VaultList'])
+    def create(context):
+        return Terminator._create_pages(context, Glacier, 'glacier', lambda client: paginate(client, 'list_vaults', 'VaultList'))
 
     @property
     def id(self):
@@ -160,9 +158,13 @@ class Glacier(Terminator):
 
 
 class RdsDbParameterGroup(DbTerminator):
+    ignore_filters = (Filter(None, 'DBParameterGroupName', ('default',), prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(RdsDbParameterGroup, 'rds', lambda client: client.describe_db_parameter_groups()['DBParameterGroups'])
+    def create(context):
+        return Terminator._create_pages(
+            context, RdsDbParameterGroup, 'rds',
+            lambda client: paginate(client, 'describe_db_parameter_groups', 'DBParameterGroups'))
 
     @property
     def id(self):
@@ -172,19 +174,18 @@ class RdsDbParameterGroup(DbTerminator):
     def name(self):
         return self.instance['DBParameterGroupName']
 
-    @property
-    def ignore(self):
-        return self.name.startswith('default')
-
     def terminate(self):
         self.client.delete_db_parameter_group(DBParameterGroupName=self.name)
 
 
 class RdsDbClusterParameterGroup(DbTerminator):
+    ignore_filters = (Filter(None, 'DBClusterParameterGroupName', ('default',), prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(RdsDbClusterParameterGroup, 'rds',
-                                  lambda client: client.describe_db_cluster_parameter_groups()['DBClusterParameterGroups'])
+    def create(context):
+        return Terminator._create_pages(
+            context, RdsDbClusterParameterGroup, 'rds',
+            lambda client: paginate(client, 'describe_db_cluster_parameter_groups', 'DBClusterParameterGroups'))
 
     @property
     def id(self):
@@ -194,18 +195,14 @@ class RdsDbClusterParameterGroup(DbTerminator):
     def name(self):
         return self.instance['DBClusterParameterGroupName']
 
-    @property
-    def ignore(self):
-        return self.name.startswith('default')
-
     def terminate(self):
         self.client.delete_db_cluster_parameter_group(DBClusterParameterGroupName=self.name)
 
 
 class RdsDbInstance(DbTerminator):
     @staticmethod
-    def create():
-        return Terminator._create(RdsDbInstance, 'rds', lambda client: client.describe_db_instances()['DBInstances'])
+    def create(context):
+        return Terminator._create_pages(context, RdsDbInstance, 'rds', lambda client: paginate(client, 'describe_db_instances', 'DBInstances'))
 
     @property
     def id(self):
@@ -231,9 +228,10 @@ class RdsDbInstance(DbTerminator):
 
 class RdsDbSnapshot(DbTerminator):
     @staticmethod
-    def create():
-        return Terminator._create(RdsDbSnapshot, 'rds',
-                                  lambda client: client.describe_db_snapshots(SnapshotType='manual')['DBSnapshots'])
+    def create(context):
+        return Terminator._create_pages(
+            context, RdsDbSnapshot, 'rds',
+            lambda client: paginate(client, 'describe_db_snapshots', 'DBSnapshots', SnapshotType='manual'))
 
     @property
     def id(self):
@@ -249,8 +247,8 @@ class RdsDbSnapshot(DbTerminator):
 
 class RdsDbCluster(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(RdsDbCluster, 'rds', lambda client: client.describe_db_clusters()['DBClusters'])
+    def create(context):
+        return Terminator._create_pages(context, RdsDbCluster, 'rds', lambda client: paginate(client, 'describe_db_clusters', 'DBClusters'))
 
     @property
     def id(self):
@@ -275,9 +273,10 @@ class RdsDbCluster(Terminator):
 
 class RdsDbClusterSnapshot(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(RdsDbClusterSnapshot, 'rds',
-                                  lambda client: client.describe_db_cluster_snapshots(SnapshotType='manual')['DBClusterSnapshots'])
+    def create(context):
+        return Terminator._create_pages(
+            context, RdsDbClusterSnapshot, 'rds',
+            lambda client: paginate(client, 'describe_db_cluster_snapshots', 'DBClusterSnapshots', SnapshotType='manual'))
 
     @property
     def id(self):
@@ -296,17 +295,15 @@ class RdsDbClusterSnapshot(Terminator):
 
 
 class RedshiftCluster(Terminator):
-    @staticmethod
-    def create():
+    # describe_clusters does not have a parameter to filter results, so the states are left out of each page
+    # The key "ClusterCreateTime" does not exist while the cluster is being created.
+    discovery_filters = (Filter(None, 'ClusterStatus', ('creating', 'deleting'), exclude=True),)
 
-        def get_available_clusters(client):
-            # describe_clusters does not have a parameter to filter results
-            # The key "ClusterCreateTime" does not exist while the cluster is being created.
-            ignore_states = ('creating', 'deleting',)
-            clusters = client.describe_clusters()['Clusters']
-            return [cluster for cluster in clusters if cluster['ClusterStatus'] not in ignore_states]
-
-        return Terminator._create(RedshiftCluster, 'redshift', get_available_clusters)
+    @staticmethod
+    def create(context):
+        return Terminator._create_pages(
+            context, RedshiftCluster, 'redshift',
+            lambda client: paginate(client, 'describe_clusters', 'Clusters', filters=RedshiftCluster.discovery_filters))
 
     @property
     def name(self):
@@ -325,9 +322,11 @@ class RedshiftCluster(Terminator):
 
 
 class RdsOptionGroup(DbTerminator):
+    ignore_filters = (Filter(None, 'OptionGroupName', ('default',), prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(RdsOptionGroup, 'rds', lambda client: client.describe_option_groups()['OptionGroupsList'])
+    def create(context):
+        return Terminator._create_pages(context, RdsOptionGroup, 'rds', lambda client: paginate(client, 'describe_option_groups', 'OptionGroupsList'))
 
     @property
     def id(self):
@@ -337,18 +336,14 @@ class RdsOptionGroup(DbTerminator):
     def name(self):
         return self.instance['OptionGroupName']
 
-    @property
-    def ignore(self):
-        return self.name.startswith('default')
-
     def terminate(self):
         self.client.delete_option_group(OptionGroupName=self.name)
 
 
 class KafkaConfiguration(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(KafkaConfiguration, 'kafka', lambda client: client.list_configurations()['Configurations'])
+    def create(context):
+        return Terminator._create_pages(context, KafkaConfiguration, 'kafka', lambda client: paginate(client, 'list_configurations', 'Configurations'))
 
     @property
     def id(self):
@@ -371,9 +366,11 @@ class KafkaConfiguration(Terminator):
 
 
 class KafkaCluster(Terminator):
+    tagged_resource_types = ('kafka:cluster',)
+
     @staticmethod
-    def create():
-        return Terminator._create(KafkaCluster, 'kafka', lambda client: client.list_clusters()['ClusterInfoList'])
+    def create(context):
+        return Terminator._create_pages(context, KafkaCluster, 'kafka', lambda client: paginate(client, 'list_clusters', 'ClusterInfoList'))
 
     @property
     def id(self):
@@ -0,0 +1,67 @@
+"""Discovery of the EKS clusters of a region with their nodegroups and Fargate profiles, shared by the EKS terminators."""
+import concurrent.futures
+import typing
+
+import botocore.client
+import botocore.exceptions
+
+DEFAULT_DESCRIBE_CONCURRENCY = 8
+
+
+class EksInventory:
+    """
+    The descriptions of the EKS clusters, nodegroups and Fargate profiles of a region.
+    Clusters are listed once, and the nodegroups and Fargate profiles of every cluster are listed and described concurrently.
+    Resources deleted between being listed and described are left out.
+    """
+    def __init__(self, client: botocore.client.BaseClient, concurrency: int = DEFAULT_DESCRIBE_CONCURRENCY) -> None:
+        self.client = client
+        self.clusters: typing.List[typing.Dict[str, typing.Any]] = []
+        self.nodegroups: typing.List[typing.Dict[str, typing.Any]] = []
+        self.fargate_profiles: typing.List[typing.Dict[str, typing.Any]] = []
+
+        cluster_names = self._list('list_clusters', 'clusters')
+
+        if not cluster_names:
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            clusters = [executor.submit(self._describe, 'describe_cluster', 'cluster', name=name) for name in cluster_names]
+            nodegroup_names = [executor.submit(self._list, 'list_nodegroups', 'nodegroups', clusterName=name) for name in cluster_names]
+            profile_names = [executor.submit(self._list, 'list_fargate_profiles', 'fargateProfileNames', clusterName=name) for name in cluster_names]
+
+            # describe the nodegroups and profiles of each cluster as soon as they are listed, while the other clusters are still being listed
+            nodegroups = [
+                executor.submit(self._describe, 'describe_nodegroup', 'nodegroup', clusterName=cluster_name, nodegroupName=name)
+                for cluster_name, names in zip(cluster_names, nodegroup_names) for name in names.result()
+            ]
+            profiles = [
+                executor.submit(self._describe, 'describe_fargate_profile', 'fargateProfile', clusterName=cluster_name, fargateProfileName=name)
+                for cluster_name, names in zip(cluster_names, profile_names) for name in names.result()
+            ]
+
+            self.clusters = get_results(clusters)
+            self.nodegroups = get_results(nodegroups)
+            self.fargate_profiles = get_results(profiles)
+
+    def _list(self, operation_name: str, result_key: str, **kwargs: typing.Any) -> typing.List[str]:
+        try:
+            return [name for page in self.client.get_paginator(operation_name).paginate(**kwargs) for name in page[result_key]]
+        except botocore.exceptions.ClientError as ex:
+            if ex.response['Error']['Code'] == 'ResourceNotFoundException':
+                return []  # the cluster was deleted after being listed
+
+            raise
+
+    def _describe(self, operation_name: str, result_key: str, **kwargs: typing.Any) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        try:
+            return getattr(self.client, operation_name)(**kwargs)[result_key]
+        except botocore.exceptions.ClientError as ex:
+            if ex.response['Error']['Code'] == 'ResourceNotFoundException':
+                return None  # deleted after being listed
+
+            raise
+
+
+def get_results(futures: typing.List[concurrent.futures.Future]) -> typing.List[typing.Dict[str, typing.Any]]:
+    return [result for result in (future.result() for future in futures) if result is not None]
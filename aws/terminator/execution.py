@@ -0,0 +1,196 @@
+"""Bounded thread pools which keep the log output of the work they run in a predictable order."""
+import concurrent.futures
+import logging
+import threading
+import typing
+
+logger = logging.getLogger('cleanup')
+
+T = typing.TypeVar('T')
+
+
+class LogBuffer(logging.Filter):
+    """
+    Logger filter which defers records emitted while a capture is active on the current thread.
+    Captured records are held in memory until they are replayed, so flush() passes on everything held back when a run might be cut short, such as once
+    its deadline has passed.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self.holding = True
+        self._local = threading.local()
+        self._held: typing.List[typing.List[logging.LogRecord]] = []
+        self._lock = threading.Lock()
+
+    def capture(self, func: typing.Callable[..., typing.Any], *args, **kwargs) -> typing.List[logging.LogRecord]:
+        """
+        Call the given function and return the log records it emitted instead of passing them to the handlers.
+        The records of a call which raises are replayed at once, since they cannot be returned.
+        """
+        previous = getattr(self._local, 'records', None)
+        records: typing.List[logging.LogRecord] = []
+        self._local.records = records
+
+        with self._lock:
+            self._held.append(records)
+
+        try:
+            func(*args, **kwargs)
+        except BaseException:
+            self._local.records = previous
+            self.replay(records)
+            raise
+        finally:
+            self._local.records = previous
+
+        return records
+
+    def replay(self, records: typing.List[logging.LogRecord]) -> None:
+        """Pass previously captured records on to the handlers, or to the capture active on the current thread."""
+        with self._lock:
+            self._held = [value for value in self._held if value is not records]
+            pending = list(records)
+            records.clear()
+
+        for record in pending:
+            logger.handle(record)
+
+    def flush(self) -> None:
+        """Pass on every record held back, whether its capture is active or waiting to be replayed, and stop holding back records until hold() is called."""
+        with self._lock:
+            self.holding = False
+            pending = [record for records in self._held for record in records]
+
+            for records in self._held:
+                records.clear()
+
+            self._held = []
+
+        # the records have already passed the level and filter checks, and must not be held back by a capture active on the current thread
+        for record in pending:
+            logger.callHandlers(record)
+
+    def hold(self) -> None:
+        """Hold back the records of captures again, such as at the start of a run."""
+        with self._lock:
+            self.holding = True
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        records = getattr(self._local, 'records', None)
+
+        if records is None or not self.holding:
+            return True
+
+        # format now, so the record does not keep the terminator alive or render it later from another thread
+        record.msg = record.getMessage()
+        record.args = None
+
+        with self._lock:
+            if not self.holding:
+                return True
+
+            records.append(record)
+
+        return False
+
+
+log_buffer = LogBuffer()
+logger.addFilter(log_buffer)
+
+
+def run_in_order(max_workers: int, func: typing.Callable[..., None], items: typing.Sequence[typing.Any], *args) -> None:
+    """Call func(item, *args) for each item on a bounded thread pool, emitting the log records of each call in item order."""
+    if max_workers <= 1 or len(items) <= 1:
+        for item in items:
+            func(item, *args)
+
+        return
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        replay_in_order([executor.submit(log_buffer.capture, func, item, *args) for item in items])
+
+
+def replay_in_order(futures: typing.List[concurrent.futures.Future]) -> None:
+    """
+    Replay the log records returned by each of the given futures of log_buffer.capture() calls in the given order, each as soon as it and the futures
+    before it are done. Once all of them are done, raise the exception of the first which failed, if any.
+    """
+    for future in futures:
+        if not future.exception():
+            log_buffer.replay(future.result())
+
+    for future in futures:
+        future.result()
+
+
+def run_graph(max_workers: int, func: typing.Callable[..., None], items: typing.Sequence[T], dependencies: typing.Callable[[T], typing.Iterable[T]],
+              *args) -> None:
+    """
+    Call func(item, *args) for each item once func has returned for each of the items it depends on, running independent items on a bounded thread pool.
+    Dependencies which are not among the given items are ignored. The log records of each call are emitted in item order.
+    """
+    waiting = dict((item, set(dependency for dependency in dependencies(item) if dependency in items and dependency != item)) for item in items)
+    dependents: typing.Dict[T, typing.List[T]] = dict((item, []) for item in items)
+
+    for item, item_dependencies in waiting.items():
+        for dependency in item_dependencies:
+            dependents[dependency].append(item)
+
+    order = get_topological_order(items, waiting)
+
+    if max_workers <= 1 or len(items) <= 1:
+        for item in order:
+            func(item, *args)
+
+        return
+
+    results: typing.Dict[T, concurrent.futures.Future] = dict((item, concurrent.futures.Future()) for item in items)
+    lock = threading.Lock()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        def run(item: T) -> None:
+            # noinspection PyBroadException
+            try:
+                results[item].set_result(log_buffer.capture(func, item, *args))
+            except BaseException as ex:  # pylint: disable=broad-except
+                results[item].set_exception(ex)
+
+            # dependents are started even when func raised, the same as if the items had been processed in order
+            with lock:
+                ready = []
+
+                for dependent in dependents[item]:
+                    waiting[dependent].discard(item)
+
+                    if not waiting[dependent]:
+                        ready.append(dependent)
+
+            for dependent in ready:
+                executor.submit(run, dependent)
+
+        # taken before any item runs, since finished items start their dependents themselves
+        ready = [item for item in order if not waiting[item]]
+
+        for item in ready:
+            executor.submit(run, item)
+
+        # every item has to finish before an error is raised, as leaving the block shuts down the pool the dependents are submitted to
+        replay_in_order([results[item] for item in items])
+
+
+def get_topological_order(items: typing.Sequence[T], dependencies: typing.Dict[T, typing.Set[T]]) -> typing.List[T]:
+    """Return the given items ordered so each item follows its dependencies, keeping the given order otherwise. Raises ValueError on a cycle."""
+    order: typing.List[T] = []
+    remaining = list(items)
+
+    while remaining:
+        done = set(order)
+        ready = [item for item in remaining if dependencies[item] <= done]
+
+        if not ready:
+            raise ValueError(f'dependency cycle between: {", ".join(str(item) for item in remaining)}')
+
+        order.extend(ready)
+        remaining = [item for item in remaining if item not in ready]
+
+    return order
@@ -0,0 +1,48 @@
+"""Inventory of the tagged resources in a region, built from the Resource Groups Tagging API."""
+import re
+import typing
+
+import botocore.client
+
+
+class TagInventory:
+    """
+    ARNs and tags of the tagged resources in a region, listed with paginated GetResources calls.
+    The Tagging API does not return resources which have never been tagged, so the inventory can only show that a resource type is absent
+    when every resource of that type is expected to carry tags.
+    """
+    def __init__(self, client: botocore.client.BaseClient, resource_types: typing.Iterable[str]):
+        self.client = client
+        self.resource_types = sorted(set(resource_types))
+        self.resources: typing.Dict[str, typing.Dict[str, str]] = {}
+        self._types: typing.Set[str] = set()
+
+    def load(self) -> None:
+        # GetResources accepts at most 100 resource type filters per request
+        for offset in range(0, len(self.resource_types), 100):
+            paginator = self.client.get_paginator('get_resources')
+
+            for page in paginator.paginate(ResourceTypeFilters=self.resource_types[offset:offset + 100], ResourcesPerPage=100):
+                for resource in page['ResourceTagMappingList']:
+                    self.add(resource['ResourceARN'], dict((tag['Key'], tag['Value']) for tag in resource.get('Tags', [])))
+
+    def add(self, arn: str, tags: typing.Dict[str, str]) -> None:
+        self.resources[arn] = tags
+        self._types.update(self.get_resource_types(arn))
+
+    def contains(self, resource_types: typing.Iterable[str]) -> bool:
+        """Return True if the inventory holds any resource of the given types, using the same 'service' or 'service:type' syntax as GetResources."""
+        return any(resource_type in self._types for resource_type in resource_types)
+
+    @staticmethod
+    def get_resource_types(arn: str) -> typing.Tuple[str, ...]:
+        """Return the service and 'service:type' strings matching the given ARN, such as 'ec2' and 'ec2:instance'."""
+        parts = arn.split(':', 5)
+        service = parts[2]
+        resource = parts[5] if len(parts) > 5 else ''
+
+        # the type ends at the first separator, since the rest may hold either, such as 'log-group:/aws/lambda/name'
+        if ':' in resource or '/' in resource:
+            return service, f"{service}:{re.split('[:/]', resource, maxsplit=1)[0]}"
+
+        return (service,)
@@ -0,0 +1,642 @@
+"""Storage for the first-seen time of resources which do not report their creation time, and for run checkpoints."""
+import abc
+import concurrent.futures
+import datetime
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+import time
+import typing
+
+from boto3.dynamodb.conditions import Attr
+import boto3.resources.base
+import botocore.exceptions
+import dateutil.tz
+
+from .clients import DEFAULT_MAX_ATTEMPTS
+from .scheduler import Unit
+
+logger = logging.getLogger('cleanup')
+
+DEFAULT_SQLITE_PATH = 'terminator.sqlite'
+DEFAULT_MAX_PENDING = 1000
+# Items expire this long after the resource they track was last seen, which is well beyond the longest age limit of any terminator.
+# The expiry of items which are read is pushed back once less than half of this is left, so items only expire once their resource is gone.
+DEFAULT_RETENTION = datetime.timedelta(days=30)
+
+
+def batches(items: typing.Iterable[typing.Any], size: int) -> typing.Iterator[typing.List[typing.Any]]:
+    items = iter(items)
+
+    while True:
+        batch = list(itertools.islice(items, size))
+
+        if not batch:
+            return
+
+        yield batch
+
+
+def utc_now() -> str:
+    return datetime.datetime.utcnow().replace(tzinfo=dateutil.tz.tzutc(), microsecond=0).isoformat()
+
+
+def get_expires_at(retention: datetime.timedelta) -> int:
+    """Return the expiry time of an item written now, as the epoch seconds used by DynamoDB TTL."""
+    return int(time.time() + retention.total_seconds())
+
+
+def needs_refresh(expires_at: typing.Optional[typing.Any], retention: datetime.timedelta) -> bool:
+    return expires_at is None or int(expires_at) - time.time() < retention.total_seconds() / 2
+
+
+class KeyValueBackend(abc.ABC):
+    """Storage backend of the key/value store. Values are the ISO 8601 created times of the keys."""
+    retention = DEFAULT_RETENTION
+
+    @abc.abstractmethod
+    def initialize(self) -> None:
+        """Deferred initialization of the storage, which is called before each use and must be cheap once done."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> typing.Optional[str]:
+        pass
+
+    @abc.abstractmethod
+    def get_many(self, keys: typing.Iterable[str]) -> typing.Dict[str, str]:
+        """Return the value of each of the given keys which exists."""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store the given key, unless it already exists."""
+
+    @abc.abstractmethod
+    def set_many(self, values: typing.Dict[str, str]) -> None:
+        """Store each of the given keys which does not already exist."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def get_checkpoint(self, key: str) -> typing.Optional[typing.List[Unit]]:
+        """Return the units of work saved by an earlier run, if any."""
+
+    @abc.abstractmethod
+    def set_checkpoint(self, key: str, units: typing.List[Unit]) -> None:
+        """Save the units of work left over by a run. Checkpoints are only removed by delete() or a forced purge."""
+
+    @abc.abstractmethod
+    def purge(self, check: bool, force: bool, concurrency: int) -> int:
+        """Delete the expired items, or every item when forced, returning the number of items purged. Items written without an expiry are given one."""
+
+
+class DynamoDbBackend(KeyValueBackend):
+    """ DynamoDB data store for the AWS terminator """
+    primary_key = 'id'
+
+    def __init__(self, domain_name: typing.Optional[str], aws_region: typing.Optional[str],
+                 resource_factory: typing.Callable[[str, typing.Optional[str]], boto3.resources.base.ServiceResource]):
+        self.ddb = None
+        self.domain_name = domain_name
+        self.aws_region = aws_region
+        self.resource_factory = resource_factory
+        self.table = None
+        self.initialized = False
+        self._lock = threading.Lock()
+
+    def initialize(self) -> None:
+        """Deferred initialization of the DynamoDB database."""
+        with self._lock:
+            if self.initialized:
+                return
+
+            self.ddb = self.resource_factory('dynamodb', self.aws_region)
+
+            try:
+                self.table = self.ddb.Table(self.domain_name)
+                if self.table.table_status == 'DELETING':
+                    self.table.wait_until_not_exists()
+                    self.create_table()
+            except botocore.exceptions.ClientError as ex:
+                if ex.response['Error']['Code'] == 'ResourceNotFoundException':
+                    self.create_table()
+                else:
+                    raise ex
+
+            self.initialized = True
+
+    def get(self, key: str) -> typing.Optional[str]:
+        self.initialize()
+
+        item = self.table.get_item(
+            Key={self.primary_key: key},
+            ProjectionExpression='created_time',
+        ).get('Item', {})
+
+        return item.get('created_time')
+
+    def get_many(self, keys: typing.Iterable[str]) -> typing.Dict[str, str]:
+        """Return the created time of each of the given keys which exists, using BatchGetItem requests of up to 100 keys."""
+        self.initialize()
+
+        values: typing.Dict[str, str] = {}
+        refresh: typing.List[str] = []
+
+        for chunk in batches(dict.fromkeys(keys), 100):
+            request = {
+                self.domain_name: {
+                    'Keys': [{self.primary_key: key} for key in chunk],
+                    'ProjectionExpression': f'{self.primary_key}, created_time, expires_at',
+                },
+            }
+
+            for attempt in itertools.count(1):
+                response = self.ddb.batch_get_item(RequestItems=request)
+
+                for item in response['Responses'].get(self.domain_name, []):
+                    values[item[self.primary_key]] = item.get('created_time')
+
+                    if item.get('created_time') and needs_refresh(item.get('expires_at'), self.retention):
+                        refresh.append(item[self.primary_key])
+
+                request = response.get('UnprocessedKeys')
+
+                if not request:
+                    break
+
+                # give up like botocore does on a throttled request, rather than until the deadline, and let the caller skip the keys
+                if attempt >= self.max_attempts:
+                    raise RuntimeError(f'BatchGetItem left {len(request[self.domain_name]["Keys"])} keys unprocessed after {attempt} attempts')
+
+                time.sleep(min(2 ** (attempt - 1) * 0.05, 1.0))
+
+        if refresh:
+            # pushing back the expiry is best effort, and must not keep the caller from using what was read
+            try:
+                self.refresh_many(refresh)
+            except Exception:  # pylint: disable=broad-except
+                from . import log_exception  # pylint: disable=import-outside-toplevel,cyclic-import
+
+                log_exception('exception refreshing the expiry of %d database items', len(refresh))
+
+        return values
+
+    def refresh_many(self, keys: typing.List[str]) -> None:
+        """
+        Push back the expiry of the given keys which still exist, using conditional TransactWriteItems requests of up to 25 keys.
+        If a transaction is cancelled, because one of the keys was deleted since it was read, its keys are updated one at a time.
+        """
+        expires_at = get_expires_at(self.retention)
+
+        for chunk in batches(keys, 25):
+            try:
+                self.ddb.meta.client.transact_write_items(TransactItems=[{
+                    'Update': {
+                        'TableName': self.domain_name,
+                        'Key': {self.primary_key: key},
+                        'UpdateExpression': 'SET expires_at = :expires_at',
+                        # Don't write back an entry deleted in the meantime
+                        'ConditionExpression': 'attribute_exists(#key)',
+                        'ExpressionAttributeNames': {'#key': self.primary_key},
+                        'ExpressionAttributeValues': {':expires_at': expires_at},
+                    },
+                } for key in chunk])
+            except botocore.exceptions.ClientError as ex:
+                if ex.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+
+                for key in chunk:
+                    self.set_expires_at(key, expires_at)
+
+    @property
+    def max_attempts(self) -> int:
+        """The number of attempts botocore makes at a throttled request, which also bounds the attempts at reading unprocessed keys."""
+        retries = self.ddb.meta.client.meta.config.retries or {}
+
+        return retries.get('total_max_attempts') or retries.get('max_attempts') or DEFAULT_MAX_ATTEMPTS
+
+    def set_expires_at(self, key: str, expires_at: int) -> None:
+        """Set the expiry of an existing item."""
+        try:
+            self.table.update_item(
+                Key={self.primary_key: key},
+                UpdateExpression='SET expires_at = :expires_at',
+                ConditionExpression='attribute_exists(#key)',
+                ExpressionAttributeNames={'#key': self.primary_key},
+                ExpressionAttributeValues={':expires_at': expires_at},
+            )
+        except botocore.exceptions.ClientError as ex:
+            # the item was deleted in the meantime
+            if ex.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    def set_many(self, values: typing.Dict[str, str]) -> None:
+        """
+        Store the given keys unless they already exist, using conditional TransactWriteItems requests of up to 25 keys.
+        If a transaction is cancelled, because another run stored one of the keys first, its keys are stored one at a time.
+        """
+        self.initialize()
+
+        for chunk in batches(values.items(), 25):
+            try:
+                self.ddb.meta.client.transact_write_items(TransactItems=[{
+                    'Put': {
+                        'TableName': self.domain_name,
+                        'Item': {
+                            self.primary_key: key,
+                            'created_time': value,
+                            'expires_at': get_expires_at(self.retention),
+                        },
+                        # Don't replace an existing entry
+                        'ConditionExpression': 'attribute_not_exists(#key)',
+                        'ExpressionAttributeNames': {'#key': self.primary_key},
+                    },
+                } for key, value in chunk])
+            except botocore.exceptions.ClientError as ex:
+                if ex.response['Error']['Code'] != 'TransactionCanceledException':
+                    raise
+
+                for key, value in chunk:
+                    self.set(key, value)
+
+    def set(self, key: str, value: str) -> None:
+        self.initialize()
+
+        # Don't replace an existing entry
+        expression = Attr(self.primary_key).ne(key)
+
+        attributes = {
+            self.primary_key: key,
+            'created_time': value,
+            'expires_at': get_expires_at(self.retention),
+        }
+
+        try:
+            self.table.put_item(
+                Item=attributes,
+                ConditionExpression=expression,
+            )
+        except botocore.exceptions.ClientError as ex:
+            if ex.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    def get_checkpoint(self, key: str) -> typing.Optional[typing.List[Unit]]:
+        self.initialize()
+
+        item = self.table.get_item(
+            Key={self.primary_key: key},
+            ConsistentRead=True,
+        ).get('Item')
+
+        if not item:
+            return None
+
+        return [(unit[0], unit[1]) for unit in json.loads(item['pending'])]
+
+    def set_checkpoint(self, key: str, units: typing.List[Unit]) -> None:
+        self.initialize()
+
+        self.table.put_item(
+            Item={
+                self.primary_key: key,
+                'pending': json.dumps(units),
+                'updated_time': utc_now(),
+                'expires_at': get_expires_at(self.retention),
+            },
+        )
+
+    def create_table(self) -> None:
+        """Creates a new DynamoDB database."""
+        self.table = self.ddb.create_table(
+            TableName=self.domain_name,
+            AttributeDefinitions=[{
+                'AttributeName': self.primary_key,
+                'AttributeType': 'S'
+            }],
+            KeySchema=[{
+                'AttributeName': self.primary_key,
+                'KeyType': 'HASH'
+            }],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        self.table.wait_until_exists()
+        self.enable_ttl(check=False)
+
+    def enable_ttl(self, check: bool) -> None:
+        """Have DynamoDB delete items once their expires_at time has passed."""
+        client = self.ddb.meta.client
+        status = client.describe_time_to_live(TableName=self.domain_name)['TimeToLiveDescription']['TimeToLiveStatus']
+
+        if status in ('ENABLED', 'ENABLING'):
+            return
+
+        if check:
+            logger.info('[Running in check mode] Would have enabled TTL on table %s', self.domain_name)
+            return
+
+        client.update_time_to_live(TableName=self.domain_name, TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expires_at'})
+        logger.info('enabled TTL on table %s', self.domain_name)
+
+    def delete(self, key: str) -> None:
+        self.initialize()
+
+        self.table.delete_item(
+            Key={
+                self.primary_key: key
+            },
+        )
+
+    def purge(self, check: bool, force: bool, concurrency: int) -> int:
+        """
+        Scan the table to completion using one parallel scan segment per worker thread.
+        Unless forced, only items without an expiry, written before TTL was enabled, and expired items which DynamoDB has yet to delete are returned.
+        """
+        self.initialize()
+
+        scan_options = {}
+
+        if not force:
+            self.enable_ttl(check)
+            scan_options['FilterExpression'] = Attr('expires_at').not_exists() | Attr('expires_at').lt(int(time.time()))
+
+        scan_options['ProjectionExpression'] = f'{self.primary_key}, expires_at'
+        scan_options['ConsistentRead'] = False
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(self.purge_segment, segment, concurrency, scan_options, check, force) for segment in range(concurrency)]
+            counts = [future.result() for future in futures]
+
+        backfilled = sum(count[1] for count in counts)
+
+        if backfilled:
+            logger.info('%s expiry of %d database items', 'checked' if check else 'backfilled', backfilled)
+
+        return sum(count[0] for count in counts)
+
+    def purge_segment(self, segment: int, segments: int, scan_options: typing.Dict[str, typing.Any], check: bool, force: bool) -> typing.Tuple[int, int]:
+        scan_options = dict(scan_options, Segment=segment, TotalSegments=segments)
+        status = 'checked' if check else 'purged'
+        count = 0
+        backfilled = 0
+
+        with self.table.batch_writer() as batch:
+            while True:
+                result = self.table.scan(**scan_options)
+
+                for item in result.get('Items', []):
+                    if not force and 'expires_at' not in item:
+                        if not check:
+                            self.set_expires_at(item[self.primary_key], get_expires_at(self.retention))
+
+                        backfilled += 1
+                        continue
+
+                    if not check:
+                        batch.delete_item(Key={self.primary_key: item[self.primary_key]})
+
+                    logger.info('%s database item: %s', status, item[self.primary_key])
+                    count += 1
+
+                if 'LastEvaluatedKey' not in result:
+                    break
+
+                scan_options['ExclusiveStartKey'] = result['LastEvaluatedKey']
+
+        return count, backfilled
+
+
+class SqliteBackend(KeyValueBackend):
+    """
+    Local SQLite data store, for running the terminator against stand-in AWS services without a DynamoDB table.
+    The database uses WAL mode, so the worker threads, which each use their own connection, can read while another thread writes.
+    """
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH):
+        self.path = path
+        self.initialized = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA synchronous=NORMAL')
+
+        return connection
+
+    def initialize(self) -> None:
+        with self._lock:
+            if self.initialized:
+                return
+
+            connection = self.connection
+            connection.execute('PRAGMA journal_mode=WAL')
+
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS items (id TEXT PRIMARY KEY, created_time TEXT NOT NULL, expires_at INTEGER) WITHOUT ROWID')
+
+                # databases created before items had an expiry
+                if 'expires_at' not in [row[1] for row in connection.execute('PRAGMA table_info(items)')]:
+                    connection.execute('ALTER TABLE items ADD COLUMN expires_at INTEGER')
+
+                connection.execute('CREATE INDEX IF NOT EXISTS items_created_time ON items (created_time)')
+                connection.execute('CREATE INDEX IF NOT EXISTS items_expires_at ON items (expires_at)')
+                connection.execute('CREATE TABLE IF NOT EXISTS checkpoints (id TEXT PRIMARY KEY, pending TEXT NOT NULL, updated_time TEXT NOT NULL)')
+
+            self.initialized = True
+
+    def get(self, key: str) -> typing.Optional[str]:
+        self.initialize()
+
+        row = self.connection.execute('SELECT created_time FROM items WHERE id = ?', (key,)).fetchone()
+
+        return row[0] if row else None
+
+    def get_many(self, keys: typing.Iterable[str]) -> typing.Dict[str, str]:
+        self.initialize()
+
+        values: typing.Dict[str, str] = {}
+        refresh: typing.List[str] = []
+
+        # stay well under the limit on the number of parameters in a statement
+        for chunk in batches(dict.fromkeys(keys), 500):
+            for key, created_time, expires_at in self.connection.execute(
+                    f'SELECT id, created_time, expires_at FROM items WHERE id IN ({", ".join("?" * len(chunk))})', chunk):
+                values[key] = created_time
+
+                if needs_refresh(expires_at, self.retention):
+                    refresh.append(key)
+
+        if refresh:
+            with self.connection as connection:
+                connection.executemany('UPDATE items SET expires_at = ? WHERE id = ?', ((get_expires_at(self.retention), key) for key in refresh))
+
+        return values
+
+    def set(self, key: str, value: str) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, values: typing.Dict[str, str]) -> None:
+        self.initialize()
+
+        with self.connection as connection:
+            connection.executemany('INSERT OR IGNORE INTO items (id, created_time, expires_at) VALUES (?, ?, ?)',
+                                   ((key, value, get_expires_at(self.retention)) for key, value in values.items()))
+
+    def delete(self, key: str) -> None:
+        self.initialize()
+
+        with self.connection as connection:
+            connection.execute('DELETE FROM items WHERE id = ?', (key,))
+            connection.execute('DELETE FROM checkpoints WHERE id = ?', (key,))
+
+    def get_checkpoint(self, key: str) -> typing.Optional[typing.List[Unit]]:
+        self.initialize()
+
+        row = self.connection.execute('SELECT pending FROM checkpoints WHERE id = ?', (key,)).fetchone()
+
+        if not row:
+            return None
+
+        return [(unit[0], unit[1]) for unit in json.loads(row[0])]
+
+    def set_checkpoint(self, key: str, units: typing.List[Unit]) -> None:
+        self.initialize()
+
+        with self.connection as connection:
+            connection.execute('INSERT OR REPLACE INTO checkpoints (id, pending, updated_time) VALUES (?, ?, ?)', (key, json.dumps(units), utc_now()))
+
+    def purge(self, check: bool, force: bool, concurrency: int) -> int:
+        self.initialize()
+
+        status = 'checked' if check else 'purged'
+
+        with self.connection as connection:
+            if force:
+                keys = [row[0] for row in connection.execute('SELECT id FROM items')]
+                keys += [row[0] for row in connection.execute('SELECT id FROM checkpoints')]
+            else:
+                keys = [row[0] for row in connection.execute('SELECT id FROM items WHERE expires_at < ?', (int(time.time()),))]
+
+                if not check:
+                    connection.execute('UPDATE items SET expires_at = ? WHERE expires_at IS NULL', (get_expires_at(self.retention),))
+
+            for key in keys:
+                logger.info('%s database item: %s', status, key)
+
+            if not check:
+                connection.executemany('DELETE FROM items WHERE id = ?', ((key,) for key in keys))
+                connection.executemany('DELETE FROM checkpoints WHERE id = ?', ((key,) for key in keys))
+
+        return len(keys)
+
+
+class KeyValueStore:
+    """
+    Key/value store for the AWS terminator, which keeps the first-seen time of resources in the configured backend.
+    Values read or written during a run are cached, so repeated lookups of the same key are served locally.
+    New keys are buffered and written to the backend in batches by flush(), which is called at the end of each resource type and run,
+    and whenever the buffer fills up.
+    """
+    def __init__(self, backend: typing.Optional[KeyValueBackend] = None, max_pending: int = DEFAULT_MAX_PENDING):
+        self.backend = backend
+        self.max_pending = max_pending
+        self._cache: typing.Dict[str, typing.Optional[str]] = {}
+        self._pending: typing.Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, backend: KeyValueBackend) -> None:
+        """Use the given backend, discarding anything cached from earlier runs, which other runs may since have changed."""
+        self.flush()
+
+        with self._lock:
+            self.backend = backend
+            self._cache.clear()
+
+    def initialize(self) -> None:
+        self.backend.initialize()
+
+    def get(self, key: str) -> typing.Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: typing.Iterable[str]) -> typing.Dict[str, str]:
+        keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            missing = [key for key in keys if key not in self._cache]
+
+        if missing:
+            values = self.backend.get_many(missing)
+
+            with self._lock:
+                for key in missing:
+                    # a value buffered by another thread since the lookup started takes precedence
+                    self._cache.setdefault(key, values.get(key))
+
+        with self._lock:
+            return dict((key, self._cache[key]) for key in keys if self._cache.get(key) is not None)
+
+    def set(self, key: str, value: str) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, values: typing.Dict[str, str]) -> None:
+        """Buffer the given keys unless they are already known to exist."""
+        with self._lock:
+            for key, value in values.items():
+                if self._cache.get(key) is None:
+                    self._cache[key] = value
+                    self._pending[key] = value
+
+            full = len(self._pending) >= self.max_pending
+
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered keys to the backend. If the write fails, the keys are buffered again for the next flush before the error is raised."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+
+        if not pending:
+            return
+
+        try:
+            self.backend.set_many(pending)
+        except Exception:
+            with self._lock:
+                for key, value in pending.items():
+                    # keys buffered again since take precedence, and deleted keys stay deleted
+                    if key not in self._pending and self._cache.get(key) is not None:
+                        self._pending[key] = value
+
+            raise
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._cache[key] = None
+            self._pending.pop(key, None)
+
+        self.backend.delete(key)
+
+    def get_checkpoint(self, key: str) -> typing.Optional[typing.List[Unit]]:
+        return self.backend.get_checkpoint(key)
+
+    def set_checkpoint(self, key: str, units: typing.List[Unit]) -> None:
+        self.backend.set_checkpoint(key, units)
+
+    def purge(self, check: bool, force: bool, concurrency: int) -> int:
+        self.flush()
+
+        count = self.backend.purge(check, force, concurrency)
+
+        if not check:
+            with self._lock:
+                self._cache.clear()
+
+        return count
@@ -0,0 +1,139 @@
+"""
+Terminator type names with the module defining each type and the boto3 service it cleans up.
+Generated by generate_manifest.py, do not edit. Run `make manifest` after adding, renaming or removing a terminator class.
+"""
+import typing
+
+TERMINATOR_TYPES: typing.Dict[str, typing.Tuple[str, str]] = {
+    'ACMCertificate': ('security_services', 'acm'),
+    'ApiGatewayRestApi': ('networking', 'apigateway'),
+    'AutoScalingGroup': ('compute', 'autoscaling'),
+    'BackupPlan': ('storage_services', 'backup'),
+    'BackupSelection': ('storage_services', 'backup'),
+    'BackupVault': ('storage_services', 'backup'),
+    'CloudFrontCachePolicy': ('paas', 'cloudfront'),
+    'CloudFrontDistribution': ('paas', 'cloudfront'),
+    'CloudFrontOriginAccessIdentity': ('paas', 'cloudfront'),
+    'CloudFrontOriginRequestPolicy': ('paas', 'cloudfront'),
+    'CloudFrontStreamingDistribution': ('paas', 'cloudfront'),
+    'CloudWatchAlarm': ('application_services', 'cloudwatch'),
+    'CloudWatchLogGroup': ('application_services', 'logs'),
+    'Cloudformation': ('application_services', 'cloudformation'),
+    'CloudfrontWafV2IpSet': ('application_security', 'wafv2'),
+    'CloudfrontWafV2RuleGroup': ('application_security', 'wafv2'),
+    'CloudfrontWafV2WebAcl': ('application_security', 'wafv2'),
+    'CodeBuild': ('application_services', 'codebuild'),
+    'CodeCommitRepository': ('application_services', 'codecommit'),
+    'CodePipeline': ('application_services', 'codepipeline'),
+    'DhcpOptionsSet': ('networking', 'ec2'),
+    'DmsSubnetGroup': ('data_services', 'dms'),
+    'DynamoDb': ('application_services', 'dynamodb'),
+    'Ec2CustomerGateway': ('networking', 'ec2'),
+    'Ec2EgressInternetGateway': ('networking', 'ec2'),
+    'Ec2Eip': ('networking', 'ec2'),
+    'Ec2Eni': ('networking', 'ec2'),
+    'Ec2Image': ('compute', 'ec2'),
+    'Ec2Instance': ('compute', 'ec2'),
+    'Ec2InternetGateway': ('networking', 'ec2'),
+    'Ec2KeyPair': ('compute', 'ec2'),
+    'Ec2LoadBalancer': ('compute', 'elb'),
+    'Ec2NatGateway': ('networking', 'ec2'),
+    'Ec2NetworkAcl': ('networking', 'ec2'),
+    'Ec2RouteTable': ('networking', 'ec2'),
+    'Ec2SecurityGroup': ('networking', 'ec2'),
+    'Ec2Snapshot': ('compute', 'ec2'),
+    'Ec2SpotInstanceRequest': ('compute', 'ec2'),
+    'Ec2Subnet': ('networking', 'ec2'),
+    'Ec2TransitGateway': ('compute', 'ec2'),
+    'Ec2TransitGatewayAttachment': ('compute', 'ec2'),
+    'Ec2Volume': ('compute', 'ec2'),
+    'Ec2Vpc': ('networking', 'ec2'),
+    'Ec2VpcEndpoint': ('networking', 'ec2'),
+    'Ec2VpcPeer': ('networking', 'ec2'),
+    'Ec2VpnConnection': ('networking', 'ec2'),
+    'Ec2VpnGateway': ('networking', 'ec2'),
+    'EcrRepository': ('compute', 'ecr'),
+    'Ecs': ('paas', 'ecs'),
+    'EcsCluster': ('paas', 'ecs'),
+    'Efs': ('application_services', 'efs'),
+    'EksCluster': ('compute', 'eks'),
+    'EksFargateProfile': ('compute', 'eks'),
+    'EksNodegroup': ('compute', 'eks'),
+    'ElasticBeanstalk': ('compute', 'elasticbeanstalk'),
+    'ElasticLoadBalancing': ('compute', 'elb'),
+    'ElasticLoadBalancingv2': ('compute', 'elbv2'),
+    'Elasticache': ('data_services', 'elasticache'),
+    'Elbv2TargetGroups': ('compute', 'elbv2'),
+    'Glacier': ('data_services', 'glacier'),
+    'GlueConnection': ('data_services', 'glue'),
+    'GlueCrawler': ('data_services', 'glue'),
+    'GlueJob': ('data_services', 'glue'),
+    'IAMSamlProvider': ('security_services', 'iam'),
+    'IamInstanceProfile': ('security_services', 'iam'),
+    'IamRole': ('security_services', 'iam'),
+    'IamServerCertificate': ('security_services', 'iam'),
+    'InspectorAssessmentTarget': ('application_security', 'inspector'),
+    'InspectorAssessmentTemplate': ('application_security', 'inspector'),
+    'KMSKey': ('security_services', 'kms'),
+    'KafkaCluster': ('data_services', 'kafka'),
+    'KafkaConfiguration': ('data_services', 'kafka'),
+    'KinesisStream': ('application_services', 'kinesis'),
+    'LambdaEventSourceMapping': ('paas', 'lambda'),
+    'LambdaFunction': ('compute', 'lambda'),
+    'LambdaLayers': ('paas', 'lambda'),
+    'LaunchConfiguration': ('compute', 'autoscaling'),
+    'LaunchTemplate': ('compute', 'ec2'),
+    'Lightsail': ('compute', 'lightsail'),
+    'LightsailInstanceSnapshot': ('compute', 'lightsail'),
+    'LightsailKeyPair': ('compute', 'lightsail'),
+    'LightsailStaticIp': ('compute', 'lightsail'),
+    'MemoryDBACLs': ('storage_services', 'memorydb'),
+    'MemoryDBClusters': ('storage_services', 'memorydb'),
+    'MemoryDBParameterGroups': ('storage_services', 'memorydb'),
+    'MemoryDBSnapshots': ('storage_services', 'memorydb'),
+    'MemoryDBSubnetGroups': ('storage_services', 'memorydb'),
+    'MemoryDBUsers': ('storage_services', 'memorydb'),
+    'MqBroker': ('application_services', 'mq'),
+    'NeptuneCluster': ('compute', 'neptune'),
+    'NeptuneSubnetGroup': ('compute', 'neptune'),
+    'NetworkFirewall': ('networking', 'network-firewall'),
+    'NetworkFirewallPolicy': ('networking', 'network-firewall'),
+    'NetworkFirewallRuleGroup': ('networking', 'network-firewall'),
+    'RdsDbCluster': ('data_services', 'rds'),
+    'RdsDbClusterParameterGroup': ('data_services', 'rds'),
+    'RdsDbClusterSnapshot': ('data_services', 'rds'),
+    'RdsDbInstance': ('data_services', 'rds'),
+    'RdsDbParameterGroup': ('data_services', 'rds'),
+    'RdsDbSnapshot': ('data_services', 'rds'),
+    'RdsOptionGroup': ('data_services', 'rds'),
+    'RedshiftCluster': ('data_services', 'redshift'),
+    'RedshiftSubnetGroup': ('data_services', 'redshift'),
+    'RegionalWafV2IpSet': ('application_security', 'wafv2'),
+    'RegionalWafV2RuleGroup': ('application_security', 'wafv2'),
+    'RegionalWafV2WebAcl': ('application_security', 'wafv2'),
+    'Route53HealthCheck': ('networking', 'route53'),
+    'Route53HostedZone': ('networking', 'route53'),
+    'S3AccessPoint': ('storage_services', 's3control'),
+    'S3AccessPointForObjectLambda': ('storage_services', 's3control'),
+    'S3Bucket': ('storage_services', 's3'),
+    'SSMBucketObjects': ('storage_services', 's3'),
+    'Secret': ('security_services', 'secretsmanager'),
+    'SesIdentity': ('application_services', 'ses'),
+    'SesReceiptRuleSet': ('application_services', 'ses'),
+    'Sns': ('application_services', 'sns'),
+    'SqsQueue': ('application_services', 'sqs'),
+    'SsmDocument': ('application_services', 'ssm'),
+    'SsmParameter': ('application_services', 'ssm'),
+    'SsmSession': ('application_services', 'ssm'),
+    'StepFunctions': ('application_services', 'stepfunctions'),
+    'WafByteMatchSet': ('application_security', 'waf'),
+    'WafGeoMatchSet': ('application_security', 'waf'),
+    'WafIpSet': ('application_security', 'waf'),
+    'WafRegexMatchSet': ('application_security', 'waf'),
+    'WafRegexPatternSet': ('application_security', 'waf'),
+    'WafRule': ('application_security', 'waf'),
+    'WafSizeConstraintSet': ('application_security', 'waf'),
+    'WafSqlInjectionMatchSet': ('application_security', 'waf'),
+    'WafWebAcl': ('application_security', 'waf'),
+    'WafXssMatchSet': ('application_security', 'waf'),
+}
@@ -0,0 +1,191 @@
+"""Timing, API call and outcome metrics per terminator type and region."""
+import collections
+import contextlib
+import json
+import logging
+import math
+import threading
+import time
+import typing
+
+import botocore.client
+
+from .scheduler import Unit
+
+logger = logging.getLogger('cleanup')
+
+T = typing.TypeVar('T')
+
+EMF_NAMESPACE = 'Terminator'
+
+
+class TypeMetrics:
+    """Metrics of one terminator type in one region. Only the thread processing the type updates them."""
+    def __init__(self) -> None:
+        self.elapsed = 0.0
+        self.discovery_time = 0.0
+        self.api_calls = 0
+        self.found = 0
+        self.statuses: typing.Counter[str] = collections.Counter()
+        self.errors = 0
+        self.terminate_times: typing.List[float] = []
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            'elapsed': round(self.elapsed, 3),
+            'discovery_time': round(self.discovery_time, 3),
+            'api_calls': self.api_calls,
+            'found': self.found,
+            'statuses': dict(sorted(self.statuses.items())),
+            'errors': self.errors,
+            'terminate_calls': len(self.terminate_times),
+            'terminate_p50': round(percentile(self.terminate_times, 50), 3),
+            'terminate_p90': round(percentile(self.terminate_times, 90), 3),
+            'terminate_p99': round(percentile(self.terminate_times, 99), 3),
+        }
+
+
+class Metrics:
+    """
+    Metrics of a run, per unit of work. The unit being processed is tracked per thread, so API calls made by the clients shared between units can be
+    attributed to the unit which made them. Calls made from threads started by a unit, such as the workers emptying an S3 bucket, are not counted.
+    """
+    def __init__(self) -> None:
+        self._units: typing.Dict[Unit, TypeMetrics] = {}
+        self._current = threading.local()
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._units.clear()
+
+    @contextlib.contextmanager
+    def measure(self, unit: Unit) -> typing.Iterator[TypeMetrics]:
+        """Attribute the metrics recorded by the current thread to the given unit, and time it."""
+        with self._lock:
+            metrics = self._units.setdefault(unit, TypeMetrics())
+
+        previous = getattr(self._current, 'metrics', None)
+        self._current.metrics = metrics
+        start = time.monotonic()
+
+        try:
+            yield metrics
+        finally:
+            metrics.elapsed += time.monotonic() - start
+            self._current.metrics = previous
+
+    @property
+    def current(self) -> typing.Optional[TypeMetrics]:
+        return getattr(self._current, 'metrics', None)
+
+    def register(self, client: botocore.client.BaseClient) -> None:
+        """Count the requests made by the given client, including retries."""
+        client.meta.events.register('before-send', self._count_api_call)
+
+    def _count_api_call(self, **_kwargs: typing.Any) -> None:
+        # returning None lets the request be sent
+        metrics = self.current
+
+        if metrics:
+            metrics.api_calls += 1
+
+    def discovered(self, create: typing.Callable[..., typing.Iterable[T]], *args: typing.Any) -> typing.Iterator[T]:
+        """
+        Count the instances returned by the given function as they are consumed, timing how long producing them takes.
+        Instances may be listed up front by the call or streamed by the iterable it returns, so both are timed.
+        """
+        metrics = self.current
+        start = time.monotonic()
+        instances = iter(create(*args))
+
+        while True:
+            try:
+                instance = next(instances)
+            except StopIteration:
+                return
+            finally:
+                if metrics:
+                    metrics.discovery_time += time.monotonic() - start
+
+            if metrics:
+                metrics.found += 1
+
+            yield instance
+
+            start = time.monotonic()
+
+    def ignored(self, count: int) -> None:
+        """Count resources which were found and ignored without creating terminators for them."""
+        metrics = self.current
+
+        if metrics:
+            metrics.found += count
+            metrics.statuses['ignored'] += count
+
+    def count(self, status: str, error: typing.Optional[Exception] = None) -> None:
+        metrics = self.current
+
+        if metrics:
+            metrics.statuses[status] += 1
+            metrics.errors += error is not None
+
+    def time_terminate(self, elapsed: float) -> None:
+        metrics = self.current
+
+        if metrics:
+            metrics.terminate_times.append(elapsed)
+
+    def summary(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        """Return the metrics of each unit, slowest first."""
+        with self._lock:
+            units = sorted(self._units.items(), key=lambda item: item[1].elapsed, reverse=True)
+
+        return [{'region': region, 'type': name, **metrics.to_dict()} for (region, name), metrics in units]
+
+    def log_summary(self) -> None:
+        for item in self.summary():
+            logger.info('metrics: %s', json.dumps(item, sort_keys=True))
+
+    def emit_emf(self) -> None:
+        """Print the metrics in the CloudWatch Embedded Metric Format, which CloudWatch Logs turns into metrics when written to the Lambda log."""
+        timestamp = int(time.time() * 1000)
+
+        for item in self.summary():
+            document = {
+                '_aws': {
+                    'Timestamp': timestamp,
+                    'CloudWatchMetrics': [{
+                        'Namespace': EMF_NAMESPACE,
+                        'Dimensions': [['Region', 'Type']],
+                        'Metrics': [
+                            {'Name': 'Duration', 'Unit': 'Seconds'},
+                            {'Name': 'DiscoveryDuration', 'Unit': 'Seconds'},
+                            {'Name': 'ApiCalls', 'Unit': 'Count'},
+                            {'Name': 'Found', 'Unit': 'Count'},
+                            {'Name': 'Errors', 'Unit': 'Count'},
+                        ],
+                    }],
+                },
+                'Region': item['region'] or 'global',
+                'Type': item['type'],
+                'Duration': item['elapsed'],
+                'DiscoveryDuration': item['discovery_time'],
+                'ApiCalls': item['api_calls'],
+                'Found': item['found'],
+                'Errors': item['errors'],
+                'Statuses': item['statuses'],
+            }
+
+            # EMF documents must be log lines of their own, without the prefix added by the logging handlers
+            print(json.dumps(document), flush=True)
+
+
+def percentile(values: typing.List[float], percent: float) -> float:
+    """Return the given percentile of the values using the nearest-rank method, or 0.0 if there are none."""
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
@@ -1,12 +1,14 @@
 import datetime
 import botocore
-from . import DbTerminator, Terminator, get_tag_dict_from_tag_list
+from . import DbTerminator, Filter, Terminator, get_tag_dict_from_tag_list, paginate
 
 
 class Route53HostedZone(DbTerminator):
+    is_global = True
+
     @staticmethod
-    def create():
-        return Terminator._create(Route53HostedZone, 'route53', lambda client: client.list_hosted_zones()['HostedZones'])
+    def create(context):
+        return Terminator._create_pages(context, Route53HostedZone, 'route53', lambda client: paginate(client, 'list_hosted_zones', 'HostedZones'))
 
     @property
     def id(self):
@@ -36,9 +38,11 @@ class Route53HostedZone(DbTerminator):
 
 
 class Route53HealthCheck(DbTerminator):
+    is_global = True
+
     @staticmethod
-    def create():
-        return Terminator._create(Route53HealthCheck, 'route53', lambda client: client.list_health_checks()['HealthChecks'])
+    def create(context):
+        return Terminator._create_pages(context, Route53HealthCheck, 'route53', lambda client: paginate(client, 'list_health_checks', 'HealthChecks'))
 
     @property
     def id(self):
@@ -53,9 +57,11 @@ class Route53HealthCheck(DbTerminator):
 
 
 class Ec2Eip(DbTerminator):
+    terminate_after = ('Ec2Instance', 'Ec2NatGateway')
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2Eip, 'ec2', lambda client: client.describe_addresses()['Addresses'])
+    def create(context):
+        return Terminator._create(context, Ec2Eip, 'ec2', lambda client: client.describe_addresses()['Addresses'])
 
     @property
     def id(self):
@@ -70,9 +76,11 @@ class Ec2Eip(DbTerminator):
 
 
 class Ec2CustomerGateway(DbTerminator):
+    terminate_after = ('Ec2VpnConnection',)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2CustomerGateway, 'ec2', lambda client: client.describe_customer_gateways()['CustomerGateways'])
+    def create(context):
+        return Terminator._create(context, Ec2CustomerGateway, 'ec2', lambda client: client.describe_customer_gateways()['CustomerGateways'])
 
     @property
     def age_limit(self):
@@ -91,9 +99,11 @@ class Ec2CustomerGateway(DbTerminator):
 
 
 class DhcpOptionsSet(DbTerminator):
+    terminate_after = ('Ec2Vpc',)
+
     @staticmethod
-    def create():
-        return Terminator._create(DhcpOptionsSet, 'ec2', lambda client: client.describe_dhcp_options()['DhcpOptions'])
+    def create(context):
+        return Terminator._create_pages(context, DhcpOptionsSet, 'ec2', lambda client: paginate(client, 'describe_dhcp_options', 'DhcpOptions'))
 
     @property
     def id(self):
@@ -112,9 +122,13 @@ class DhcpOptionsSet(DbTerminator):
 
 
 class Ec2Subnet(DbTerminator):
+    terminate_after = ('Ec2Instance', 'Ec2Eni', 'Ec2NatGateway', 'Ec2VpcEndpoint', 'Ec2TransitGatewayAttachment', 'ElasticLoadBalancing',
+                       'ElasticLoadBalancingv2', 'NetworkFirewall')
+    ignore_filters = (Filter(None, 'DefaultForAz', (True,)),)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2Subnet, 'ec2', lambda client: client.describe_subnets()['Subnets'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2Subnet, 'ec2', lambda client: paginate(client, 'describe_subnets', 'Subnets'))
 
     @property
     def age_limit(self):
@@ -128,22 +142,20 @@ class Ec2Subnet(DbTerminator):
     def name(self):
         return get_tag_dict_from_tag_list(self.instance.get('Tags')).get('Name')
 
-    @property
-    def ignore(self):
-        return self.instance['DefaultForAz']
-
     def terminate(self):
         self.client.delete_subnet(SubnetId=self.id)
 
 
 class Ec2InternetGateway(DbTerminator):
-    def __init__(self, client, instance):
+    terminate_after = ('Ec2Eip', 'Ec2NatGateway', 'Ec2RouteTable')
+
+    def __init__(self, client, instance, context):
         self._ignore = None
-        super().__init__(client, instance)
+        super().__init__(client, instance, context)
 
     @staticmethod
-    def create():
-        return Terminator._create(Ec2InternetGateway, 'ec2', lambda client: client.describe_internet_gateways()['InternetGateways'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2InternetGateway, 'ec2', lambda client: paginate(client, 'describe_internet_gateways', 'InternetGateways'))
 
     @property
     def age_limit(self):
@@ -175,10 +187,13 @@ class Ec2InternetGateway(DbTerminator):
 
 
 class Ec2EgressInternetGateway(DbTerminator):
+    terminate_after = ('Ec2RouteTable',)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2EgressInternetGateway, 'ec2',
-                                  lambda client: client.describe_egress_only_internet_gateways()['EgressOnlyInternetGateways'])
+    def create(context):
+        return Terminator._create_pages(
+            context, Ec2EgressInternetGateway, 'ec2',
+            lambda client: paginate(client, 'describe_egress_only_internet_gateways', 'EgressOnlyInternetGateways'))
 
     @property
     def id(self):
@@ -193,9 +208,11 @@ class Ec2EgressInternetGateway(DbTerminator):
 
 
 class Ec2NatGateway(DbTerminator):
+    terminate_after = ('Ec2Eni',)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2NatGateway, 'ec2', lambda client: client.describe_nat_gateways()['NatGateways'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2NatGateway, 'ec2', lambda client: paginate(client, 'describe_nat_gateways', 'NatGateways'))
 
     @property
     def id(self):
@@ -210,9 +227,12 @@ class Ec2NatGateway(DbTerminator):
 
 
 class Ec2NetworkAcl(DbTerminator):
+    terminate_after = ('Ec2Subnet',)
+    ignore_filters = (Filter(None, 'IsDefault', (True,)),)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2NetworkAcl, 'ec2', lambda client: client.describe_network_acls()['NetworkAcls'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2NetworkAcl, 'ec2', lambda client: paginate(client, 'describe_network_acls', 'NetworkAcls'))
 
     @property
     def id(self):
@@ -222,18 +242,16 @@ class Ec2NetworkAcl(DbTerminator):
     def name(self):
         return get_tag_dict_from_tag_list(self.instance.get('Tags')).get('Name')
 
-    @property
-    def ignore(self):
-        return self.instance['IsDefault']
-
     def terminate(self):
         self.client.delete_network_acl(NetworkAclId=self.id)
 
 
 class Ec2Eni(DbTerminator):
+    terminate_after = ('Ec2Instance',)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2Eni, 'ec2', lambda client: client.describe_network_interfaces()['NetworkInterfaces'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2Eni, 'ec2', lambda client: paginate(client, 'describe_network_interfaces', 'NetworkInterfaces'))
 
     @property
     def age_limit(self):
@@ -252,9 +270,15 @@ class Ec2Eni(DbTerminator):
 
 
 class Ec2RouteTable(DbTerminator):
+    terminate_after = ('Ec2Subnet', 'Ec2NatGateway', 'Ec2VpcEndpoint', 'Ec2VpcPeer')
+    # The main route table of a VPC cannot be deleted.
+    # See: https://docs.aws.amazon.com/vpc/latest/userguide/VPC_Route_Tables.html
+    # They will be removed when the VPC is deleted.
+    ignore_filters = (Filter(None, 'Associations[].Main', (True,)),)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2RouteTable, 'ec2', lambda client: client.describe_route_tables()['RouteTables'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2RouteTable, 'ec2', lambda client: paginate(client, 'describe_route_tables', 'RouteTables'))
 
     @property
     def name(self):
@@ -264,13 +288,6 @@ class Ec2RouteTable(DbTerminator):
     def id(self):
         return self.instance['RouteTableId']
 
-    @property
-    def ignore(self):
-        # The main route table of a VPC cannot be deleted.
-        # See: https://docs.aws.amazon.com/vpc/latest/userguide/VPC_Route_Tables.html
-        # They will be removed when the VPC is deleted.
-        return any(association['Main'] for association in self.instance.get('Associations', []))
-
     def terminate(self):
         for association in self.instance.get('Associations', []):
             self.client.disassociate_route_table(AssociationId=association['RouteTableAssociationId'])
@@ -279,9 +296,11 @@ class Ec2RouteTable(DbTerminator):
 
 
 class Ec2VpcEndpoint(Terminator):
+    batch_size = 100
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2VpcEndpoint, 'ec2', lambda client: client.describe_vpc_endpoints()['VpcEndpoints'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2VpcEndpoint, 'ec2', lambda client: paginate(client, 'describe_vpc_endpoints', 'VpcEndpoints'))
 
     @property
     def id(self):
@@ -298,11 +317,23 @@ class Ec2VpcEndpoint(Terminator):
     def terminate(self):
         self.client.delete_vpc_endpoints(VpcEndpointIds=[self.id])
 
+    @classmethod
+    def terminate_batch(cls, terminators):
+        terminators_by_id = dict((terminator.id, terminator) for terminator in terminators)
+        response = terminators[0].client.delete_vpc_endpoints(VpcEndpointIds=list(terminators_by_id))
+
+        return dict((terminators_by_id[item['ResourceId']], botocore.exceptions.ClientError({'Error': item['Error']}, 'DeleteVpcEndpoints'))
+                    for item in response.get('Unsuccessful', []) if item.get('ResourceId') in terminators_by_id)
+
 
 class Ec2Vpc(DbTerminator):
+    terminate_after = ('Ec2Subnet', 'Ec2RouteTable', 'Ec2NetworkAcl', 'Ec2SecurityGroup', 'Ec2InternetGateway', 'Ec2EgressInternetGateway', 'Ec2VpnGateway',
+                       'Ec2VpcEndpoint', 'Ec2VpcPeer', 'NetworkFirewall')
+    ignore_filters = (Filter(None, 'IsDefault', (True,)),)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2Vpc, 'ec2', lambda client: client.describe_vpcs()['Vpcs'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2Vpc, 'ec2', lambda client: paginate(client, 'describe_vpcs', 'Vpcs'))
 
     @property
     def age_limit(self):
@@ -316,18 +347,18 @@ class Ec2Vpc(DbTerminator):
     def name(self):
         return get_tag_dict_from_tag_list(self.instance.get('Tags')).get('Name')
 
-    @property
-    def ignore(self):
-        return self.instance['IsDefault']
-
     def terminate(self):
         self.client.delete_vpc(VpcId=self.id)
 
 
 class Ec2VpnConnection(DbTerminator):
+    # describe_vpn_connections will return results in deleting and deleted states.
+    # Ignore connections in these current states.
+    ignore_filters = (Filter(None, 'State', ('deleting', 'deleted')),)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2VpnConnection, 'ec2', lambda client: client.describe_vpn_connections()['VpnConnections'])
+    def create(context):
+        return Terminator._create(context, Ec2VpnConnection, 'ec2', lambda client: client.describe_vpn_connections()['VpnConnections'])
 
     @property
     def id(self):
@@ -337,20 +368,16 @@ class Ec2VpnConnection(DbTerminator):
     def name(self):
         return get_tag_dict_from_tag_list(self.instance.get('Tags')).get('Name')
 
-    @property
-    def ignore(self):
-        # describe_vpn_connections will return results in deleting and deleted states.
-        # Ignore connections in these current states.
-        return self.instance.get('State') in ['deleting', 'deleted']
-
     def terminate(self):
         self.client.delete_vpn_connection(VpnConnectionId=self.id)
 
 
 class Ec2VpnGateway(DbTerminator):
+    terminate_after = ('Ec2VpnConnection',)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2VpnGateway, 'ec2', lambda client: client.describe_vpn_gateways()['VpnGateways'])
+    def create(context):
+        return Terminator._create(context, Ec2VpnGateway, 'ec2', lambda client: client.describe_vpn_gateways()['VpnGateways'])
 
     @property
     def id(self):
@@ -371,9 +398,13 @@ class Ec2VpnGateway(DbTerminator):
 
 
 class Ec2VpcPeer(DbTerminator):
+    ignore_filters = (Filter(None, 'Status.Code', ('rejected', 'deleted')),)
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2VpcPeer, 'ec2', lambda client: client.describe_vpc_peering_connections()['VpcPeeringConnections'])
+    def create(context):
+        return Terminator._create_pages(
+            context, Ec2VpcPeer, 'ec2',
+            lambda client: paginate(client, 'describe_vpc_peering_connections', 'VpcPeeringConnections'))
 
     @property
     def id(self):
@@ -383,20 +414,17 @@ class Ec2VpcPeer(DbTerminator):
     def name(self):
         return get_tag_dict_from_tag_list(self.instance.get('Tags')).get('Name')
 
-    @property
-    def ignore(self):
-        if self.instance.get('Status', {}).get('Code') in ['rejected', 'deleted']:
-            return True
-        return False
-
     def terminate(self):
         self.client.delete_vpc_peering_connection(VpcPeeringConnectionId=self.id)
 
 
 class Ec2SecurityGroup(DbTerminator):
+    terminate_after = ('Ec2Instance', 'Ec2Eni', 'Ec2VpcEndpoint', 'ElasticLoadBalancing', 'ElasticLoadBalancingv2')
+    ignore_filters = (Filter(None, 'GroupName', ('default',)), Filter(None, 'GroupName', ('default_elb_',), prefix=True))
+
     @staticmethod
-    def create():
-        return Terminator._create(Ec2SecurityGroup, 'ec2', lambda client: client.describe_security_groups()['SecurityGroups'])
+    def create(context):
+        return Terminator._create_pages(context, Ec2SecurityGroup, 'ec2', lambda client: paginate(client, 'describe_security_groups', 'SecurityGroups'))
 
     @property
     def age_limit(self):
@@ -410,10 +438,6 @@ class Ec2SecurityGroup(DbTerminator):
     def name(self):
         return self.instance['GroupName']
 
-    @property
-    def ignore(self):
-        return self.name == 'default' or self.name.startswith('default_elb_')
-
     def revoke_sg_rules(self):
         # Revoke Egress rules
         self.client.revoke_security_group_egress(
@@ -435,8 +459,8 @@ class Ec2SecurityGroup(DbTerminator):
 
 class ApiGatewayRestApi(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(ApiGatewayRestApi, 'apigateway', lambda client: client.get_rest_apis()['items'])
+    def create(context):
+        return Terminator._create_pages(context, ApiGatewayRestApi, 'apigateway', lambda client: paginate(client, 'get_rest_apis', 'items'))
 
     @property
     def id(self):
@@ -455,9 +479,11 @@ class ApiGatewayRestApi(Terminator):
 
 
 class NetworkFirewall(DbTerminator):
+    tagged_resource_types = ('network-firewall:firewall',)
+
     @staticmethod
-    def create():
-        return Terminator._create(NetworkFirewall, 'network-firewall', lambda client: client.list_firewalls()['Firewalls'])
+    def create(context):
+        return Terminator._create_pages(context, NetworkFirewall, 'network-firewall', lambda client: paginate(client, 'list_firewalls', 'Firewalls'))
 
     @property
     def id(self):
@@ -473,9 +499,14 @@ class NetworkFirewall(DbTerminator):
 
 
 class NetworkFirewallPolicy(DbTerminator):
+    tagged_resource_types = ('network-firewall:firewall-policy',)
+    terminate_after = ('NetworkFirewall',)
+
     @staticmethod
-    def create():
-        return Terminator._create(NetworkFirewallPolicy, 'network-firewall', lambda client: client.list_firewall_policies()['FirewallPolicies'])
+    def create(context):
+        return Terminator._create_pages(
+            context, NetworkFirewallPolicy, 'network-firewall',
+            lambda client: paginate(client, 'list_firewall_policies', 'FirewallPolicies'))
 
     @property
     def age_limit(self):
@@ -496,9 +527,14 @@ class NetworkFirewallPolicy(DbTerminator):
 
 
 class NetworkFirewallRuleGroup(DbTerminator):
+    tagged_resource_types = ('network-firewall:stateful-rulegroup', 'network-firewall:stateless-rulegroup')
+    terminate_after = ('NetworkFirewallPolicy',)
+
     @staticmethod
-    def create():
-        return Terminator._create(NetworkFirewallRuleGroup, 'network-firewall', lambda client: client.list_rule_groups()['RuleGroups'])
+    def create(context):
+        return Terminator._create_pages(
+            context, NetworkFirewallRuleGroup, 'network-firewall',
+            lambda client: paginate(client, 'list_rule_groups', 'RuleGroups'))
 
     @property
     def age_limit(self):
@@ -1,12 +1,17 @@
 from datetime import datetime, timedelta
 
-from . import DbTerminator, Terminator
+from . import DbTerminator, Filter, Terminator, paginate
 
 
 class LambdaEventSourceMapping(DbTerminator):
+    # list_event_source_mappings does not have a parameter to filter results, so mappings changing state are left out of each page
+    discovery_filters = (Filter(None, 'State', ('Creating', 'Enabling', 'Disabling', 'Updating', 'Deleting'), exclude=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(LambdaEventSourceMapping, 'lambda', lambda client: client.list_event_source_mappings()['EventSourceMappings'])
+    def create(context):
+        return Terminator._create_pages(
+            context, LambdaEventSourceMapping, 'lambda',
+            lambda client: paginate(client, 'list_event_source_mappings', 'EventSourceMappings', filters=LambdaEventSourceMapping.discovery_filters))
 
     @property
     def id(self):
@@ -16,18 +21,14 @@ class LambdaEventSourceMapping(DbTerminator):
     def name(self):
         return self.id
 
-    @property
-    def ignore(self) -> bool:
-        return self.instance['State'] in ('Creating', 'Enabling', 'Disabling', 'Updating', 'Deleting')
-
     def terminate(self):
         self.client.delete_event_source_mapping(UUID=self.id)
 
 
 class LambdaLayers(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(LambdaLayers, 'lambda', lambda client: client.list_layers()['Layers'])
+    def create(context):
+        return Terminator._create_pages(context, LambdaLayers, 'lambda', lambda client: paginate(client, 'list_layers', 'Layers'))
 
     @property
     def id(self):
@@ -47,13 +48,14 @@ class LambdaLayers(Terminator):
 
 
 class CloudFrontDistribution(Terminator):
+    is_global = True
+
     @staticmethod
-    def create():
+    def create(context):
         def list_cloudfront_distributions(client):
-            result = client.get_paginator('list_distributions').paginate().build_full_result()
-            return result.get('DistributionList', {}).get('Items', [])
+            return paginate(client, 'list_distributions', 'DistributionList.Items')
 
-        return Terminator._create(CloudFrontDistribution, 'cloudfront', list_cloudfront_distributions)
+        return Terminator._create_pages(context, CloudFrontDistribution, 'cloudfront', list_cloudfront_distributions)
 
     @property
     def created_time(self):
@@ -83,13 +85,14 @@ class CloudFrontDistribution(Terminator):
 
 
 class CloudFrontStreamingDistribution(Terminator):
+    is_global = True
+
     @staticmethod
-    def create():
+    def create(context):
         def list_cloudfront_streaming_distributions(client):
-            result = client.get_paginator('list_streaming_distributions').paginate().build_full_result()
-            return result.get('StreamingDistributionList', {}).get('Items', [])
+            return paginate(client, 'list_streaming_distributions', 'StreamingDistributionList.Items')
 
-        return Terminator._create(CloudFrontStreamingDistribution, 'cloudfront', list_cloudfront_streaming_distributions)
+        return Terminator._create_pages(context, CloudFrontStreamingDistribution, 'cloudfront', list_cloudfront_streaming_distributions)
 
     @property
     def created_time(self):
@@ -120,16 +123,15 @@ class CloudFrontStreamingDistribution(Terminator):
 
 
 class CloudFrontOriginAccessIdentity(DbTerminator):
+    is_global = True
+
     @staticmethod
-    def create():
+    def create(context):
         def list_cloud_front_origin_access_identities(client):
-            identities = []
-            result = client.get_paginator('list_cloud_front_origin_access_identities').paginate().build_full_result()
-            for identity in result.get('CloudFrontOriginAccessIdentityList', {}).get('Items', []):
-                identities.append(client.get_cloud_front_origin_access_identity(Id=identity['Id']))
-            return identities
+            for items in paginate(client, 'list_cloud_front_origin_access_identities', 'CloudFrontOriginAccessIdentityList.Items'):
+                yield [client.get_cloud_front_origin_access_identity(Id=identity['Id']) for identity in items]
 
-        return Terminator._create(CloudFrontOriginAccessIdentity, 'cloudfront', list_cloud_front_origin_access_identities)
+        return Terminator._create_pages(context, CloudFrontOriginAccessIdentity, 'cloudfront', list_cloud_front_origin_access_identities)
 
     @property
     def id(self):
@@ -144,19 +146,16 @@ class CloudFrontOriginAccessIdentity(DbTerminator):
 
 
 class CloudFrontCachePolicy(DbTerminator):
+    is_global = True
+
     @staticmethod
-    def create():
+    def create(context):
         def list_cloud_front_cache_policies(client):
-            identities = []
-            result = client.list_cache_policies(
-                # Only retrieve the custom policies
-                Type='custom'
-            )
-            for identity in result.get('CachePolicyList', {}).get('Items', []):
-                identities.append(client.get_cache_policy(Id=identity['CachePolicy']['Id']))
-            return identities
+            # Only retrieve the custom policies
+            for identities in paginate(client, 'list_cache_policies', 'CachePolicyList.Items', Type='custom'):
+                yield [client.get_cache_policy(Id=identity['CachePolicy']['Id']) for identity in identities]
 
-        return Terminator._create(CloudFrontCachePolicy, 'cloudfront', list_cloud_front_cache_policies)
+        return Terminator._create_pages(context, CloudFrontCachePolicy, 'cloudfront', list_cloud_front_cache_policies)
 
     @property
     def id(self):
@@ -175,19 +174,16 @@ class CloudFrontCachePolicy(DbTerminator):
 
 
 class CloudFrontOriginRequestPolicy(DbTerminator):
+    is_global = True
+
     @staticmethod
-    def create():
+    def create(context):
         def list_cloud_front_origin_request_policies(client):
-            identities = []
-            result = client.list_origin_request_policies(
-                # Only retrieve the custom policies
-                Type='custom'
-            )
-            for identity in result.get('OriginRequestPolicyList', {}).get('Items', []):
-                identities.append(client.get_origin_request_policy(Id=identity['OriginRequestPolicy']['Id']))
-            return identities
+            # Only retrieve the custom policies
+            for identities in paginate(client, 'list_origin_request_policies', 'OriginRequestPolicyList.Items', Type='custom'):
+                yield [client.get_origin_request_policy(Id=identity['OriginRequestPolicy']['Id']) for identity in identities]
 
-        return Terminator._create(CloudFrontOriginRequestPolicy, 'cloudfront', list_cloud_front_origin_request_policies)
+        return Terminator._create_pages(context, CloudFrontOriginRequestPolicy, 'cloudfront', list_cloud_front_origin_request_policies)
 
     @property
     def id(self):
@@ -215,20 +211,14 @@ class Ecs(DbTerminator):
         return self.instance['clusterName']
 
     @staticmethod
-    def create():
+    def create(context):
         def _paginate_cluster_results(client):
-            names = client.get_paginator('list_clusters').paginate(
-                PaginationConfig={
-                    'PageSize': 100,
-                }
-            ).build_full_result()['clusterArns']
-
-            if not names:
-                return []
+            # describe_clusters accepts up to 100 clusters
+            for names in paginate(client, 'list_clusters', 'clusterArns', PaginationConfig={'PageSize': 100}):
+                if names:
+                    yield client.describe_clusters(clusters=names)['clusters']
 
-            return client.describe_clusters(clusters=names)['clusters']
-
-        return Terminator._create(Ecs, 'ecs', _paginate_cluster_results)
+        return Terminator._create_pages(context, Ecs, 'ecs', _paginate_cluster_results)
 
     def terminate(self):
         def _paginate_task_results(container_instance=None):
@@ -314,20 +304,14 @@ class EcsCluster(DbTerminator):
         return self.instance['clusterName']
 
     @staticmethod
-    def create():
+    def create(context):
         def _paginate_cluster_results(client):
-            names = client.get_paginator('list_clusters').paginate(
-                PaginationConfig={
-                    'PageSize': 100,
-                }
-            ).build_full_result()['clusterArns']
-
-            if not names:
-                return []
-
-            return client.describe_clusters(clusters=names)['clusters']
+            # describe_clusters accepts up to 100 clusters
+            for names in paginate(client, 'list_clusters', 'clusterArns', PaginationConfig={'PageSize': 100}):
+                if names:
+                    yield client.describe_clusters(clusters=names)['clusters']
 
-        return Terminator._create(EcsCluster, 'ecs', _paginate_cluster_results)
+        return Terminator._create_pages(context, EcsCluster, 'ecs', _paginate_cluster_results)
 
     def terminate(self):
         self.client.delete_cluster(cluster=self.name)
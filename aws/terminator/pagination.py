@@ -0,0 +1,182 @@
+"""Paginated listing of AWS resources with the largest page size each API allows."""
+import functools
+import typing
+
+import botocore.client
+import botocore.paginate
+import jmespath
+import jmespath.parser
+
+# Paginator definitions, in the format of the botocore paginator models, of operations which the pinned botocore cannot paginate.
+EXTRA_PAGINATORS: typing.Dict[typing.Tuple[str, str], typing.Dict[str, str]] = {
+    ('backup', 'ListBackupPlans'): {
+        'input_token': 'NextToken', 'output_token': 'NextToken', 'limit_key': 'MaxResults', 'result_key': 'BackupPlansList',
+    },
+    ('backup', 'ListBackupSelections'): {
+        'input_token': 'NextToken', 'output_token': 'NextToken', 'limit_key': 'MaxResults', 'result_key': 'BackupSelectionsList',
+    },
+    ('backup', 'ListBackupVaults'): {
+        'input_token': 'NextToken', 'output_token': 'NextToken', 'limit_key': 'MaxResults', 'result_key': 'BackupVaultList',
+    },
+    ('cloudfront', 'ListCachePolicies'): {
+        'input_token': 'Marker', 'output_token': 'CachePolicyList.NextMarker', 'limit_key': 'MaxItems', 'result_key': 'CachePolicyList.Items',
+    },
+    ('cloudfront', 'ListOriginRequestPolicies'): {
+        'input_token': 'Marker', 'output_token': 'OriginRequestPolicyList.NextMarker', 'limit_key': 'MaxItems', 'result_key': 'OriginRequestPolicyList.Items',
+    },
+    ('memorydb', 'DescribeACLs'): {
+        'input_token': 'NextToken', 'output_token': 'NextToken', 'limit_key': 'MaxResults', 'result_key': 'ACLs',
+    },
+    ('memorydb', 'DescribeClusters'): {
+        'input_token': 'NextToken', 'output_token': 'NextToken', 'limit_key': 'MaxResults', 'result_key': 'Clusters',
+    },
+    ('memorydb', 'DescribeParameterGroups'): {
+        'input_token': 'NextToken', 'output_token': 'NextToken', 'limit_key': 'MaxResults', 'result_key': 'ParameterGroups',
+    },
+    ('memorydb', 'DescribeSnapshots'): {
+        'input_token': 'NextToken', 'output_token': 'NextToken', 'limit_key': 'MaxResults', 'result_key': 'Snapshots',
+    },
+    ('memorydb', 'DescribeSubnetGroups'): {
+        'input_token': 'NextToken', 'output_token': 'NextToken', 'limit_key': 'MaxResults', 'result_key': 'SubnetGroups',
+    },
+    ('memorydb', 'DescribeUsers'): {
+        'input_token': 'NextToken', 'output_token': 'NextToken', 'limit_key': 'MaxResults', 'result_key': 'Users',
+    },
+    ('s3control', 'ListAccessPoints'): {
+        'input_token': 'NextToken', 'output_token': 'NextToken', 'limit_key': 'MaxResults', 'result_key': 'AccessPointList',
+    },
+    ('wafv2', 'ListIPSets'): {
+        'input_token': 'NextMarker', 'output_token': 'NextMarker', 'limit_key': 'Limit', 'result_key': 'IPSets',
+    },
+    ('wafv2', 'ListRuleGroups'): {
+        'input_token': 'NextMarker', 'output_token': 'NextMarker', 'limit_key': 'Limit', 'result_key': 'RuleGroups',
+    },
+    ('wafv2', 'ListWebACLs'): {
+        'input_token': 'NextMarker', 'output_token': 'NextMarker', 'limit_key': 'Limit', 'result_key': 'WebACLs',
+    },
+}
+
+# Documented maximum page sizes of the operations of each service, for operations whose service model gives none.
+MAX_PAGE_SIZES: typing.Dict[str, int] = {
+    'apigateway': 500,
+    'autoscaling': 100,
+    'ec2': 1000,  # operations with a lower maximum, such as DescribeVolumes, return their maximum instead
+    'elasticache': 100,
+    'memorydb': 100,
+    'neptune': 100,
+    'rds': 100,
+    'redshift': 100,
+    'sqs': 1000,
+}
+
+
+class Filter(typing.NamedTuple):
+    """
+    A filter on the listed resources of a terminator type, matching those whose field has one of the given values.
+    Discovery filters keep the matching resources. They are sent in the Filters parameter of operations which take EC2 style filters, so the API leaves out
+    the other resources. Otherwise, and for exclusive filters, which EC2 style filters cannot express, paginate applies them to each page instead.
+    Ignore filters match the resources which are always ignored, which Terminator._create and Terminator._create_pages count without creating terminators.
+    """
+    name: typing.Optional[str]  # name of the EC2 style filter, such as 'instance-state-name', or None for filters only applied to the pages
+    path: str  # JMESPath expression of the filtered field of each resource, such as 'State.Name'
+    values: typing.Tuple[typing.Any, ...]
+    exclude: bool = False  # match the resources whose field has none of the values, rather than one of them
+    prefix: bool = False  # match fields starting with one of the values, rather than equal to one of them
+
+    def matches(self, item: typing.Dict[str, typing.Any]) -> bool:
+        value = compile_expression(self.path).search(item)
+        values = value if isinstance(value, list) else [value]  # such as the keys of 'Tags[].Key'
+
+        if self.prefix:
+            found = any(isinstance(value, str) and value.startswith(self.values) for value in values)
+        else:
+            found = any(value in self.values for value in values)
+
+        return found != self.exclude
+
+    @property
+    def api_values(self) -> typing.List[str]:
+        """The values of the filter in the Filters parameter, where * matches any characters."""
+        values = [str(value).lower() if isinstance(value, bool) else value for value in self.values]  # EC2 filters take 'true' and 'false'
+
+        return [f'{value}*' for value in values] if self.prefix else values
+
+
+def paginate(client: botocore.client.BaseClient, operation_name: str, result_key: str, filters: typing.Sequence[Filter] = (),
+             **kwargs) -> typing.Iterator[typing.List[typing.Any]]:
+    """
+    Yield the items of each page of a paginated operation as the page arrives, for Terminator._create_pages.
+    The result key is a JMESPath expression, so results nested in the response can be given as, for example, 'DistributionList.Items'.
+    Pages are requested with the largest page size the operation allows, unless a PaginationConfig is given.
+    The given filters are added to the Filters parameter where the operation supports them, and applied to each page otherwise.
+    """
+    paginator = get_paginator(client, operation_name)
+    page_filters = list(filters)
+
+    if filters and takes_filters(client, operation_name):
+        api_filters = [value for value in filters if value.name and not value.exclude]
+        page_filters = [value for value in filters if value not in api_filters]
+
+        if api_filters:
+            kwargs['Filters'] = list(kwargs.get('Filters', [])) + [{'Name': value.name, 'Values': value.api_values} for value in api_filters]
+
+    if 'PaginationConfig' not in kwargs:
+        page_size = get_max_page_size(client, operation_name, paginator)
+
+        if page_size:
+            kwargs['PaginationConfig'] = {'PageSize': page_size}
+
+    expression = compile_expression(result_key)
+
+    for page in paginator.paginate(**kwargs):
+        items = expression.search(page) or []
+
+        if page_filters:
+            items = [item for item in items if all(value.matches(item) for value in page_filters)]
+
+        yield items
+
+
+@functools.lru_cache(maxsize=None)
+def compile_expression(expression: str) -> jmespath.parser.ParsedResult:
+    """Return the given JMESPath expression compiled, so each expression is parsed once rather than for every page or resource it is applied to."""
+    return jmespath.compile(expression)
+
+
+def get_paginator(client: botocore.client.BaseClient, operation_name: str) -> botocore.paginate.Paginator:
+    """Return the paginator of the given operation, including those defined in EXTRA_PAGINATORS."""
+    api_name = client.meta.method_to_api_mapping[operation_name]
+    config = EXTRA_PAGINATORS.get((client.meta.service_model.service_name, api_name))
+
+    if config is None or client.can_paginate(operation_name):
+        return client.get_paginator(operation_name)
+
+    return botocore.paginate.Paginator(getattr(client, operation_name), config, client.meta.service_model.operation_model(api_name))
+
+
+def get_max_page_size(client: botocore.client.BaseClient, operation_name: str, paginator: botocore.paginate.Paginator) -> typing.Optional[int]:
+    """Return the largest page size of the given operation, from its service model or MAX_PAGE_SIZES, or None if it has no integer page size."""
+    limit_key = paginator._pagination_cfg.get('limit_key')
+    input_shape = client.meta.service_model.operation_model(client.meta.method_to_api_mapping[operation_name]).input_shape
+
+    if not limit_key or not input_shape or limit_key not in input_shape.members:
+        return None
+
+    limit_shape = input_shape.members[limit_key]
+
+    if limit_shape.type_name != 'integer':
+        return None  # such as the string MaxItems of Route 53 and CloudFront, which keep their default page size
+
+    return limit_shape.metadata.get('max') or MAX_PAGE_SIZES.get(client.meta.service_model.service_name)
+
+
+def takes_filters(client: botocore.client.BaseClient, operation_name: str) -> bool:
+    """Return True if the given operation takes EC2 style filters, a Filters list of Name and Values pairs."""
+    input_shape = client.meta.service_model.operation_model(client.meta.method_to_api_mapping[operation_name]).input_shape
+
+    if not input_shape or 'Filters' not in input_shape.members:
+        return False
+
+    filters_shape = input_shape.members['Filters']
+
+    return filters_shape.type_name == 'list' and {'Name', 'Values'} <= set(getattr(filters_shape.member, 'members', {}))
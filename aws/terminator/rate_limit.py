@@ -0,0 +1,120 @@
+"""Client-side rate limiting of AWS API calls, shared by every client of a service in a region."""
+import functools
+import threading
+import time
+import typing
+
+import botocore.client
+
+# Error codes returned by AWS services when a request is throttled.
+THROTTLING_ERROR_CODES = frozenset((
+    'RequestLimitExceeded',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'SlowDown',
+    'Throttling',
+    'ThrottlingException',
+    'TooManyRequestsException',
+))
+
+# Starting (and maximum) request rate per second, and burst size, by service. Services without an entry use DEFAULT_RATE.
+# EC2 refills its account-wide request token buckets at 20/s for describe calls and less for mutating calls; WAF classic allows about one change per second,
+# and SES about one receipt rule set call per second.
+DEFAULT_RATES: typing.Dict[str, typing.Tuple[float, float]] = {
+    'ec2': (20, 100),
+    'route53': (5, 5),
+    'ses': (1, 1),
+    'waf': (1, 1),
+    'waf-regional': (1, 1),
+    'wafv2': (5, 5),
+}
+DEFAULT_RATE = (10, 20)
+# Throttled rates are never reduced below this, so a bucket always recovers.
+MIN_RATE = 0.5
+# Each successful request raises a throttled rate by this fraction of its maximum rate.
+RATE_INCREASE = 0.05
+
+
+class TokenBucket:
+    """
+    Token bucket which adapts its refill rate to throttling: the rate is halved on each throttled request, and creeps back up towards its maximum
+    with each successful one (additive increase, multiplicative decrease).
+    """
+    def __init__(self, rate: float, burst: float) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Wait for a token to make a request."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                delay = (1 - self.tokens) / self.rate
+
+            time.sleep(delay)
+
+    def throttled(self) -> None:
+        with self._lock:
+            self.rate = max(MIN_RATE, self.rate / 2)
+            # drain the bucket, so the requests already waiting on it back off as well
+            self.tokens = min(self.tokens, 0)
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_INCREASE)
+
+
+class RateLimiter:
+    """
+    Process-wide token buckets keyed by service and region, hooked into clients through botocore events.
+    Every attempt of a request, including retries, waits for a token, and the response of each attempt adapts the rate of its bucket.
+    Retries themselves are left to botocore, whose standard retry mode backs off with jitter on throttling errors.
+    """
+    def __init__(self) -> None:
+        self._buckets: typing.Dict[typing.Tuple[str, typing.Optional[str]], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, service_name: str, region_name: typing.Optional[str]) -> TokenBucket:
+        key = (service_name, region_name)
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(*DEFAULT_RATES.get(service_name, DEFAULT_RATE))
+
+            return bucket
+
+    def register(self, client: botocore.client.BaseClient) -> None:
+        """Rate limit the requests made by the given client."""
+        bucket = self.bucket(client.meta.service_model.service_name, client.meta.region_name)
+
+        client.meta.events.register('before-send', functools.partial(before_send, bucket))
+        client.meta.events.register('needs-retry', functools.partial(needs_retry, bucket))
+
+
+def before_send(bucket: TokenBucket, **_kwargs: typing.Any) -> None:
+    # returning None lets the request be sent
+    bucket.acquire()
+
+
+def needs_retry(bucket: TokenBucket, response: typing.Optional[typing.Tuple[typing.Any, typing.Dict[str, typing.Any]]] = None, **_kwargs: typing.Any) -> None:
+    # returning None leaves the decision to retry to botocore
+    if response is None:
+        return
+
+    if response[1].get('Error', {}).get('Code') in THROTTLING_ERROR_CODES:
+        bucket.throttled()
+    else:
+        bucket.succeeded()
@@ -0,0 +1,97 @@
+"""Bulk removal of the objects in an S3 bucket."""
+import collections
+import concurrent.futures
+import itertools
+import typing
+
+import botocore.client
+import botocore.exceptions
+
+# DeleteObjects accepts at most 1000 keys per request
+MAX_DELETE_KEYS = 1000
+DEFAULT_DELETE_CONCURRENCY = 4
+
+
+def delete_objects(client: botocore.client.BaseClient, bucket: str, objects: typing.Iterable[typing.Dict[str, str]],
+                   concurrency: int = DEFAULT_DELETE_CONCURRENCY) -> typing.Tuple[int, typing.List[typing.Dict[str, str]]]:
+    """
+    Delete the given objects, given as DeleteObjects 'Key' and optional 'VersionId' dicts, with up to the given number of requests in flight at once.
+    Objects are consumed as requests are submitted, so a paginated listing can be streamed without holding all of it in memory.
+    Return the number of objects deleted and the DeleteObjects errors for those which were not.
+    """
+    objects = iter(objects)
+    errors: typing.List[typing.Dict[str, str]] = []
+    count = 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending: typing.Deque[concurrent.futures.Future] = collections.deque()
+
+        while True:
+            batch = list(itertools.islice(objects, MAX_DELETE_KEYS))
+
+            if not batch:
+                break
+
+            # bound the number of queued requests, so listing does not run ahead of deleting
+            if len(pending) >= concurrency * 2:
+                count += collect_errors(pending.popleft(), errors)
+
+            pending.append(executor.submit(delete_batch, client, bucket, batch))
+
+        while pending:
+            count += collect_errors(pending.popleft(), errors)
+
+    return count, errors
+
+
+def get_delete_error(error: typing.Dict[str, str], message: typing.Optional[str] = None) -> botocore.exceptions.ClientError:
+    """Return a ClientError for the given DeleteObjects error."""
+    return botocore.exceptions.ClientError({'Error': {'Code': error['Code'], 'Message': message or f'{error["Key"]}: {error.get("Message")}'}}, 'DeleteObjects')
+
+
+def delete_batch(client: botocore.client.BaseClient, bucket: str,
+                 batch: typing.List[typing.Dict[str, str]]) -> typing.Tuple[int, typing.List[typing.Dict[str, str]]]:
+    response = client.delete_objects(
+        Bucket=bucket,
+        Delete={
+            'Objects': batch,
+            'Quiet': True,
+        },
+    )
+
+    errors = response.get('Errors', [])
+
+    return len(batch) - len(errors), errors
+
+
+def collect_errors(future: concurrent.futures.Future, errors: typing.List[typing.Dict[str, str]]) -> int:
+    count, batch_errors = future.result()
+    errors.extend(batch_errors)
+
+    return count
+
+
+def list_object_versions(client: botocore.client.BaseClient, bucket: str) -> typing.Iterator[typing.Dict[str, str]]:
+    """Yield every version and delete marker in the bucket, which covers the current objects of unversioned buckets as version 'null'."""
+    for page in client.get_paginator('list_object_versions').paginate(Bucket=bucket, PaginationConfig={'PageSize': MAX_DELETE_KEYS}):
+        for item in itertools.chain(page.get('Versions', []), page.get('DeleteMarkers', [])):
+            yield {'Key': item['Key'], 'VersionId': item['VersionId']}
+
+
+def abort_multipart_uploads(client: botocore.client.BaseClient, bucket: str, concurrency: int = DEFAULT_DELETE_CONCURRENCY) -> int:
+    """Abort the in-progress multipart uploads in the bucket, whose parts would otherwise keep it from being deleted. Return the number aborted."""
+    uploads = [
+        upload for page in client.get_paginator('list_multipart_uploads').paginate(Bucket=bucket)
+        for upload in page.get('Uploads', [])
+    ]
+
+    if not uploads:
+        return 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(client.abort_multipart_upload, Bucket=bucket, Key=upload['Key'], UploadId=upload['UploadId']) for upload in uploads]
+
+        for future in futures:
+            future.result()
+
+    return len(uploads)
@@ -0,0 +1,66 @@
+"""Scheduling of the work done by a run within its time budget."""
+import threading
+import time
+import typing
+
+# A unit of work is a terminator type name in a region, or in no region ('') for work which is not regional.
+Unit = typing.Tuple[str, str]
+
+
+class Scheduler:
+    """
+    Tracks the units of work of a run against an optional deadline, given as a time.monotonic() value.
+    Once the deadline has passed no further units are started, and the units which have not finished are reported by pending(),
+    so they can be saved in a checkpoint and resumed by the next run.
+    """
+    def __init__(self, deadline: typing.Optional[float] = None, on_expired: typing.Optional[typing.Callable[[typing.List[Unit]], None]] = None):
+        self.deadline = deadline
+        self.on_expired = on_expired
+        self._planned: typing.Optional[typing.List[Unit]] = None
+        self._selected: typing.Optional[typing.Set[Unit]] = None
+        self._finished: typing.Set[Unit] = set()
+        self._deferred: typing.List[Unit] = []
+        self._lock = threading.Lock()
+
+    def resume(self, units: typing.Iterable[typing.Sequence[str]]) -> None:
+        """Limit the run to the given units, left over by a previous run."""
+        self._selected = set((region, name) for region, name in units)
+
+    def plan(self, units: typing.Iterable[Unit]) -> None:
+        """Register the units of the run before any of them is started. Without a plan, every unit is considered planned."""
+        self._planned = [unit for unit in units if self._selected is None or unit in self._selected]
+
+    def is_planned(self, unit: Unit) -> bool:
+        return self._planned is None or unit in self._planned
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def start(self, unit: Unit) -> bool:
+        """Return True if the unit may be started, or False if the deadline has passed and it has been deferred to the next run."""
+        with self._lock:
+            if not self.expired():
+                return True
+
+            first = not self._deferred
+            self._deferred.append(unit)
+
+        if first and self.on_expired:
+            # save the work left over now, in case the in-flight units outlive the run
+            self.on_expired(self.pending())
+
+        return False
+
+    def finish(self, unit: Unit) -> None:
+        with self._lock:
+            self._finished.add(unit)
+
+    def pending(self) -> typing.List[Unit]:
+        """Return the planned units which have not finished, including any which are still running."""
+        with self._lock:
+            return [unit for unit in self._planned or [] if unit not in self._finished]
+
+    @property
+    def deferred(self) -> typing.List[Unit]:
+        with self._lock:
+            return list(self._deferred)
@@ -3,13 +3,16 @@ import datetime
 import botocore
 import botocore.exceptions
 
-from . import DbTerminator, Terminator
+from . import DbTerminator, Filter, Terminator, paginate
 
 
 class IamRole(Terminator):
+    is_global = True
+    ignore_filters = (Filter(None, 'RoleName', ('ansible-test',), exclude=True, prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(IamRole, 'iam', lambda client: client.list_roles()['Roles'])
+    def create(context):
+        return Terminator._create_pages(context, IamRole, 'iam', lambda client: paginate(client, 'list_roles', 'Roles'))
 
     @property
     def id(self):
@@ -19,10 +22,6 @@ class IamRole(Terminator):
     def name(self):
         return self.instance['RoleName']
 
-    @property
-    def ignore(self):
-        return not self.name.startswith('ansible-test')
-
     @property
     def created_time(self):
         return self.instance['CreateDate']
@@ -44,9 +43,12 @@ class IamRole(Terminator):
 
 
 class IamInstanceProfile(Terminator):
+    is_global = True
+    ignore_filters = (Filter(None, 'InstanceProfileName', ('ansible-test-',), exclude=True, prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(IamInstanceProfile, 'iam', lambda client: client.list_instance_profiles()['InstanceProfiles'])
+    def create(context):
+        return Terminator._create_pages(context, IamInstanceProfile, 'iam', lambda client: paginate(client, 'list_instance_profiles', 'InstanceProfiles'))
 
     @property
     def id(self):
@@ -56,10 +58,6 @@ class IamInstanceProfile(Terminator):
     def name(self):
         return self.instance['InstanceProfileName']
 
-    @property
-    def ignore(self):
-        return not self.name.startswith('ansible-test-')
-
     @property
     def created_time(self):
         return self.instance['CreateDate']
@@ -72,9 +70,14 @@ class IamInstanceProfile(Terminator):
 
 
 class IamServerCertificate(Terminator):
+    is_global = True
+    ignore_filters = (Filter(None, 'ServerCertificateName', ('ansible-test-',), exclude=True, prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(IamServerCertificate, 'iam', lambda client: client.list_server_certificates()['ServerCertificateMetadataList'])
+    def create(context):
+        return Terminator._create_pages(
+            context, IamServerCertificate, 'iam',
+            lambda client: paginate(client, 'list_server_certificates', 'ServerCertificateMetadataList'))
 
     @property
     def id(self):
@@ -84,10 +87,6 @@ class IamServerCertificate(Terminator):
     def name(self):
         return self.instance['ServerCertificateName']
 
-    @property
-    def ignore(self):
-        return not self.name.startswith('ansible-test-')
-
     @property
     def created_time(self):
         return self.instance['UploadDate']
@@ -101,10 +100,10 @@ class ACMCertificate(DbTerminator):
     # We need to be able to delete anyway, so use DbTerminator
     # https://github.com/ansible/ansible/issues/67788
     @staticmethod
-    def create():
-        return Terminator._create(
-            ACMCertificate, 'acm',
-            lambda client: client.get_paginator('list_certificates').paginate().build_full_result()['CertificateSummaryList']
+    def create(context):
+        return Terminator._create_pages(
+            context, ACMCertificate, 'acm',
+            lambda client: paginate(client, 'list_certificates', 'CertificateSummaryList')
         )
 
     @property
@@ -120,10 +119,12 @@ class ACMCertificate(DbTerminator):
 
 
 class IAMSamlProvider(Terminator):
+    is_global = True
+
     @staticmethod
-    def create():
+    def create(context):
         return Terminator._create(
-            IAMSamlProvider, 'iam',
+            context, IAMSamlProvider, 'iam',
             lambda client: client.list_saml_providers()['SAMLProviderList']
         )
 
@@ -148,11 +149,12 @@ class IAMSamlProvider(Terminator):
 
 
 class KMSKey(Terminator):
-    @staticmethod
-    def create():
-        def get_paginated_keys(client):
-            return client.get_paginator('list_keys').paginate().build_full_result()['Keys']
+    # Keys already pending deletion don't need anything more done to them.
+    # Don't try deleting the AWS managed keys (they're not charged for)
+    ignore_filters = (Filter(None, 'KeyState', ('PendingDeletion',)), Filter(None, 'Aliases', ('alias/aws/',), prefix=True))
 
+    @staticmethod
+    def create(context):
         def get_key_details(client, key):
             metadata = client.describe_key(KeyId=key['KeyId'])['KeyMetadata']
             _aliases = client.list_aliases(KeyId=key['KeyId'])['Aliases']
@@ -163,26 +165,15 @@ class KMSKey(Terminator):
             return metadata
 
         def get_detailed_keys(client):
-            detailed_keys = []
-            for key in get_paginated_keys(client):
-                metadata = get_key_details(client, key)
-                if metadata:
-                    detailed_keys.append(metadata)
-            return detailed_keys
-
-        return Terminator._create(KMSKey, 'kms', get_detailed_keys)
+            for keys in paginate(client, 'list_keys', 'Keys'):
+                detailed_keys = []
+                for key in keys:
+                    metadata = get_key_details(client, key)
+                    if metadata:
+                        detailed_keys.append(metadata)
+                yield detailed_keys
 
-    @property
-    def ignore(self):
-        # The key is already in a 'pending deletion' state, and doesn't need
-        # anything more done to it.
-        if self.instance['KeyState'] == 'PendingDeletion':
-            return True
-        # Don't try deleting the AWS managed keys (they're not charged for)
-        for alias in self.instance['Aliases']:
-            if alias.startswith('alias/aws/'):
-                return True
-        return False
+        return Terminator._create_pages(context, KMSKey, 'kms', get_detailed_keys)
 
     @property
     def created_time(self):
@@ -201,9 +192,11 @@ class KMSKey(Terminator):
 
 
 class Secret(Terminator):
+    ignore_filters = (Filter(None, 'Name', ('ansible-test',), exclude=True, prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(Secret, 'secretsmanager', lambda client: client.list_secrets()['SecretList'])
+    def create(context):
+        return Terminator._create_pages(context, Secret, 'secretsmanager', lambda client: paginate(client, 'list_secrets', 'SecretList'))
 
     @property
     def id(self):
@@ -213,10 +206,6 @@ class Secret(Terminator):
     def name(self):
         return self.instance['Name']
 
-    @property
-    def ignore(self):
-        return not self.name.startswith('ansible-test')
-
     @property
     def created_time(self):
         return self.instance['CreatedDate']
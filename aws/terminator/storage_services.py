@@ -1,65 +1,72 @@
 import datetime
+import time
 
 import botocore
 import botocore.exceptions
 
-from . import DbTerminator, Terminator, get_account_id
+from . import DbTerminator, Filter, Terminator, logger, paginate
+from .s3_objects import MAX_DELETE_KEYS, DEFAULT_DELETE_CONCURRENCY, abort_multipart_uploads, delete_objects, get_delete_error, list_object_versions
 
 
 class S3Bucket(Terminator):
+    is_global = True
+    # Bucket encryption takes up to 24 hours to be enabled, so we use a persistent bucket
+    # We'll empty the bucket contents in SSMBucketObjects
+    ignore_filters = (Filter(None, 'Name', ('ssm-encrypted-test-bucket',)),)
+
     @staticmethod
-    def create():
-        return Terminator._create(S3Bucket, 's3', lambda client: client.list_buckets()['Buckets'])
+    def create(context):
+        return Terminator._create(context, S3Bucket, 's3', lambda client: client.list_buckets()['Buckets'])
 
     @property
     def name(self):
         return self.instance['Name']
 
-    @property
-    def ignore(self):
-        # Bucket encryption takes up to 24 hours to be enabled, so we use a persistent bucket
-        # We'll empty the bucket contents in SSMBucketObjects
-        return self.instance['Name'] == 'ssm-encrypted-test-bucket'
-
     @property
     def created_time(self):
         return self.instance['CreationDate']
 
     def terminate(self):
-        def _paginated_list(bucket):
-            paginator = self.client.get_paginator('list_objects_v2')
-            for page in paginator.paginate(Bucket=bucket):
-                yield [d['Key'] for d in page.get('Contents', [])]
-
         try:
             self.client.delete_bucket(Bucket=self.name)
+            return
         except botocore.exceptions.ClientError as ex:
             if ex.response['Error']['Code'] == 'NoSuchBucket':
                 return
-            for keys in _paginated_list(self.name):
-                self.client.delete_objects(
-                    Bucket=self.name,
-                    Delete={
-                        "Objects": [{'Key': k} for k in keys],
-                        "Quiet": True,
-                    }
-                )
-            self.client.delete_bucket(Bucket=self.name)
+
+        self.empty()
+        self.client.delete_bucket(Bucket=self.name)
+
+    def empty(self):
+        """Remove every object version, delete marker and in-progress multipart upload from the bucket."""
+        start = time.monotonic()
+
+        uploads = abort_multipart_uploads(self.client, self.name)
+        count, errors = delete_objects(self.client, self.name, list_object_versions(self.client, self.name))
+
+        if errors:
+            raise get_delete_error(errors[0], f'{len(errors)} objects not deleted from {self.name}, including {errors[0]["Key"]}: {errors[0].get("Message")}')
+
+        elapsed = time.monotonic() - start
+
+        logger.info('emptied %s: deleted %d keys and aborted %d uploads in %.1f seconds (%.1f keys/second)',
+                    self.name, count, uploads, elapsed, count / elapsed if elapsed else 0.0)
 
 
 class SSMBucketObjects(Terminator):
     # We maintain a persistent encrypted bucket for the commmunity.aws SSM connection plugin.
     # Ensure it is kept clean of objects from past test runs.
+    bucket = 'ssm-encrypted-test-bucket'
+    # Stale objects are deleted a few 1000 key DeleteObjects requests at a time.
+    batch_size = MAX_DELETE_KEYS * DEFAULT_DELETE_CONCURRENCY
+    is_global = True
+
     @staticmethod
-    def create():
+    def create(context):
         def paginate_objects(client):
-            list_bucket_objects_result = client.get_paginator('list_objects_v2').paginate(Bucket='ssm-encrypted-test-bucket').build_full_result()
-            bucket_contents = {}
-            if list_bucket_objects_result.get('Contents'):
-                bucket_contents = list_bucket_objects_result['Contents']
-            return bucket_contents
+            return paginate(client, 'list_objects_v2', 'Contents', Bucket=SSMBucketObjects.bucket)
 
-        return Terminator._create(SSMBucketObjects, 's3', paginate_objects)
+        return Terminator._create_pages(context, SSMBucketObjects, 's3', paginate_objects)
 
     @property
     def created_time(self):
@@ -70,26 +77,25 @@ class SSMBucketObjects(Terminator):
         return self.instance['Key']
 
     def terminate(self):
-        self.client.delete_object(Bucket='ssm-encrypted-test-bucket', Key=self.name)
+        self.client.delete_object(Bucket=self.bucket, Key=self.name)
 
+    @classmethod
+    def terminate_batch(cls, terminators):
+        terminators_by_key = dict((terminator.name, terminator) for terminator in terminators)
+        _count, errors = delete_objects(terminators[0].client, cls.bucket, [{'Key': key} for key in terminators_by_key])
 
-class S3AccessPoint(Terminator):
-    _account_id = None
+        return dict((terminators_by_key[error['Key']], get_delete_error(error)) for error in errors if error['Key'] in terminators_by_key)
 
+
+class S3AccessPoint(Terminator):
     @staticmethod
-    def create():
-        account = get_account_id()
+    def create(context):
+        account = context.identity.account_id
 
         def list_access_points(client):
-            results = []
-            access_points = client.list_access_points(AccountId=account).get("AccessPointList", [])
-            for ap in access_points:
-                results.append(client.get_access_point(AccountId=account, Name=ap['Name']))
-            return results
-        terminators = Terminator._create(S3AccessPoint, 's3control', list_access_points)
-        for terminator in terminators:
-            terminator._account_id = account
-        return terminators
+            for access_points in paginate(client, 'list_access_points', 'AccessPointList', AccountId=account):
+                yield [client.get_access_point(AccountId=account, Name=ap['Name']) for ap in access_points]
+        return Terminator._create_pages(context, S3AccessPoint, 's3control', list_access_points)
 
     @property
     def name(self):
@@ -100,26 +106,18 @@ class S3AccessPoint(Terminator):
         return self.instance['CreationDate']
 
     def terminate(self):
-        self.client.delete_access_point(AccountId=self._account_id, Name=self.name)
+        self.client.delete_access_point(AccountId=self.context.identity.account_id, Name=self.name)
 
 
 class S3AccessPointForObjectLambda(Terminator):
-    _account_id = None
-
     @staticmethod
-    def create():
-        account = get_account_id()
+    def create(context):
+        account = context.identity.account_id
 
         def list_access_points(client):
-            results = []
-            access_points = client.list_access_points_for_object_lambda(AccountId=account).get("ObjectLambdaAccessPointList", [])
-            for ap in access_points:
-                results.append(client.get_access_point_for_object_lambda(AccountId=account, Name=ap['Name']))
-            return results
-        terminators = Terminator._create(S3AccessPointForObjectLambda, 's3control', list_access_points)
-        for terminator in terminators:
-            terminator._account_id = account
-        return terminators
+            for access_points in paginate(client, 'list_access_points_for_object_lambda', 'ObjectLambdaAccessPointList', AccountId=account):
+                yield [client.get_access_point_for_object_lambda(AccountId=account, Name=ap['Name']) for ap in access_points]
+        return Terminator._create_pages(context, S3AccessPointForObjectLambda, 's3control', list_access_points)
 
     @property
     def name(self):
@@ -130,19 +128,15 @@ class S3AccessPointForObjectLambda(Terminator):
         return self.instance['CreationDate']
 
     def terminate(self):
-        self.client.delete_access_point_for_object_lambda(AccountId=self._account_id, Name=self.name)
+        self.client.delete_access_point_for_object_lambda(AccountId=self.context.identity.account_id, Name=self.name)
 
 
 class BackupPlan(Terminator):
-    @staticmethod
-    def create():
-        def paginate_plans(client):
-            list_backup_plans_result = (
-                client.get_paginator("list_backup_plans").paginate().build_full_result()
-            )
-            return list_backup_plans_result["BackupPlansList"]
+    tagged_resource_types = ('backup:backup-plan',)
 
-        return Terminator._create(BackupPlan, "backup", paginate_plans)
+    @staticmethod
+    def create(context):
+        return Terminator._create_pages(context, BackupPlan, "backup", lambda client: paginate(client, "list_backup_plans", "BackupPlansList"))
 
     @property
     def id(self):
@@ -161,17 +155,11 @@ class BackupPlan(Terminator):
 
 
 class BackupVault(Terminator):
-    @staticmethod
-    def create():
-        def paginate_vaults(client):
-            list_backup_vaults_result = (
-                client.get_paginator("list_backup_vaults")
-                .paginate()
-                .build_full_result()
-            )
-            return list_backup_vaults_result["BackupVaultList"]
+    tagged_resource_types = ('backup:backup-vault',)
 
-        return Terminator._create(BackupVault, "backup", paginate_vaults)
+    @staticmethod
+    def create(context):
+        return Terminator._create_pages(context, BackupVault, "backup", lambda client: paginate(client, "list_backup_vaults", "BackupVaultList"))
 
     @property
     def name(self):
@@ -186,22 +174,16 @@ class BackupVault(Terminator):
 
 
 class BackupSelection(Terminator):
+    tagged_resource_types = ('backup:backup-plan',)
+
     @staticmethod
-    def create():
+    def create(context):
         def _build_backup_selections(client):
-            results = []
             # Get AWS Backup plans
-            backup_plans = (
-                client.get_paginator("list_backup_plans").paginate().build_full_result()
-            )["BackupPlansList"]
-            for plan in backup_plans:
-                results.extend((
-                    client.get_paginator("list_backup_selections")
-                    .paginate(BackupPlanId=plan["BackupPlanId"])
-                    .build_full_result()
-                )["BackupSelectionsList"])
-            return results
-        return Terminator._create(BackupSelection, "backup", _build_backup_selections)
+            for backup_plans in paginate(client, "list_backup_plans", "BackupPlansList"):
+                for plan in backup_plans:
+                    yield from paginate(client, "list_backup_selections", "BackupSelectionsList", BackupPlanId=plan["BackupPlanId"])
+        return Terminator._create_pages(context, BackupSelection, "backup", _build_backup_selections)
 
     @property
     def name(self):
@@ -224,14 +206,15 @@ class BackupSelection(Terminator):
 
 
 class MemoryDBClusters(Terminator):
+    tagged_resource_types = ('memorydb:cluster',)
+    # describe_clusters does not have a parameter to filter results, so the states are left out of each page
+    discovery_filters = (Filter(None, 'Status', ('creating', 'deleting', 'updating'), exclude=True),)
+
     @staticmethod
-    def create():
-        def get_available_clusters(client):
-            # describe_clusters does not have a parameter to filter results
-            ignore_states = ('creating', 'deleting', 'updating')
-            clusters = client.describe_clusters()['Clusters']
-            return [cluster for cluster in clusters if cluster['Status'] not in ignore_states]
-        return Terminator._create(MemoryDBClusters, 'memorydb', get_available_clusters)
+    def create(context):
+        return Terminator._create_pages(
+            context, MemoryDBClusters, 'memorydb',
+            lambda client: paginate(client, 'describe_clusters', 'Clusters', filters=MemoryDBClusters.discovery_filters))
 
     @property
     def id(self):
@@ -250,9 +233,11 @@ class MemoryDBClusters(Terminator):
 
 
 class MemoryDBACLs(DbTerminator):
+    ignore_filters = (Filter(None, 'Name', ('default',), prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(MemoryDBACLs, 'memorydb', lambda client: client.describe_acls()['ACLs'])
+    def create(context):
+        return Terminator._create_pages(context, MemoryDBACLs, 'memorydb', lambda client: paginate(client, 'describe_acls', 'ACLs'))
 
     @property
     def id(self):
@@ -262,10 +247,6 @@ class MemoryDBACLs(DbTerminator):
     def name(self):
         return self.instance["Name"]
 
-    @property
-    def ignore(self):
-        return self.name.startswith('default')
-
     @property
     def age_limit(self):
         return datetime.timedelta(minutes=40)
@@ -275,9 +256,13 @@ class MemoryDBACLs(DbTerminator):
 
 
 class MemoryDBParameterGroups(DbTerminator):
+    ignore_filters = (Filter(None, 'Name', ('default',), prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(MemoryDBParameterGroups, 'memorydb', lambda client: client.describe_parameter_groups()['ParameterGroups'])
+    def create(context):
+        return Terminator._create_pages(
+            context, MemoryDBParameterGroups, 'memorydb',
+            lambda client: paginate(client, 'describe_parameter_groups', 'ParameterGroups'))
 
     @property
     def id(self):
@@ -287,10 +272,6 @@ class MemoryDBParameterGroups(DbTerminator):
     def name(self):
         return self.instance["Name"]
 
-    @property
-    def ignore(self):
-        return self.name.startswith('default')
-
     @property
     def age_limit(self):
         return datetime.timedelta(minutes=40)
@@ -300,9 +281,11 @@ class MemoryDBParameterGroups(DbTerminator):
 
 
 class MemoryDBSubnetGroups(DbTerminator):
+    ignore_filters = (Filter(None, 'Name', ('default',), prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(MemoryDBSubnetGroups, 'memorydb', lambda client: client.describe_subnet_groups()['SubnetGroups'])
+    def create(context):
+        return Terminator._create_pages(context, MemoryDBSubnetGroups, 'memorydb', lambda client: paginate(client, 'describe_subnet_groups', 'SubnetGroups'))
 
     @property
     def id(self):
@@ -312,10 +295,6 @@ class MemoryDBSubnetGroups(DbTerminator):
     def name(self):
         return self.instance["Name"]
 
-    @property
-    def ignore(self):
-        return self.name.startswith('default')
-
     @property
     def age_limit(self):
         return datetime.timedelta(minutes=40)
@@ -325,9 +304,11 @@ class MemoryDBSubnetGroups(DbTerminator):
 
 
 class MemoryDBUsers(DbTerminator):
+    ignore_filters = (Filter(None, 'Name', ('default',), prefix=True),)
+
     @staticmethod
-    def create():
-        return Terminator._create(MemoryDBUsers, 'memorydb', lambda client: client.describe_users()['Users'])
+    def create(context):
+        return Terminator._create_pages(context, MemoryDBUsers, 'memorydb', lambda client: paginate(client, 'describe_users', 'Users'))
 
     @property
     def id(self):
@@ -337,10 +318,6 @@ class MemoryDBUsers(DbTerminator):
     def name(self):
         return self.instance["Name"]
 
-    @property
-    def ignore(self):
-        return self.name.startswith('default')
-
     @property
     def age_limit(self):
         return datetime.timedelta(minutes=40)
@@ -351,8 +328,8 @@ class MemoryDBUsers(DbTerminator):
 
 class MemoryDBSnapshots(Terminator):
     @staticmethod
-    def create():
-        return Terminator._create(MemoryDBSnapshots, 'memorydb', lambda client: client.describe_snapshots()['Snapshots'])
+    def create(context):
+        return Terminator._create_pages(context, MemoryDBSnapshots, 'memorydb', lambda client: paginate(client, 'describe_snapshots', 'Snapshots'))
 
     @property
     def id(self):
@@ -1,4 +1,5 @@
 import logging
+import time
 
 from terminator import (
     cleanup,
@@ -8,7 +9,6 @@ from terminator import (
 
 # noinspection PyUnusedLocal
 def lambda_handler(event, context):
-    # pylint: disable=unused-argument
     logger.setLevel(logging.INFO)
 
     targets = [
@@ -21,4 +21,7 @@ def lambda_handler(event, context):
         "Ec2InternetGateway"
     ]
 
-    cleanup(check=False, force=False, targets=targets)
+    # stop starting new work before the function times out, leaving a checkpoint for the next invocation to resume from
+    deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000
+
+    cleanup(check=False, force=False, targets=targets, deadline=deadline)
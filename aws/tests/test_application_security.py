@@ -0,0 +1,33 @@
+import boto3
+import botocore.stub
+
+import terminator
+from terminator import Identity, RunContext
+from terminator.application_security import CloudfrontWafV2WebAcl, RegionalWafV2WebAcl
+
+
+def list_web_acls(monkeypatch, terminator_type, region):
+    regions = []
+
+    def get_client(client_name, region_name=None):
+        regions.append(region_name)
+        client = boto3.client(client_name, region_name=region_name, aws_access_key_id='key', aws_secret_access_key='secret')
+        stubber = botocore.stub.Stubber(client)
+        stubber.add_response('list_web_acls', {'WebACLs': []})
+        stubber.activate()
+
+        return client
+
+    monkeypatch.setattr(terminator, 'get_client', get_client)
+
+    assert not list(terminator_type.create(RunContext(region, Identity(region))))
+
+    return regions
+
+
+def test_cloudfront_resources_are_listed_in_us_east_1(monkeypatch):
+    assert list_web_acls(monkeypatch, CloudfrontWafV2WebAcl, 'us-west-2') == ['us-east-1']
+
+
+def test_regional_resources_are_listed_in_the_context_region(monkeypatch):
+    assert list_web_acls(monkeypatch, RegionalWafV2WebAcl, 'us-west-2') == ['us-west-2']
@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from terminator.execution import get_topological_order, log_buffer, logger, run_graph, run_in_order
+
+
+class RecordList(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture(name='messages')
+def get_messages():
+    handler = RecordList()
+    level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    log_buffer.hold()
+
+    yield handler.messages
+
+    logger.removeHandler(handler)
+    logger.setLevel(level)
+    log_buffer.hold()
+
+
+def test_topological_order_keeps_given_order():
+    assert get_topological_order(['c', 'b', 'a'], {'a': set(), 'b': set(), 'c': set()}) == ['c', 'b', 'a']
+    assert get_topological_order(['vpc', 'subnet', 'instance'], {'vpc': {'subnet'}, 'subnet': {'instance'}, 'instance': set()}) == [
+        'instance', 'subnet', 'vpc',
+    ]
+
+
+def test_topological_order_rejects_cycles():
+    with pytest.raises(ValueError):
+        get_topological_order(['a', 'b'], {'a': {'b'}, 'b': {'a'}})
+
+
+def test_run_graph_runs_dependencies_first():
+    finished = []
+    lock = threading.Lock()
+    dependencies = {'vpc': ['subnet', 'gateway'], 'subnet': ['instance'], 'gateway': [], 'instance': [], 'other': ['missing']}
+
+    def run(item):
+        time.sleep(0.01)
+
+        with lock:
+            finished.append(item)
+
+    run_graph(4, run, list(dependencies), lambda item: dependencies[item])
+
+    assert sorted(finished) == sorted(dependencies)
+    assert finished.index('instance') < finished.index('subnet') < finished.index('vpc')
+    assert finished.index('gateway') < finished.index('vpc')
+
+
+def test_run_graph_starts_dependents_of_failed_items():
+    finished = []
+
+    def run(item):
+        if item == 'a':
+            raise RuntimeError(item)
+
+        finished.append(item)
+
+    with pytest.raises(RuntimeError):
+        run_graph(2, run, ['a', 'b'], lambda item: ['a'] if item == 'b' else [])
+
+    assert finished == ['b']
+
+
+def test_log_records_of_each_item_are_emitted_in_item_order(messages):
+    def run(item):
+        logger.info('%s start', item)
+        time.sleep(0.05 if item == 'slow' else 0.01)
+        logger.info('%s end', item)
+
+    run_in_order(2, run, ['slow', 'fast'])
+
+    assert messages == ['slow start', 'slow end', 'fast start', 'fast end']
+
+
+def test_log_records_are_emitted_once_the_items_before_them_are_done(messages):
+    seen = []
+
+    def run(item):
+        if item == 'c':
+            deadline = time.monotonic() + 5
+
+            while len(messages) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            seen.extend(messages)
+
+        logger.info(item)
+
+    run_in_order(3, run, ['a', 'b', 'c'])
+
+    assert seen == ['a', 'b']
+    assert messages == ['a', 'b', 'c']
+
+
+def test_log_records_of_nested_items_are_emitted_in_item_order(messages):
+    def run_type(name, region):
+        time.sleep(0.01 if name == 'b' else 0.03)
+        logger.info('%s %s', region, name)
+
+    def run_region(region):
+        time.sleep(0.05 if region == 'r1' else 0.01)
+        run_in_order(2, run_type, ['a', 'b'], region)
+
+    run_in_order(2, run_region, ['r1', 'r2'])
+
+    assert messages == ['r1 a', 'r1 b', 'r2 a', 'r2 b']
+
+
+def test_run_graph_emits_log_records_in_item_order(messages):
+    run_graph(2, logger.info, ['b', 'a'], lambda item: ['a'] if item == 'b' else [])
+
+    assert messages == ['b', 'a']
+
+
+def test_flush_emits_held_records(messages):
+    def run(item):
+        logger.info('%s start', item)
+
+        if item == 'slow':
+            # the other item is done by now, but its records are held back until this one is
+            time.sleep(0.05)
+            log_buffer.flush()
+            logger.info('%s after flush', item)
+
+        logger.info('%s end', item)
+
+    run_in_order(2, run, ['slow', 'fast'])
+
+    assert sorted(messages[:3]) == ['fast end', 'fast start', 'slow start']
+    assert messages[3:] == ['slow after flush', 'slow end']
@@ -0,0 +1,28 @@
+from terminator.inventory import TagInventory
+
+
+def test_resource_type_before_slash():
+    assert TagInventory.get_resource_types('arn:aws:ec2:us-east-1:123456789012:instance/i-1') == ('ec2', 'ec2:instance')
+
+
+def test_resource_type_before_colon():
+    assert TagInventory.get_resource_types('arn:aws:rds:us-east-1:123456789012:db:test') == ('rds', 'rds:db')
+
+
+def test_resource_type_ends_at_first_separator():
+    assert TagInventory.get_resource_types('arn:aws:logs:us-east-1:123456789012:log-group:/aws/lambda/test') == ('logs', 'logs:log-group')
+    assert TagInventory.get_resource_types('arn:aws:ecs:us-east-1:123456789012:service/cluster/service') == ('ecs', 'ecs:service')
+
+
+def test_resource_without_type():
+    assert TagInventory.get_resource_types('arn:aws:sns:us-east-1:123456789012:topic') == ('sns',)
+    assert TagInventory.get_resource_types('arn:aws:s3:::bucket') == ('s3',)
+
+
+def test_contains_matches_service_and_type():
+    inventory = TagInventory(None, ['logs:log-group'])
+    inventory.add('arn:aws:logs:us-east-1:123456789012:log-group:/aws/lambda/test', {'Name': 'test'})
+
+    assert inventory.contains(['logs:log-group'])
+    assert inventory.contains(['logs'])
+    assert not inventory.contains(['ec2:instance'])
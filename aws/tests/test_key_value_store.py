@@ -0,0 +1,234 @@
+import sqlite3
+import time
+
+import boto3
+import botocore.config
+import botocore.stub
+import pytest
+
+from terminator.key_value_store import DynamoDbBackend, KeyValueStore, SqliteBackend, get_expires_at
+
+CREATED_TIME = '2020-01-01T00:00:00+00:00'
+
+
+def get_sqlite_backend(tmp_path):
+    backend = SqliteBackend(str(tmp_path / 'terminator.sqlite'))
+    backend.initialize()
+
+    return backend
+
+
+def get_dynamodb_backend():
+    resource = boto3.resource('dynamodb', region_name='us-east-1', aws_access_key_id='key', aws_secret_access_key='secret',
+                              config=botocore.config.Config(retries={'mode': 'standard', 'max_attempts': 3}))
+
+    backend = DynamoDbBackend('terminator', 'us-east-1', lambda service_name, region_name: resource)
+    backend.ddb = resource
+    backend.table = resource.Table('terminator')
+    backend.initialized = True
+
+    return backend
+
+
+def test_sqlite_get_many_returns_existing_keys(tmp_path):
+    backend = get_sqlite_backend(tmp_path)
+    backend.set_many({'a': CREATED_TIME, 'b': CREATED_TIME})
+
+    assert backend.get_many(['a', 'b', 'c']) == {'a': CREATED_TIME, 'b': CREATED_TIME}
+    assert backend.get('c') is None
+
+
+def test_sqlite_get_many_reads_more_keys_than_a_statement_takes(tmp_path):
+    backend = get_sqlite_backend(tmp_path)
+    values = dict((f'key-{index}', CREATED_TIME) for index in range(1200))
+    backend.set_many(values)
+
+    assert backend.get_many(list(values) + ['missing']) == values
+
+
+def test_sqlite_set_many_keeps_existing_values(tmp_path):
+    backend = get_sqlite_backend(tmp_path)
+    backend.set('a', CREATED_TIME)
+    backend.set_many({'a': '2021-01-01T00:00:00+00:00', 'b': '2021-01-01T00:00:00+00:00'})
+
+    assert backend.get_many(['a', 'b']) == {'a': CREATED_TIME, 'b': '2021-01-01T00:00:00+00:00'}
+
+
+def test_sqlite_get_many_refreshes_missing_expiry(tmp_path):
+    backend = get_sqlite_backend(tmp_path)
+    backend.set_many({'a': CREATED_TIME, 'b': CREATED_TIME})
+
+    with sqlite3.connect(backend.path) as connection:
+        connection.execute("UPDATE items SET expires_at = NULL WHERE id = 'a'")
+
+    backend.get_many(['a'])
+
+    with sqlite3.connect(backend.path) as connection:
+        expires_at = connection.execute("SELECT expires_at FROM items WHERE id = 'a'").fetchone()[0]
+
+    assert expires_at >= get_expires_at(backend.retention) - 60
+
+
+def test_sqlite_delete_removes_key(tmp_path):
+    backend = get_sqlite_backend(tmp_path)
+    backend.set('a', CREATED_TIME)
+    backend.delete('a')
+
+    assert not backend.get_many(['a'])
+
+
+def test_sqlite_checkpoint_round_trip(tmp_path):
+    backend = get_sqlite_backend(tmp_path)
+
+    assert backend.get_checkpoint('Checkpoint:us-east-1:*') is None
+
+    backend.set_checkpoint('Checkpoint:us-east-1:*', [('us-east-1', 'Ec2Instance'), ('', 'Database')])
+
+    assert backend.get_checkpoint('Checkpoint:us-east-1:*') == [('us-east-1', 'Ec2Instance'), ('', 'Database')]
+
+
+def test_sqlite_purge_deletes_expired_keys(tmp_path):
+    backend = get_sqlite_backend(tmp_path)
+    backend.set_many({'expired': CREATED_TIME, 'current': CREATED_TIME})
+
+    with sqlite3.connect(backend.path) as connection:
+        connection.execute("UPDATE items SET expires_at = ? WHERE id = 'expired'", (int(time.time()) - 60,))
+
+    assert backend.purge(check=True, force=False, concurrency=1) == 1
+    assert backend.purge(check=False, force=False, concurrency=1) == 1
+    assert backend.get_many(['expired', 'current']) == {'current': CREATED_TIME}
+
+
+def test_store_buffers_writes_until_flush(tmp_path):
+    backend = get_sqlite_backend(tmp_path)
+    store = KeyValueStore(backend)
+    store.set_many({'a': CREATED_TIME})
+
+    assert store.get('a') == CREATED_TIME
+    assert not backend.get_many(['a'])
+
+    store.flush()
+
+    assert backend.get_many(['a']) == {'a': CREATED_TIME}
+
+
+def test_store_flushes_when_buffer_is_full(tmp_path):
+    backend = get_sqlite_backend(tmp_path)
+    store = KeyValueStore(backend, max_pending=2)
+    store.set_many({'a': CREATED_TIME})
+    store.set_many({'b': CREATED_TIME})
+
+    assert backend.get_many(['a', 'b']) == {'a': CREATED_TIME, 'b': CREATED_TIME}
+
+
+def test_store_keeps_values_read_from_backend(tmp_path):
+    backend = get_sqlite_backend(tmp_path)
+    backend.set('a', CREATED_TIME)
+    store = KeyValueStore(backend)
+
+    assert store.get_many(['a', 'b']) == {'a': CREATED_TIME}
+
+    store.set_many({'a': '2021-01-01T00:00:00+00:00', 'b': '2021-01-01T00:00:00+00:00'})
+    store.flush()
+
+    assert backend.get_many(['a', 'b']) == {'a': CREATED_TIME, 'b': '2021-01-01T00:00:00+00:00'}
+
+
+class FailingSqliteBackend(SqliteBackend):
+    """SQLite backend whose next set_many fails, after calling the given function, such as to change the store meanwhile."""
+    def __init__(self, path, during_failure):
+        super().__init__(path)
+        self.during_failure = during_failure
+        self.failures = 1
+
+    def set_many(self, values):
+        if self.failures:
+            self.failures -= 1
+            self.during_failure()
+            raise RuntimeError('throttled')
+
+        super().set_many(values)
+
+
+def test_store_keeps_buffered_keys_when_flush_fails(tmp_path):
+    def during_failure():
+        store.delete('b')
+        store.set_many({'c': '2021-01-01T00:00:00+00:00'})
+        store.delete('c')
+        store.set_many({'c': '2022-01-01T00:00:00+00:00'})
+
+    backend = FailingSqliteBackend(str(tmp_path / 'terminator.sqlite'), during_failure)
+    backend.initialize()
+    store = KeyValueStore(backend)
+    store.set_many({'a': CREATED_TIME, 'b': CREATED_TIME, 'c': CREATED_TIME})
+
+    with pytest.raises(RuntimeError):
+        store.flush()
+
+    assert not backend.get_many(['a', 'b', 'c'])
+
+    store.flush()
+
+    assert backend.get_many(['a', 'b', 'c']) == {'a': CREATED_TIME, 'c': '2022-01-01T00:00:00+00:00'}
+
+
+def test_dynamodb_get_many_gives_up_on_unprocessed_keys(monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    backend = get_dynamodb_backend()
+    request = {'terminator': {'Keys': [{'id': 'a'}], 'ProjectionExpression': 'id, created_time, expires_at'}}
+
+    with botocore.stub.Stubber(backend.ddb.meta.client) as stubber:
+        for _attempt in range(backend.max_attempts):
+            # stubbed responses hold the low-level form of the attribute values, which the resource converts in place
+            unprocessed = {'terminator': {'Keys': [{'id': {'S': 'a'}}], 'ProjectionExpression': 'id, created_time, expires_at'}}
+            stubber.add_response('batch_get_item', {'Responses': {}, 'UnprocessedKeys': unprocessed}, {'RequestItems': request})
+
+        with pytest.raises(RuntimeError):
+            backend.get_many(['a'])
+
+        stubber.assert_no_pending_responses()
+
+
+def test_dynamodb_get_many_batches_expiry_refresh():
+    backend = get_dynamodb_backend()
+    keys = [f'key-{index}' for index in range(30)]
+    items = [{'id': {'S': key}, 'created_time': {'S': CREATED_TIME}} for key in keys]
+
+    with botocore.stub.Stubber(backend.ddb.meta.client) as stubber:
+        stubber.add_response('batch_get_item', {'Responses': {'terminator': items}})
+        # 25 items per request
+        stubber.add_response('transact_write_items', {})
+        stubber.add_response('transact_write_items', {})
+
+        assert backend.get_many(keys) == dict((key, CREATED_TIME) for key in keys)
+
+        stubber.assert_no_pending_responses()
+
+
+def test_dynamodb_expiry_refresh_skips_deleted_keys():
+    backend = get_dynamodb_backend()
+    items = [{'id': {'S': key}, 'created_time': {'S': CREATED_TIME}} for key in ('a', 'b')]
+
+    with botocore.stub.Stubber(backend.ddb.meta.client) as stubber:
+        stubber.add_response('batch_get_item', {'Responses': {'terminator': items}})
+        stubber.add_client_error('transact_write_items', 'TransactionCanceledException')
+        stubber.add_response('update_item', {})
+        # 'b' was deleted since it was read, and stays deleted
+        stubber.add_client_error('update_item', 'ConditionalCheckFailedException')
+
+        assert backend.get_many(['a', 'b']) == {'a': CREATED_TIME, 'b': CREATED_TIME}
+
+        stubber.assert_no_pending_responses()
+
+
+def test_dynamodb_get_many_survives_failed_expiry_refresh():
+    backend = get_dynamodb_backend()
+    items = [{'id': {'S': 'a'}, 'created_time': {'S': CREATED_TIME}}]
+
+    with botocore.stub.Stubber(backend.ddb.meta.client) as stubber:
+        stubber.add_response('batch_get_item', {'Responses': {'terminator': items}})
+        stubber.add_client_error('transact_write_items', 'AccessDeniedException')
+
+        assert backend.get_many(['a']) == {'a': CREATED_TIME}
+
+        stubber.assert_no_pending_responses()
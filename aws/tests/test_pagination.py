@@ -0,0 +1,138 @@
+import boto3
+import botocore.stub
+
+from terminator.pagination import Filter, compile_expression, get_max_page_size, get_paginator, paginate, takes_filters
+
+RUNNING = Filter('instance-state-name', 'State.Name', ('running', 'stopped'))
+
+
+def get_client(service_name):
+    return boto3.client(service_name, region_name='us-east-1', aws_access_key_id='key', aws_secret_access_key='secret')
+
+
+def get_page_size(service_name, operation_name):
+    client = get_client(service_name)
+
+    return get_max_page_size(client, operation_name, get_paginator(client, operation_name))
+
+
+def test_page_size_from_service_model():
+    assert get_page_size('iam', 'list_roles') == 1000
+    assert get_page_size('lambda', 'list_event_source_mappings') == 10000
+
+
+def test_page_size_from_service_defaults():
+    assert get_page_size('ec2', 'describe_instances') == 1000
+    assert get_page_size('redshift', 'describe_clusters') == 100
+    assert get_page_size('memorydb', 'describe_clusters') == 100
+
+
+def test_page_size_of_string_limit_is_left_to_the_api():
+    assert get_page_size('route53', 'list_hosted_zones') is None
+
+
+def test_extra_paginator_is_used_when_botocore_has_none():
+    client = get_client('backup')
+
+    assert get_paginator(client, 'list_backup_vaults')._pagination_cfg['result_key'] == 'BackupVaultList'
+
+
+def test_paginate_requests_largest_pages():
+    client = get_client('iam')
+    role = {'Path': '/', 'RoleName': 'role', 'RoleId': 'AROAEXAMPLEEXAMPLE01', 'Arn': 'arn:aws:iam::123456789012:role/role', 'CreateDate': '2020-01-01'}
+
+    with botocore.stub.Stubber(client) as stubber:
+        stubber.add_response('list_roles', {'Roles': [role], 'IsTruncated': True, 'Marker': 'next'}, {'MaxItems': 1000})
+        stubber.add_response('list_roles', {'Roles': [role, role], 'IsTruncated': False}, {'MaxItems': 1000, 'Marker': 'next'})
+
+        assert [len(page) for page in paginate(client, 'list_roles', 'Roles')] == [1, 2]
+
+
+def test_paginate_sends_filters_to_operations_taking_them():
+    client = get_client('ec2')
+    owner = [{'Name': 'owner-id', 'Values': ['123456789012']}]
+    filters = owner + [{'Name': 'instance-state-name', 'Values': ['running', 'stopped']}]
+
+    with botocore.stub.Stubber(client) as stubber:
+        response = {'Reservations': [{'Instances': [{'InstanceId': 'i-1'}, {'InstanceId': 'i-2'}]}, {'Instances': [{'InstanceId': 'i-3'}]}]}
+        stubber.add_response('describe_instances', response, {'Filters': filters, 'MaxResults': 1000})
+
+        pages = list(paginate(client, 'describe_instances', 'Reservations[].Instances[]', filters=(RUNNING,), Filters=owner))
+
+    # the API has applied the filter, so items without the filtered field are kept
+    assert [[instance['InstanceId'] for instance in page] for page in pages] == [['i-1', 'i-2', 'i-3']]
+
+
+def test_paginate_applies_filters_to_pages_of_other_operations():
+    client = get_client('redshift')
+    creating = Filter(None, 'ClusterStatus', ('creating', 'deleting'), exclude=True)
+
+    with botocore.stub.Stubber(client) as stubber:
+        response = {'Clusters': [{'ClusterIdentifier': 'a', 'ClusterStatus': 'available'}, {'ClusterIdentifier': 'b', 'ClusterStatus': 'creating'}]}
+        stubber.add_response('describe_clusters', response, {'MaxRecords': 100})
+
+        pages = list(paginate(client, 'describe_clusters', 'Clusters', filters=(creating,)))
+
+    assert [[cluster['ClusterIdentifier'] for cluster in page] for page in pages] == [['a']]
+
+
+def test_exclusive_filters_are_applied_to_pages():
+    client = get_client('ec2')
+    default = Filter('group-name', 'GroupName', ('default',), exclude=True)
+
+    with botocore.stub.Stubber(client) as stubber:
+        stubber.add_response('describe_security_groups', {'SecurityGroups': [{'GroupName': 'default'}, {'GroupName': 'test'}]}, {'MaxResults': 1000})
+
+        pages = list(paginate(client, 'describe_security_groups', 'SecurityGroups', filters=(default,)))
+
+    assert pages == [[{'GroupName': 'test'}]]
+
+
+def test_takes_filters():
+    assert takes_filters(get_client('ec2'), 'describe_instances')
+    assert not takes_filters(get_client('lambda'), 'list_event_source_mappings')
+
+
+def test_filter_includes_values():
+    assert RUNNING.matches({'State': {'Name': 'running'}})
+    assert not RUNNING.matches({'State': {'Name': 'terminated'}})
+    assert not RUNNING.matches({})
+
+
+def test_filter_excludes_values():
+    value = Filter(None, 'Status', ('creating', 'deleting'), exclude=True)
+
+    assert value.matches({'Status': 'available'})
+    assert not value.matches({'Status': 'deleting'})
+
+
+def test_filter_matches_prefixes():
+    value = Filter(None, 'RoleName', ('ansible-test',), prefix=True)
+
+    assert value.matches({'RoleName': 'ansible-test-123'})
+    assert not value.matches({'RoleName': 'other'})
+    assert not value.matches({})
+    assert Filter(None, 'RoleName', ('ansible-test',), exclude=True, prefix=True).matches({'RoleName': 'other'})
+
+
+def test_filter_matches_any_value_of_lists():
+    value = Filter(None, 'Aliases', ('alias/aws/',), prefix=True)
+
+    assert value.matches({'Aliases': ['alias/test', 'alias/aws/ebs']})
+    assert not value.matches({'Aliases': []})
+    assert Filter(None, 'Associations[].Main', (True,)).matches({'Associations': [{'Main': False}, {'Main': True}]})
+
+
+def test_filter_api_values():
+    assert RUNNING.api_values == ['running', 'stopped']
+    assert Filter('is-default', 'IsDefault', (False,)).api_values == ['false']
+    assert Filter('group-name', 'GroupName', ('default_elb_',), prefix=True).api_values == ['default_elb_*']
+
+
+def test_expressions_are_compiled_once():
+    assert compile_expression('Reservations[].Instances[]') is compile_expression('Reservations[].Instances[]')
+
+
+def test_many_distinct_expressions():
+    # more distinct expressions than the parser cache of jmespath holds, which broke its cache eviction on Python 3.11 and later before jmespath 1.0
+    assert all(compile_expression(f'Items{index}[].Name').search({}) is None for index in range(300))
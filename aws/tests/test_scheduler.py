@@ -0,0 +1,60 @@
+import time
+
+from terminator.scheduler import Scheduler
+
+
+def test_plan_keeps_unit_order():
+    scheduler = Scheduler()
+    scheduler.plan([('us-east-1', 'B'), ('us-east-1', 'A'), ('', 'Database')])
+
+    assert scheduler.pending() == [('us-east-1', 'B'), ('us-east-1', 'A'), ('', 'Database')]
+    assert scheduler.is_planned(('us-east-1', 'A'))
+    assert not scheduler.is_planned(('us-east-2', 'A'))
+
+
+def test_without_plan_every_unit_is_planned():
+    scheduler = Scheduler()
+
+    assert scheduler.is_planned(('us-east-1', 'A'))
+    assert scheduler.pending() == []
+
+
+def test_resume_limits_plan_to_checkpoint():
+    scheduler = Scheduler()
+    # checkpoints are stored as JSON, so units come back as lists
+    scheduler.resume([['us-east-1', 'C'], ['us-east-1', 'A']])
+    scheduler.plan([('us-east-1', 'A'), ('us-east-1', 'B'), ('us-east-1', 'C')])
+
+    assert scheduler.pending() == [('us-east-1', 'A'), ('us-east-1', 'C')]
+    assert not scheduler.is_planned(('us-east-1', 'B'))
+
+
+def test_finished_units_are_not_pending():
+    scheduler = Scheduler()
+    scheduler.plan([('us-east-1', 'A'), ('us-east-1', 'B')])
+
+    assert scheduler.start(('us-east-1', 'A'))
+    scheduler.finish(('us-east-1', 'A'))
+
+    assert scheduler.pending() == [('us-east-1', 'B')]
+
+
+def test_expired_deadline_defers_units_and_reports_pending_once():
+    reports = []
+    scheduler = Scheduler(time.monotonic() - 1, on_expired=reports.append)
+    scheduler.plan([('us-east-1', 'A'), ('us-east-1', 'B'), ('us-east-1', 'C')])
+    scheduler.finish(('us-east-1', 'A'))
+
+    assert not scheduler.start(('us-east-1', 'B'))
+    assert not scheduler.start(('us-east-1', 'C'))
+
+    assert scheduler.deferred == [('us-east-1', 'B'), ('us-east-1', 'C')]
+    assert reports == [[('us-east-1', 'B'), ('us-east-1', 'C')]]
+
+
+def test_future_deadline_starts_units():
+    scheduler = Scheduler(time.monotonic() + 60)
+
+    assert not scheduler.expired()
+    assert scheduler.start(('us-east-1', 'A'))
+    assert not scheduler.deferred